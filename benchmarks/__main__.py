@@ -0,0 +1,103 @@
+"""
+Run all the benchmarks with small sizes and print one JSON line per
+measurement, tagged with the benchmark and the version of the driver.
+
+Usage: python -m benchmarks [--rows N] [--columns N] [--types T,T,...]
+    [--string-length N] [--path-length N] [--repeat N] [--samples N]
+"""
+
+import argparse
+import json
+
+import millenniumdb_driver_python
+
+from . import (
+    bench_cancel,
+    bench_connection,
+    bench_export,
+    bench_intern_pool,
+    bench_load_balancing,
+    bench_message_decoder,
+    bench_parallel_decode,
+    bench_prefetch,
+    bench_records,
+    bench_result,
+    bench_socket_reader,
+    bench_to_df,
+)
+from .mock_server import add_synthetic_arguments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_synthetic_arguments(parser, rows=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+    synthetic = (
+        args.rows,
+        args.columns,
+        args.types,
+        args.string_length,
+        args.path_length,
+        args.repeat,
+    )
+
+    benchmarks = [
+        (
+            "message_decoder",
+            lambda: bench_message_decoder.run(args.rows, args.repeat)
+            + [bench_message_decoder.run_rows(*synthetic)],
+        ),
+        ("socket_reader", lambda: bench_socket_reader.run(args.rows, args.repeat)),
+        ("records", lambda: bench_records.run(args.rows, args.columns)),
+        ("intern_pool", lambda: bench_intern_pool.run(args.rows, 1_000)),
+        ("result", lambda: bench_result.run(*synthetic)),
+        ("to_df", lambda: bench_to_df.run(*synthetic)),
+        (
+            "export",
+            lambda: bench_export.run(
+                *synthetic[:-1], ("csv", "ndjson", "parquet"), args.repeat
+            ),
+        ),
+        (
+            "parallel_decode",
+            lambda: bench_parallel_decode.run(*synthetic[:-1], (0, 2), args.repeat),
+        ),
+        (
+            "prefetch",
+            lambda: bench_prefetch.run(
+                *synthetic[:-1], 20e6, 20e-6, True, (0, 1024), args.repeat
+            ),
+        ),
+        ("connection", lambda: bench_connection.run(args.samples)),
+        ("cancel", lambda: bench_cancel.run(args.samples, 0.005)),
+        (
+            "load_balancing",
+            lambda: bench_load_balancing.run(
+                500, (1, 2), 0.002, 2, 8, ("least_outstanding",), False
+            ),
+        ),
+    ]
+    for name, run in benchmarks:
+        try:
+            results = run()
+        except ImportError as e:
+            # pandas is optional
+            print(json.dumps({"benchmark": name, "skipped": str(e)}))
+            continue
+        for result in results:
+            print(
+                json.dumps(
+                    {
+                        "benchmark": name,
+                        "driver_version": millenniumdb_driver_python.__version__,
+                        **result,
+                    }
+                ),
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
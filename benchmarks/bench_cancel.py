@@ -0,0 +1,89 @@
+"""
+Measure the latency of cancelling queries, from the deadline of a query
+with a timeout, or from a call to driver.cancel, until the CANCEL request
+arrives at the server. The server holds every query until it is cancelled.
+
+Usage: python -m benchmarks.bench_cancel [--samples N] [--timeout SECONDS]
+"""
+
+import argparse
+import json
+import time
+
+import millenniumdb_driver_python
+
+from .measure import percentiles
+from .mock_server import MockServer
+
+QUERY = "MATCH (?x) RETURN *"
+
+
+def _finish(result) -> None:
+    # The cancelled query fails once the server receives its CANCEL request
+    try:
+        result.summary()
+    except millenniumdb_driver_python.MillenniumDBError:
+        pass
+
+
+def run(samples: int, timeout: float) -> list:
+    server = MockServer(b"", hold_until_cancel=True)
+    results = []
+    try:
+        driver = millenniumdb_driver_python.driver(server.url)
+        with driver, driver.session() as session:
+            # Start the scheduler thread and open the control connection
+            # before measuring
+            _finish(session.run(QUERY, timeout=timeout, stream=True))
+
+            timeout_latencies = []
+            for _ in range(samples):
+                result = session.run(QUERY, timeout=timeout, stream=True)
+                # The deadline is scheduled when the variables are received,
+                # before run returns
+                deadline = time.perf_counter() + timeout
+                token = result._query_preamble["cancellationToken"]
+                _finish(result)
+                timeout_latencies.append(server.cancel_times[token] - deadline)
+
+            manual_latencies = []
+            for _ in range(samples):
+                result = session.run(QUERY, stream=True)
+                token = result._query_preamble["cancellationToken"]
+                start = time.perf_counter()
+                driver.cancel(result)
+                _finish(result)
+                manual_latencies.append(server.cancel_times[token] - start)
+
+            results.append(
+                {
+                    "operation": "timeout",
+                    "samples": samples,
+                    "timeout": timeout,
+                    **percentiles([max(0.0, t) for t in timeout_latencies]),
+                    **driver.cancel_stats(),
+                }
+            )
+            results.append(
+                {
+                    "operation": "driver_cancel",
+                    "samples": samples,
+                    **percentiles(manual_latencies),
+                }
+            )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=0.005)
+    args = parser.parse_args()
+    for result in run(args.samples, args.timeout):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Measure the latency of opening a connection with its handshake, of acquiring
+a session from the pool of a driver, and of a catalog request.
+
+Usage: python -m benchmarks.bench_connection [--samples N]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python.socket_connection import SocketConnection
+
+from .measure import percentiles
+from .mock_server import MockServer, encode_response
+
+
+def sample(function: Callable[[], object], samples: int) -> List[float]:
+    """
+    Get the seconds taken by each of samples calls to the function
+    """
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(samples: int) -> list:
+    server = MockServer(encode_response(["x"], [[1]]))
+    results = []
+    try:
+
+        def connect():
+            SocketConnection("127.0.0.1", server.port).close()
+
+        # The driver is built with the pool already open and the catalog cache
+        # disabled, so each call is a round trip to the server
+        driver = millenniumdb_driver_python.driver(
+            server.url, min_pool_size=1, catalog_ttl=0.0
+        )
+        with driver:
+
+            def acquire():
+                driver.session().close()
+
+            def catalog():
+                driver.catalog()
+
+            for operation, function in [
+                ("connect", connect),
+                ("session_acquire", acquire),
+                ("catalog", catalog),
+            ]:
+                function()
+                results.append(
+                    {
+                        "operation": operation,
+                        "samples": samples,
+                        **percentiles(sample(function, samples)),
+                    }
+                )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=1_000)
+    args = parser.parse_args()
+    for result in run(args.samples):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measure the rows per second and peak memory of writing a synthetic result
+to a file with session.export, in each format, against building the rows
+with result.data() and writing them with the csv module.
+
+Usage: python -m benchmarks.bench_export [--rows N] [--columns N]
+    [--types T,T,...] [--string-length N] [--path-length N]
+    [--formats F,F,...] [--repeat N]
+"""
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+
+import millenniumdb_driver_python
+
+from .measure import best_time, peak_memory
+from .mock_server import MockServer, add_synthetic_arguments, synthetic_response
+
+QUERY = "MATCH (?x) RETURN *"
+
+
+def run(
+    rows: int,
+    columns: int,
+    types: tuple,
+    string_length: int,
+    path_length: int,
+    formats: tuple,
+    repeat: int,
+) -> list:
+    response = synthetic_response(rows, columns, types, string_length, path_length)
+    server = MockServer(response)
+    results = []
+    directory = tempfile.mkdtemp()
+    try:
+        driver = millenniumdb_driver_python.driver(server.url)
+        with driver, driver.session() as session:
+            path = os.path.join(directory, "export")
+
+            def data_csv():
+                result = session.run(QUERY)
+                with open(path, "w", newline="") as file:
+                    writer = csv.DictWriter(file, result.variables())
+                    writer.writeheader()
+                    writer.writerows(result.data())
+
+            modes = [("data_csv", data_csv)]
+            for format in formats:
+
+                def export(format=format):
+                    session.export(QUERY, path, format)
+
+                modes.append((f"export_{format}", export))
+
+            for mode, write in modes:
+                try:
+                    seconds = best_time(write, repeat)
+                except ImportError as e:
+                    # pyarrow is optional
+                    results.append({"mode": mode, "skipped": str(e)})
+                    continue
+                results.append(
+                    {
+                        "mode": mode,
+                        "rows": rows,
+                        "columns": columns,
+                        "seconds": seconds,
+                        "rows_per_s": rows / seconds,
+                        "file_mb": os.path.getsize(path) / 1e6,
+                        "peak_mb": peak_memory(write),
+                    }
+                )
+    finally:
+        server.close()
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_synthetic_arguments(parser, rows=100_000)
+    parser.add_argument(
+        "--formats",
+        type=lambda formats: tuple(formats.split(",")),
+        default=("csv", "ndjson", "parquet"),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    results = run(
+        args.rows,
+        args.columns,
+        args.types,
+        args.string_length,
+        args.path_length,
+        args.formats,
+        args.repeat,
+    )
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measure the memory retained by a result with many repeated nodes and IRIs,
+with and without interning the graph objects.
+
+Usage: python -m benchmarks.bench_intern_pool [--rows N] [--distinct N]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python.graph_objects import IRI, GraphNode, StringDatatype
+
+from .mock_server import MockServer, encode_response
+
+QUERY = "MATCH (?from)-[?type]->(?to) RETURN *"
+
+DATATYPES = [
+    "http://www.w3.org/2001/XMLSchema#int",
+    "http://www.w3.org/2001/XMLSchema#date",
+    "http://www.w3.org/2001/XMLSchema#decimal",
+]
+
+
+def run(rows: int, distinct: int) -> list:
+    response = encode_response(
+        ["from", "type", "to", "value"],
+        [
+            [
+                GraphNode(f"Q{i % distinct}"),
+                IRI(f"http://www.wikidata.org/prop/direct/P{i % 20}"),
+                GraphNode(f"Q{(i * 7) % distinct}"),
+                StringDatatype(str(i % 100), DATATYPES[i % len(DATATYPES)]),
+            ]
+            for i in range(rows)
+        ],
+    )
+    server = MockServer(response)
+    results = []
+    try:
+        for intern in (False, True):
+            driver = millenniumdb_driver_python.driver(server.url)
+            with driver, driver.session() as session:
+                start = time.perf_counter()
+                session.run(QUERY, intern=intern)
+                seconds = time.perf_counter() - start
+
+                # Measured apart, tracing the allocations slows down decoding
+                tracemalloc.start()
+                result = session.run(QUERY, intern=intern)
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del result
+            results.append(
+                {
+                    "intern": intern,
+                    "rows": rows,
+                    "distinct_nodes": distinct,
+                    "seconds": seconds,
+                    "retained_mb": current / 1e6,
+                    "peak_mb": peak / 1e6,
+                }
+            )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=1_000)
+    args = parser.parse_args()
+    for result in run(args.rows, args.distinct):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
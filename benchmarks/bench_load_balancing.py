@@ -0,0 +1,111 @@
+"""
+Measure the throughput of concurrent queries balanced over replicas, each
+one a mock server that runs a bounded number of queries at the same time
+and takes a fixed latency for each one, with and without an unreachable
+replica that is ejected.
+
+Usage: python -m benchmarks.bench_load_balancing [--queries N]
+    [--replicas N,N,...] [--latency SECONDS] [--workers N] [--concurrency N]
+    [--strategies S,S,...] [--unreachable]
+"""
+
+import argparse
+import json
+import socket
+
+import millenniumdb_driver_python
+
+from .mock_server import MockServer, encode_response
+
+QUERY = "MATCH (?x) RETURN ?x LIMIT 1"
+
+
+def _unreachable_url() -> str:
+    # A port that was free a moment ago, nothing listens on it
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"mdb://127.0.0.1:{port}"
+
+
+def run(
+    queries: int,
+    replicas: tuple,
+    latency: float,
+    workers: int,
+    concurrency: int,
+    strategies: tuple,
+    unreachable: bool,
+) -> list:
+    response = encode_response(["x"], [[1]])
+    results = []
+    for strategy in strategies:
+        for num_replicas in replicas:
+            servers = [
+                MockServer(response, latency=latency, workers=workers)
+                for _ in range(num_replicas)
+            ]
+            urls = [server.url for server in servers]
+            if unreachable:
+                urls.append(_unreachable_url())
+            try:
+                with millenniumdb_driver_python.driver(
+                    urls, load_balancing=strategy
+                ) as driver:
+                    fan_out = driver.run_all([QUERY] * queries, concurrency=concurrency)
+                    fan_out.outcomes()
+                    stats = fan_out.stats()
+                    host_stats = driver.host_stats() if len(urls) > 1 else {}
+                results.append(
+                    {
+                        "strategy": strategy,
+                        "replicas": num_replicas,
+                        "unreachable": unreachable,
+                        "queries": queries,
+                        "concurrency": concurrency,
+                        "latency": latency,
+                        "workers": workers,
+                        "failed_queries": stats["failed_queries"],
+                        "queries_per_second": stats["queries_per_second"],
+                        "p50_ms": stats["p50_latency"] * 1e3,
+                        "p99_ms": stats["p99_latency"] * 1e3,
+                        "host_requests": [
+                            host["requests"] for host in host_stats.values()
+                        ],
+                        "ejections": sum(
+                            host["ejections"] for host in host_stats.values()
+                        ),
+                    }
+                )
+            finally:
+                for server in servers:
+                    server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--replicas", default="1,2,4")
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--strategies", default="least_outstanding,ewma")
+    parser.add_argument("--unreachable", action="store_true")
+    args = parser.parse_args()
+    replicas = tuple(int(n) for n in args.replicas.split(","))
+    strategies = tuple(args.strategies.split(","))
+    for result in run(
+        args.queries,
+        replicas,
+        args.latency,
+        args.workers,
+        args.concurrency,
+        strategies,
+        args.unreachable,
+    ):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
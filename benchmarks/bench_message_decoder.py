@@ -0,0 +1,143 @@
+"""
+Measure the values per second decoded by MessageDecoder for each DataType,
+and the rows per second of the RECORD payloads of a synthetic result.
+
+Usage: python -m benchmarks.bench_message_decoder [--values N] [--repeat N]
+    [--rows N] [--columns N] [--types T,T,...] [--string-length N]
+    [--path-length N]
+"""
+
+import argparse
+import json
+import time
+from decimal import Decimal
+
+from millenniumdb_driver_python import protocol
+from millenniumdb_driver_python.graph_objects import (
+    IRI,
+    DateTime,
+    GraphAnon,
+    GraphEdge,
+    GraphNode,
+    SimpleDate,
+    StringDatatype,
+    StringLang,
+    Time,
+)
+from millenniumdb_driver_python.iobuffer import IOBuffer
+from millenniumdb_driver_python.message_decoder import MessageDecoder
+
+from .mock_server import (
+    add_synthetic_arguments,
+    encode_float,
+    encode_uint,
+    encode_value,
+    make_path,
+    synthetic_rows,
+)
+
+SAMPLES = {
+    protocol.DataType.NULL: encode_value(None),
+    protocol.DataType.BOOL_TRUE: encode_value(True),
+    protocol.DataType.UINT8: encode_uint(protocol.DataType.UINT8, 200),
+    protocol.DataType.UINT16: encode_uint(protocol.DataType.UINT16, 60_000),
+    protocol.DataType.UINT32: encode_uint(protocol.DataType.UINT32, 4_000_000_000),
+    protocol.DataType.UINT64: encode_uint(protocol.DataType.UINT64, 2**63),
+    protocol.DataType.INT64: encode_value(-123_456_789),
+    protocol.DataType.FLOAT: encode_float(1.5),
+    protocol.DataType.DOUBLE: encode_value(3.25),
+    protocol.DataType.DECIMAL: encode_value(Decimal("12.345")),
+    protocol.DataType.STRING: encode_value("a string of 24 characters"),
+    protocol.DataType.STRING_LANG: encode_value(StringLang("hello", "en")),
+    protocol.DataType.STRING_DATATYPE: encode_value(
+        StringDatatype("42", "http://www.w3.org/2001/XMLSchema#int")
+    ),
+    protocol.DataType.IRI: encode_value(IRI("http://www.wikidata.org/entity/Q42")),
+    protocol.DataType.NAMED_NODE: encode_value(GraphNode("Q42")),
+    protocol.DataType.EDGE: encode_value(GraphEdge("_e42")),
+    protocol.DataType.ANON: encode_value(GraphAnon("_a42")),
+    protocol.DataType.DATE: encode_value(SimpleDate(2024, 5, 17, -180)),
+    protocol.DataType.TIME: encode_value(Time(12, 30, 15, 0)),
+    protocol.DataType.DATETIME: encode_value(DateTime(2024, 5, 17, 12, 30, 15, 60)),
+    protocol.DataType.PATH: encode_value(make_path(8)),
+    protocol.DataType.LIST: encode_value([1, 2, 3, 4]),
+    protocol.DataType.MAP: encode_value({"a": 1, "b": "x"}),
+}
+
+
+def _decode_all(data: bytes, num_values: int, repeat: int) -> float:
+    """
+    Get the best time of decoding num_values values from data
+    """
+    iobuffer = IOBuffer(len(data))
+    iobuffer.write_bytes(data)
+    decoder = MessageDecoder(iobuffer)
+    best = float("inf")
+    for _ in range(repeat):
+        iobuffer._current_read_position = 0
+        start = time.perf_counter()
+        for _ in range(num_values):
+            decoder.decode()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_rows(
+    rows: int,
+    columns: int,
+    types: tuple,
+    string_length: int,
+    path_length: int,
+    repeat: int,
+) -> dict:
+    _, values = synthetic_rows(rows, columns, types, string_length, path_length)
+    data = b"".join(encode_value(row) for row in values)
+    best = _decode_all(data, rows, repeat)
+    return {
+        "types": ",".join(types),
+        "rows": rows,
+        "columns": columns,
+        "string_length": string_length,
+        "path_length": path_length,
+        "rows_per_s": rows / best,
+        "mb_per_s": len(data) / best / 1e6,
+    }
+
+
+def run(num_values: int, repeat: int) -> list:
+    results = []
+    for data_type, sample in SAMPLES.items():
+        data = sample * num_values
+        best = _decode_all(data, num_values, repeat)
+        results.append(
+            {
+                "data_type": data_type.name,
+                "values": num_values,
+                "values_per_s": num_values / best,
+                "mb_per_s": len(data) / best / 1e6,
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--values", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    add_synthetic_arguments(parser, rows=100_000)
+    args = parser.parse_args()
+    for result in run(args.values, args.repeat):
+        print(json.dumps(result))
+    result = run_rows(
+        args.rows,
+        args.columns,
+        args.types,
+        args.string_length,
+        args.path_length,
+        args.repeat,
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
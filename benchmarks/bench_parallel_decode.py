@@ -0,0 +1,95 @@
+"""
+Measure how the rows per second of receiving a large synthetic result scale
+with the number of decode processes of the driver, 0 being the result
+decoded by the process that receives it.
+
+The pool of each driver is started by a first query before measuring.
+
+Usage: python -m benchmarks.bench_parallel_decode [--rows N] [--columns N]
+    [--types T,T,...] [--string-length N] [--path-length N]
+    [--processes N,N,...] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import ParallelStorage
+
+from .measure import best_time
+from .mock_server import MockServer, add_synthetic_arguments, synthetic_response
+
+QUERY = "MATCH (?x) RETURN *"
+
+
+def run(
+    rows: int,
+    columns: int,
+    types: tuple,
+    string_length: int,
+    path_length: int,
+    processes: tuple,
+    repeat: int,
+) -> list:
+    response = synthetic_response(rows, columns, types, string_length, path_length)
+    server = MockServer(response)
+    results = []
+    try:
+        for num_processes in processes:
+            driver = millenniumdb_driver_python.driver(
+                server.url, decode_processes=num_processes
+            )
+            with driver, driver.session() as session:
+                storage = ParallelStorage() if num_processes > 0 else None
+
+                def receive():
+                    session.run(QUERY, raw=True, storage=storage).records()
+
+                receive()
+                seconds = best_time(receive, repeat)
+            results.append(
+                {
+                    "processes": num_processes,
+                    "cpus": os.cpu_count(),
+                    "rows": rows,
+                    "columns": columns,
+                    "seconds": seconds,
+                    "rows_per_s": rows / seconds,
+                    "mb_per_s": len(response) / seconds / 1e6,
+                }
+            )
+    finally:
+        server.close()
+
+    base = results[0]["seconds"]
+    for result in results:
+        result["speedup"] = base / result["seconds"]
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_synthetic_arguments(parser, rows=2_000_000)
+    parser.add_argument(
+        "--processes",
+        type=lambda processes: tuple(int(n) for n in processes.split(",")),
+        default=(0, 1, 2, 4, 8),
+    )
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+    results = run(
+        args.rows,
+        args.columns,
+        args.types,
+        args.string_length,
+        args.path_length,
+        args.processes,
+        args.repeat,
+    )
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Measure the rows per second of streaming a synthetic result whose records
+take some time each to consume, from a server sending at a limited
+bandwidth, with and without prefetching the records in the background.
+
+Without prefetching the receive time and the consume time add up, with it
+the total time approaches the larger of the two. The consumer is busy on
+the CPU for each record, or with --io waits for each batch of 100 records
+as if it wrote them somewhere. A CPU-bound consumer only overlaps with the
+decoding on a machine with a free core, and not at all on a single core.
+
+Usage: python -m benchmarks.bench_prefetch [--rows N] [--columns N]
+    [--types T,T,...] [--string-length N] [--path-length N]
+    [--bandwidth MB/S] [--work-us N] [--io] [--prefetch N,N,...] [--repeat N]
+"""
+
+import argparse
+import json
+import time
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import PrefetchStorage
+
+from .measure import best_time
+from .mock_server import MockServer, add_synthetic_arguments, synthetic_response
+
+QUERY = "MATCH (?x) RETURN *"
+
+
+# The number of records an I/O-bound consumer waits for at once
+IO_BATCH = 100
+
+
+def consume(result, work: float, io: bool) -> int:
+    """
+    Read the records of a result, taking work seconds for each one
+    """
+    num_records = 0
+    for _ in result:
+        num_records += 1
+        if io:
+            if num_records % IO_BATCH == 0:
+                time.sleep(work * IO_BATCH)
+            continue
+        end = time.perf_counter() + work
+        while time.perf_counter() < end:
+            pass
+    return num_records
+
+
+def run(
+    rows: int,
+    columns: int,
+    types: tuple,
+    string_length: int,
+    path_length: int,
+    bandwidth: float,
+    work: float,
+    io: bool,
+    prefetches: tuple,
+    repeat: int,
+) -> list:
+    response = synthetic_response(rows, columns, types, string_length, path_length)
+    server = MockServer(response, bandwidth=bandwidth)
+    results = []
+    try:
+        driver = millenniumdb_driver_python.driver(server.url)
+        with driver, driver.session() as session:
+            for prefetch in prefetches:
+                storage = PrefetchStorage(prefetch) if prefetch > 0 else None
+
+                def receive():
+                    result = session.run(QUERY, stream=True, storage=storage)
+                    consume(result, work, io)
+
+                seconds = best_time(receive, repeat)
+                results.append(
+                    {
+                        "prefetch": prefetch,
+                        "consumer": "io" if io else "cpu",
+                        "rows": rows,
+                        "columns": columns,
+                        "network_s": len(response) / bandwidth,
+                        "consume_s": rows * work,
+                        "seconds": seconds,
+                        "rows_per_s": rows / seconds,
+                    }
+                )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_synthetic_arguments(parser, rows=100_000)
+    parser.add_argument("--bandwidth", type=float, default=10.0, help="MB per second")
+    parser.add_argument("--work-us", type=float, default=20.0)
+    parser.add_argument("--io", action="store_true")
+    parser.add_argument(
+        "--prefetch",
+        type=lambda prefetches: tuple(int(n) for n in prefetches.split(",")),
+        default=(0, 1024),
+    )
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+    results = run(
+        args.rows,
+        args.columns,
+        args.types,
+        args.string_length,
+        args.path_length,
+        args.bandwidth * 1e6,
+        args.work_us / 1e6,
+        args.io,
+        args.prefetch,
+        args.repeat,
+    )
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure the time and the memory retained by the records of a wide and long
+result, as Records and as plain tuples (raw=True).
+
+Usage: python -m benchmarks.bench_records [--rows N] [--columns N]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import millenniumdb_driver_python
+
+from .mock_server import MockServer, encode_response
+
+QUERY = "MATCH (?x) RETURN *"
+
+
+def run(rows: int, columns: int) -> list:
+    response = encode_response(
+        [f"v{i}" for i in range(columns)],
+        [[row * columns + i for i in range(columns)] for row in range(rows)],
+    )
+    server = MockServer(response)
+    results = []
+    try:
+        for raw in (False, True):
+            driver = millenniumdb_driver_python.driver(server.url)
+            with driver, driver.session() as session:
+                start = time.perf_counter()
+                session.run(QUERY, raw=raw)
+                seconds = time.perf_counter() - start
+
+                # Measured apart, tracing the allocations slows down decoding
+                tracemalloc.start()
+                result = session.run(QUERY, raw=raw)
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del result
+            results.append(
+                {
+                    "raw": raw,
+                    "rows": rows,
+                    "columns": columns,
+                    "seconds": seconds,
+                    "retained_mb": current / 1e6,
+                    "bytes_per_row": current / rows,
+                }
+            )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=10)
+    args = parser.parse_args()
+    for result in run(args.rows, args.columns):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measure decoding the responses of a capture made by
+session.run(query, capture=path), as records, raw tuples, columns and a
+stream, with no server involved. Captures of slow production queries can be
+kept and benchmarked as they are.
+
+Usage: python -m benchmarks.bench_replay CAPTURE [--repeat N]
+"""
+
+import argparse
+import json
+import os
+
+import millenniumdb_driver_python
+
+from .bench_result import MODES
+from .measure import best_time, peak_memory
+
+
+def run(path: str, repeat: int) -> list:
+    results = []
+    num_bytes = os.path.getsize(path)
+    with millenniumdb_driver_python.replay(path) as replay:
+        num_responses = sum(1 for _ in replay.results())
+        num_rows = replay.io_stats()["messages"] - 2 * num_responses
+
+        for mode, (kwargs, consume) in MODES.items():
+
+            def decode():
+                replay.rewind()
+                for result in replay.results(**kwargs):
+                    if isinstance(result, millenniumdb_driver_python.ResultError):
+                        continue
+                    consume(result)
+
+            seconds = best_time(decode, repeat)
+            results.append(
+                {
+                    "mode": mode,
+                    "responses": num_responses,
+                    "rows": num_rows,
+                    "seconds": seconds,
+                    "rows_per_s": num_rows / seconds,
+                    "mb_per_s": num_bytes / seconds / 1e6,
+                    "peak_mb": peak_memory(decode),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("capture")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for result in run(args.capture, args.repeat):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
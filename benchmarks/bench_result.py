@@ -0,0 +1,83 @@
+"""
+Measure the rows per second, MB per second and peak memory of receiving a
+synthetic result through Result, as Records, raw tuples, columns and a stream.
+
+Usage: python -m benchmarks.bench_result [--rows N] [--columns N]
+    [--types T,T,...] [--string-length N] [--path-length N] [--repeat N]
+"""
+
+import argparse
+import json
+
+import millenniumdb_driver_python
+
+from .measure import best_time, peak_memory
+from .mock_server import MockServer, add_synthetic_arguments, synthetic_response
+
+QUERY = "MATCH (?x) RETURN *"
+
+# The keyword arguments of session.run, and how the result is consumed
+MODES = {
+    "records": ({}, lambda result: result.records()),
+    "raw": ({"raw": True}, lambda result: result.records()),
+    "columnar": ({"columnar": True}, lambda result: result.summary()),
+    "stream": ({"stream": True}, lambda result: sum(1 for _ in result)),
+}
+
+
+def run(
+    rows: int,
+    columns: int,
+    types: tuple,
+    string_length: int,
+    path_length: int,
+    repeat: int,
+) -> list:
+    response = synthetic_response(rows, columns, types, string_length, path_length)
+    server = MockServer(response)
+    results = []
+    try:
+        driver = millenniumdb_driver_python.driver(server.url)
+        with driver, driver.session() as session:
+            for mode, (kwargs, consume) in MODES.items():
+
+                def receive():
+                    consume(session.run(QUERY, **kwargs))
+
+                seconds = best_time(receive, repeat)
+                results.append(
+                    {
+                        "mode": mode,
+                        "types": ",".join(types),
+                        "rows": rows,
+                        "columns": columns,
+                        "seconds": seconds,
+                        "rows_per_s": rows / seconds,
+                        "mb_per_s": len(response) / seconds / 1e6,
+                        "peak_mb": peak_memory(receive),
+                    }
+                )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_synthetic_arguments(parser, rows=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    results = run(
+        args.rows,
+        args.columns,
+        args.types,
+        args.string_length,
+        args.path_length,
+        args.repeat,
+    )
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
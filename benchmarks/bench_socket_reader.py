@@ -0,0 +1,77 @@
+"""
+Compare the recv calls and throughput of the read ahead socket reader with
+reading exactly the bytes of each chunk (read_ahead_size=0).
+
+Only the chunks are received, the messages are not decoded, so the numbers
+reflect the socket path alone.
+
+Usage: python -m benchmarks.bench_socket_reader [--rows N] [--repeat N]
+"""
+
+import argparse
+import json
+import time
+
+from millenniumdb_driver_python.chunk_decoder import ChunkDecoder
+from millenniumdb_driver_python.iobuffer import IOBuffer
+from millenniumdb_driver_python.request_builder import RequestBuilder
+from millenniumdb_driver_python.socket_connection import SocketConnection
+
+from .mock_server import MockServer, encode_response
+
+READ_AHEAD_SIZES = [0, 64 * 1024, 256 * 1024, 1024 * 1024]
+
+
+def receive_response(connection: SocketConnection, num_messages: int) -> None:
+    iobuffer = IOBuffer()
+    chunk_decoder = ChunkDecoder(connection, iobuffer)
+    connection.sendall(RequestBuilder.run("MATCH (?x) RETURN *"))
+    for _ in range(num_messages):
+        chunk_decoder.decode()
+        iobuffer.reset()
+
+
+def run(rows: int, repeat: int) -> list:
+    response = encode_response(
+        ["id", "name", "score"],
+        [[i, f"name-{i}", i * 0.5] for i in range(rows)],
+    )
+    # VARIABLES + RECORDs + SUCCESS
+    num_messages = rows + 2
+    server = MockServer(response)
+    results = []
+    try:
+        for read_ahead_size in READ_AHEAD_SIZES:
+            connection = SocketConnection("127.0.0.1", server.port, read_ahead_size)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                receive_response(connection, num_messages)
+                best = min(best, time.perf_counter() - start)
+            connection.close()
+            results.append(
+                {
+                    "read_ahead_size": read_ahead_size,
+                    "messages": num_messages,
+                    "seconds": best,
+                    "mb_per_s": len(response) / best / 1e6,
+                    "recv_calls_per_message": connection.num_recv_calls
+                    / (num_messages * repeat),
+                }
+            )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for result in run(args.rows, args.repeat):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
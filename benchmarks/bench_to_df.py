@@ -0,0 +1,87 @@
+"""
+Measure building a pandas DataFrame from a synthetic result, from Records,
+from raw tuples and from columns, with and without categorical strings.
+Requires pandas.
+
+Usage: python -m benchmarks.bench_to_df [--rows N] [--columns N]
+    [--types T,T,...] [--string-length N] [--path-length N] [--repeat N]
+"""
+
+import argparse
+import json
+
+import millenniumdb_driver_python
+
+from .measure import best_time, peak_memory
+from .mock_server import MockServer, add_synthetic_arguments, synthetic_response
+
+QUERY = "MATCH (?x) RETURN *"
+
+# The keyword arguments of session.run and of result.to_df
+MODES = {
+    "records": ({}, {}),
+    "raw": ({"raw": True}, {}),
+    "columnar": ({"columnar": True}, {}),
+    "columnar_categorical": ({"columnar": True}, {"categorical": True}),
+}
+
+
+def run(
+    rows: int,
+    columns: int,
+    types: tuple,
+    string_length: int,
+    path_length: int,
+    repeat: int,
+) -> list:
+    response = synthetic_response(rows, columns, types, string_length, path_length)
+    server = MockServer(response)
+    results = []
+    try:
+        driver = millenniumdb_driver_python.driver(server.url)
+        with driver, driver.session() as session:
+            for mode, (run_kwargs, to_df_kwargs) in MODES.items():
+
+                def to_df():
+                    return session.run(QUERY, **run_kwargs).to_df(**to_df_kwargs)
+
+                seconds = best_time(to_df, repeat)
+                df = to_df()
+                results.append(
+                    {
+                        "mode": mode,
+                        "types": ",".join(types),
+                        "rows": rows,
+                        "columns": columns,
+                        "seconds": seconds,
+                        "rows_per_s": rows / seconds,
+                        "mb_per_s": len(response) / seconds / 1e6,
+                        "peak_mb": peak_memory(to_df),
+                        "df_mb": df.memory_usage(deep=True).sum() / 1e6,
+                    }
+                )
+                del df
+    finally:
+        server.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_synthetic_arguments(parser, rows=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    results = run(
+        args.rows,
+        args.columns,
+        args.types,
+        args.string_length,
+        args.path_length,
+        args.repeat,
+    )
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Helpers shared by the benchmarks to time code and measure its memory.
+"""
+
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    Get the best time in seconds of calling the function repeat times
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function: Callable[[], object]) -> float:
+    """
+    Get the peak memory allocated while calling the function, in MB. Measured
+    apart from the time, tracing the allocations slows down the code
+    """
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    Get the p50, p99 and maximum of latency samples in seconds, in milliseconds
+    """
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+        return ordered[index] * 1e3
+
+    return {
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1e3,
+    }
@@ -0,0 +1,487 @@
+"""
+A local stand-in for the MillenniumDB server, used by the benchmarks.
+
+It performs the handshake and answers every QUERY request with a response
+that is encoded once and then replayed, so the benchmarks measure the driver
+and not the server. The responses can be built from synthetic results with
+a given number of rows and columns, mix of DataTypes, string length and
+path length.
+
+It can also be run on its own, to point other programs at it:
+
+Usage: python -m benchmarks.mock_server [--port N] [--rows N] [--columns N]
+    [--types T,T,...] [--string-length N] [--path-length N]
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+from decimal import Decimal
+from itertools import count
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from millenniumdb_driver_python import protocol
+from millenniumdb_driver_python.chunk_decoder import ChunkDecoder
+from millenniumdb_driver_python.graph_objects import (
+    IRI,
+    DateTime,
+    GraphAnon,
+    GraphEdge,
+    GraphNode,
+    GraphPath,
+    GraphPathSegment,
+    SimpleDate,
+    StringDatatype,
+    StringLang,
+    Time,
+)
+
+MAX_CHUNK_SIZE = 0xFF_FF
+
+# The size of the blocks of a response sent at a limited bandwidth
+_PACED_BLOCK_SIZE = 16 * 1024
+
+
+def encode_string(value: str, data_type: int = protocol.DataType.STRING) -> bytes:
+    value_bytes = value.encode("utf-8")
+    return struct.pack(">BI", data_type, len(value_bytes)) + value_bytes
+
+
+def encode_value(value: object) -> bytes:
+    """
+    Encode a python value the way the server encodes it
+    """
+    if value is None:
+        return struct.pack(">B", protocol.DataType.NULL)
+    if value is True:
+        return struct.pack(">B", protocol.DataType.BOOL_TRUE)
+    if value is False:
+        return struct.pack(">B", protocol.DataType.BOOL_FALSE)
+    if isinstance(value, int):
+        return struct.pack(">Bq", protocol.DataType.INT64, value)
+    if isinstance(value, float):
+        return struct.pack(">Bd", protocol.DataType.DOUBLE, value)
+    if isinstance(value, str):
+        return encode_string(value)
+    if isinstance(value, Decimal):
+        return encode_string(str(value), protocol.DataType.DECIMAL)
+    if isinstance(value, IRI):
+        return encode_string(value.iri, protocol.DataType.IRI)
+    if isinstance(value, GraphNode):
+        return encode_string(value.id, protocol.DataType.NAMED_NODE)
+    if isinstance(value, GraphEdge):
+        return encode_string(value.id, protocol.DataType.EDGE)
+    if isinstance(value, GraphAnon):
+        return encode_string(value.id, protocol.DataType.ANON)
+    if isinstance(value, StringLang):
+        return encode_string(value.str, protocol.DataType.STRING_LANG) + (
+            encode_string(value.lang)[1:]
+        )
+    if isinstance(value, StringDatatype):
+        return encode_string(value.str, protocol.DataType.STRING_DATATYPE) + (
+            encode_string(value.datatype.iri)[1:]
+        )
+    if isinstance(value, SimpleDate):
+        return struct.pack(
+            ">B4q",
+            protocol.DataType.DATE,
+            value.year,
+            value.month,
+            value.day,
+            value.tzMinuteOffset,
+        )
+    if isinstance(value, Time):
+        return struct.pack(
+            ">B4q",
+            protocol.DataType.TIME,
+            value.hour,
+            value.minute,
+            value.second,
+            value.tzMinuteOffset,
+        )
+    if isinstance(value, DateTime):
+        return struct.pack(
+            ">B7q",
+            protocol.DataType.DATETIME,
+            value.year,
+            value.month,
+            value.day,
+            value.hour,
+            value.minute,
+            value.second,
+            value.tzMinuteOffset,
+        )
+    if isinstance(value, GraphPath):
+        res = struct.pack(">BI", protocol.DataType.PATH, len(value))
+        res += encode_value(value.start)
+        for segment in value.segments:
+            res += struct.pack(
+                ">B",
+                (
+                    protocol.DataType.BOOL_TRUE
+                    if segment.reverse
+                    else protocol.DataType.BOOL_FALSE
+                ),
+            )
+            res += encode_value(segment.type) + encode_value(segment.to)
+        return res
+    if isinstance(value, list):
+        return struct.pack(">BI", protocol.DataType.LIST, len(value)) + b"".join(
+            encode_value(item) for item in value
+        )
+    if isinstance(value, dict):
+        return struct.pack(">BI", protocol.DataType.MAP, len(value)) + b"".join(
+            encode_value(key) + encode_value(item) for key, item in value.items()
+        )
+    raise TypeError(f"cannot encode {type(value)}")
+
+
+def encode_uint(data_type: int, value: int) -> bytes:
+    """
+    Encode an unsigned integer with an explicit DataType
+    """
+    formats = {
+        protocol.DataType.UINT8: ">BB",
+        protocol.DataType.UINT16: ">BH",
+        protocol.DataType.UINT32: ">BI",
+        protocol.DataType.UINT64: ">BQ",
+    }
+    return struct.pack(formats[data_type], data_type, value)
+
+
+def encode_float(value: float) -> bytes:
+    """
+    Encode a single precision float, python floats are encoded as DOUBLE
+    """
+    return struct.pack(">Bf", protocol.DataType.FLOAT, value)
+
+
+def encode_message(response_type: int, payload_bytes: bytes) -> bytes:
+    """
+    Encode a message whose payload is already encoded
+    """
+    return (
+        struct.pack(">BI", protocol.DataType.MAP, 2)
+        + encode_string("type")
+        + struct.pack(">BB", protocol.DataType.UINT8, response_type)
+        + encode_string("payload")
+        + payload_bytes
+    )
+
+
+def frame(message: bytes) -> bytes:
+    """
+    Split a message into chunks followed by the SEAL
+    """
+    res = bytearray()
+    for start in range(0, len(message), MAX_CHUNK_SIZE):
+        chunk = message[start : start + MAX_CHUNK_SIZE]
+        res += struct.pack(">H", len(chunk)) + chunk
+    res += struct.pack(">H", ChunkDecoder.SEAL)
+    return bytes(res)
+
+
+def encode_variables(variables: List[str], cancellation_token: str = "0") -> bytes:
+    """
+    Encode the framed VARIABLES message of a query
+    """
+    return frame(
+        encode_message(
+            protocol.ResponseType.VARIABLES,
+            encode_value(
+                {
+                    "variables": variables,
+                    "queryPreamble": {
+                        "workerIndex": 0,
+                        "cancellationToken": cancellation_token,
+                    },
+                }
+            ),
+        )
+    )
+
+
+def encode_response(variables: List[str], rows: List[List[object]]) -> bytes:
+    """
+    Encode the VARIABLES, RECORD and SUCCESS messages of a query
+    """
+    res = bytearray()
+    res += encode_variables(variables)
+    for row in rows:
+        res += frame(encode_message(protocol.ResponseType.RECORD, encode_value(row)))
+    res += frame(encode_message(protocol.ResponseType.SUCCESS, encode_value({})))
+    return bytes(res)
+
+
+def make_path(length: int, start: int = 0) -> GraphPath:
+    """
+    Build a path of the given number of segments, alternating their direction
+    """
+    nodes = [GraphNode(f"Q{start + i}") for i in range(length + 1)]
+    segments = [
+        GraphPathSegment(nodes[i], nodes[i + 1], IRI("http://example.org/p"), i % 2)
+        for i in range(length)
+    ]
+    return GraphPath.from_segments(nodes[0], segments)
+
+
+def _string(row: int, string_length: int) -> str:
+    prefix = f"s{row}-"
+    return (prefix * (string_length // len(prefix) + 1))[:string_length]
+
+
+# The generator of the value of each type for a row, given the string and path lengths
+TYPES: Dict[str, Callable[[int, int, int], object]] = {
+    "null": lambda row, string_length, path_length: None,
+    "bool": lambda row, string_length, path_length: row % 2 == 0,
+    "int64": lambda row, string_length, path_length: row * 7 - 1_000,
+    "double": lambda row, string_length, path_length: row * 0.25,
+    "decimal": lambda row, string_length, path_length: Decimal(row) / 100,
+    "string": lambda row, string_length, path_length: _string(row, string_length),
+    "string_lang": lambda row, string_length, path_length: StringLang(
+        _string(row, string_length), "en"
+    ),
+    "iri": lambda row, string_length, path_length: IRI(
+        f"http://www.wikidata.org/entity/Q{row % 10_000}"
+    ),
+    "node": lambda row, string_length, path_length: GraphNode(f"Q{row % 10_000}"),
+    "edge": lambda row, string_length, path_length: GraphEdge(f"_e{row}"),
+    "date": lambda row, string_length, path_length: SimpleDate(
+        2000 + row % 25, row % 12 + 1, row % 28 + 1, 0
+    ),
+    "datetime": lambda row, string_length, path_length: DateTime(
+        2000 + row % 25, row % 12 + 1, row % 28 + 1, row % 24, row % 60, 0, 0
+    ),
+    "path": lambda row, string_length, path_length: make_path(path_length, row),
+    "list": lambda row, string_length, path_length: [row, row + 1, row + 2],
+}
+
+DEFAULT_TYPES = ("int64", "double", "string", "iri", "node")
+
+
+def synthetic_rows(
+    rows: int,
+    columns: int,
+    types: Sequence[str] = DEFAULT_TYPES,
+    string_length: int = 16,
+    path_length: int = 4,
+) -> Tuple[List[str], List[List[object]]]:
+    """
+    Generate the variables and the rows of a result, the type of each column
+    cycles through the given types
+    """
+    unknown = [type_ for type_ in types if type_ not in TYPES]
+    if unknown:
+        raise ValueError(f"unknown types {unknown}, choose from {sorted(TYPES)}")
+
+    column_types = [TYPES[types[i % len(types)]] for i in range(columns)]
+    variables = [f"{types[i % len(types)]}{i}" for i in range(columns)]
+    values = [
+        [column_type(row, string_length, path_length) for column_type in column_types]
+        for row in range(rows)
+    ]
+    return variables, values
+
+
+def synthetic_response(
+    rows: int,
+    columns: int,
+    types: Sequence[str] = DEFAULT_TYPES,
+    string_length: int = 16,
+    path_length: int = 4,
+) -> bytes:
+    """
+    Encode the response of a synthetic result, see synthetic_rows
+    """
+    return encode_response(
+        *synthetic_rows(rows, columns, types, string_length, path_length)
+    )
+
+
+def add_synthetic_arguments(parser: argparse.ArgumentParser, rows: int) -> None:
+    """
+    Add the arguments that configure a synthetic result to a parser
+    """
+    parser.add_argument("--rows", type=int, default=rows)
+    parser.add_argument("--columns", type=int, default=5)
+    parser.add_argument(
+        "--types",
+        type=lambda types: tuple(types.split(",")),
+        default=DEFAULT_TYPES,
+        help=f"comma separated, from {','.join(sorted(TYPES))}",
+    )
+    parser.add_argument("--string-length", type=int, default=16)
+    parser.add_argument("--path-length", type=int, default=4)
+
+
+class MockServer:
+    """
+    Serves a fixed response to every query on a local port.
+
+    With hold_until_cancel, each query gets its own cancellation token and
+    only its VARIABLES are sent, the query fails once its CANCEL request
+    arrives. The time each CANCEL request arrives is kept in cancel_times.
+
+    With bandwidth, the responses are sent at about that many bytes per
+    second, to stand in for a slower network.
+
+    With latency, each query takes that many seconds before its response is
+    sent, and at most workers queries run at the same time, to stand in for
+    a server with a bounded capacity
+    """
+
+    def __init__(
+        self,
+        response: bytes,
+        hold_until_cancel: bool = False,
+        port: int = 0,
+        bandwidth: float = None,
+        latency: float = 0.0,
+        workers: int = 1,
+    ):
+        self.response = response
+        self.hold_until_cancel = hold_until_cancel
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self._workers = threading.Semaphore(workers)
+        self.cancel_times: Dict[str, float] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._tokens = count()
+        self._lock = threading.Lock()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", port))
+        self._socket.listen(64)
+        self.port = self._socket.getsockname()[1]
+        self.url = f"mdb://127.0.0.1:{self.port}"
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self) -> None:
+        # Shutting the socket down wakes the accept loop, which closes it.
+        # Closing it here would let a new socket reuse its descriptor while
+        # the loop is about to accept on it
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _accept_loop(self) -> None:
+        with self._socket:
+            while True:
+                try:
+                    client, _ = self._socket.accept()
+                except OSError:
+                    return
+                client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                threading.Thread(target=self._serve, args=[client], daemon=True).start()
+
+    def _serve(self, client: socket.socket) -> None:
+        with client:
+            try:
+                if _recvall(client, 8) != protocol.DRIVER_PREAMBLE_BYTES:
+                    return
+                client.sendall(protocol.SERVER_PREAMBLE_BYTES)
+                while True:
+                    (size,) = struct.unpack(">I", _recvall(client, 4))
+                    request = _recvall(client, size)
+                    match request[0]:
+                        case protocol.RequestType.QUERY:
+                            if self.latency > 0.0:
+                                with self._workers:
+                                    time.sleep(self.latency)
+                            if self.hold_until_cancel:
+                                self._hold(client)
+                            elif self.bandwidth is not None:
+                                self._send_paced(client)
+                            else:
+                                client.sendall(self.response)
+                        case protocol.RequestType.CATALOG:
+                            client.sendall(_CATALOG_RESPONSE)
+                        case protocol.RequestType.UPDATE:
+                            client.sendall(_UPDATE_RESPONSE)
+                        case protocol.RequestType.CANCEL:
+                            self._cancel(request)
+            except (ConnectionError, OSError):
+                return
+
+    def _send_paced(self, client: socket.socket) -> None:
+        # A small send buffer, so the kernel does not hold much of the
+        # response for the client before it is read
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _PACED_BLOCK_SIZE)
+        start = time.perf_counter()
+        for offset in range(0, len(self.response), _PACED_BLOCK_SIZE):
+            client.sendall(self.response[offset : offset + _PACED_BLOCK_SIZE])
+            delay = start + (offset + _PACED_BLOCK_SIZE) / self.bandwidth
+            delay -= time.perf_counter()
+            if delay > 0.0:
+                time.sleep(delay)
+
+    def _hold(self, client: socket.socket) -> None:
+        token = str(next(self._tokens))
+        event = threading.Event()
+        with self._lock:
+            self._cancel_events[token] = event
+        client.sendall(encode_variables(["x"], token))
+        event.wait(60.0)
+        client.sendall(
+            frame(
+                encode_message(
+                    protocol.ResponseType.ERROR, encode_value("Query cancelled")
+                )
+            )
+        )
+
+    def _cancel(self, request: bytes) -> None:
+        # type, UINT32 worker index, STRING cancellation token
+        (token_length,) = struct.unpack_from(">I", request, 7)
+        token = request[11 : 11 + token_length].decode("utf-8")
+        received_at = time.perf_counter()
+        with self._lock:
+            self.cancel_times[token] = received_at
+            event = self._cancel_events.pop(token, None)
+        if event is not None:
+            event.set()
+
+
+_CATALOG_RESPONSE = frame(
+    encode_message(
+        protocol.ResponseType.SUCCESS,
+        encode_value({"modelId": protocol.ModelId.RDF_MODEL_ID.value, "version": 1}),
+    )
+)
+_UPDATE_RESPONSE = frame(
+    encode_message(protocol.ResponseType.SUCCESS, encode_value({}))
+)
+
+
+def _recvall(client: socket.socket, num_bytes: int) -> bytes:
+    res = bytearray()
+    while len(res) < num_bytes:
+        data = client.recv(num_bytes - len(res))
+        if not data:
+            raise ConnectionError("client disconnected")
+        res += data
+    return bytes(res)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=0)
+    add_synthetic_arguments(parser, rows=1_000)
+    args = parser.parse_args()
+    response = synthetic_response(
+        args.rows, args.columns, args.types, args.string_length, args.path_length
+    )
+    server = MockServer(response, port=args.port)
+    print(f"Serving {len(response)} bytes per query at {server.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
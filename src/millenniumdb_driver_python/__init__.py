@@ -1,12 +1,59 @@
+from typing import Sequence, Union
+
+from .async_driver import AsyncDriver as _AsyncDriver
 from .driver import Driver as _Driver
 from .millenniumdb_error import MillenniumDBError, ResultError
+from .query_stats import QueryHooks, QueryStats
+from .record_storage import (
+    LazyStorage,
+    ParallelStorage,
+    PrefetchStorage,
+    RecordStorage,
+    SpillStorage,
+)
+from .replay import Replay as _Replay
+from .slow_query_log import SlowQueryLog
 
 
 __version__ = "0.0.1"
 
 
-def driver(url: str) -> _Driver:
-    return _Driver(url)
+def driver(url: Union[str, Sequence[str]], **kwargs) -> _Driver:
+    """
+    Create a driver for the MillenniumDB server at the given URL, or for
+    several servers holding the same data, balancing the sessions over them.
+    The keyword arguments configure its connection pool, see Driver
+    """
+    return _Driver(url, **kwargs)
+
+
+def async_driver(url: str) -> _AsyncDriver:
+    """
+    Create an asyncio driver for the MillenniumDB server at the given URL
+    """
+    return _AsyncDriver(url)
+
+
+def replay(path: str, **kwargs) -> _Replay:
+    """
+    Replay the responses captured by session.run(query, capture=path),
+    decoding them from a memory-mapped file without a server
+    """
+    return _Replay(path, **kwargs)
 
 
-__all__ = ["driver", "MillenniumDBError", "ResultError"]
+__all__ = [
+    "driver",
+    "async_driver",
+    "replay",
+    "MillenniumDBError",
+    "ResultError",
+    "QueryHooks",
+    "QueryStats",
+    "RecordStorage",
+    "SpillStorage",
+    "LazyStorage",
+    "ParallelStorage",
+    "PrefetchStorage",
+    "SlowQueryLog",
+]
@@ -0,0 +1,131 @@
+import asyncio
+from functools import wraps
+from typing import Coroutine
+from urllib.parse import urlparse
+
+from .async_result import AsyncResult
+from .async_session import AsyncSession
+from .async_socket_connection import AsyncSocketConnection
+from .catalog import Catalog
+from .millenniumdb_error import MillenniumDBError
+from .request_builder import RequestBuilder
+
+
+def _ensure_driver_open(func):
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not self._open:
+            raise MillenniumDBError("Driver Error: driver is closed")
+        return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncDriver:
+    """
+    An asyncio driver that manages sessions sending queries and receiving
+    results from the MillenniumDB server. Each session has its own connection,
+    so many queries can run at once on the same event loop
+    """
+
+    def __init__(self, url: str):
+        """
+        parameters:
+        parsed_url (ParseResult): The parsed URL of the server
+
+        attributes:
+        _open (bool): The state of the driver
+        _host (str): The hostname of the server
+        _port (int): The port of the server
+        _sessions (Set[AsyncSession]): The set of open sessions
+        _tasks (Set[Task]): The background tasks, referenced until they finish
+        _control_connection (AsyncSocketConnection or None): The connection the
+            CANCEL requests are sent through, opened with the first one and
+            used for nothing else. Its answers are discarded in the background
+        _control_lock (Lock or None): Serializes the CANCEL requests, created
+            on the event loop by the first one
+        """
+        parsed_url = urlparse(url)
+        self._open = True
+        self._host = parsed_url.hostname
+        self._port = parsed_url.port
+        self._sessions = set()
+        self._tasks = set()
+        self._control_connection = None
+        self._control_lock = None
+
+    @_ensure_driver_open
+    async def catalog(self) -> Catalog:
+        """
+        Get the catalog of the MillenniumDB server
+        """
+        async with self.session() as session:
+            return await session.catalog()
+
+    @_ensure_driver_open
+    async def cancel(self, result: AsyncResult) -> None:
+        """
+        Cancel a running query on the server, through the control connection
+        of the driver
+        """
+        if result._query_preamble is None:
+            raise MillenniumDBError("Driver Error: query has not been executed yet")
+
+        request = RequestBuilder.cancel(
+            result._query_preamble["workerIndex"],
+            result._query_preamble["cancellationToken"],
+        )
+        if self._control_lock is None:
+            self._control_lock = asyncio.Lock()
+        async with self._control_lock:
+            connection = self._control_connection
+            if connection is None or connection.is_closing():
+                connection = await AsyncSocketConnection.connect(self._host, self._port)
+                self._control_connection = connection
+                self._create_task(connection.discard_incoming())
+            try:
+                await connection.sendall(request)
+            except OSError as e:
+                connection.close()
+                self._control_connection = None
+                raise MillenniumDBError(
+                    "Driver Error: could not send the CANCEL request"
+                ) from e
+
+    @_ensure_driver_open
+    def session(self) -> AsyncSession:
+        """
+        Create a new session. Its connection is opened when the session is
+        entered with `async with` or first used
+        """
+        session = AsyncSession(self._host, self._port, self)
+        self._sessions.add(session)
+        return session
+
+    async def close(self) -> None:
+        """
+        Close the driver and all its sessions"""
+        if self._open:
+            self._open = False
+            for session in list(self._sessions):
+                await session.close()
+            for task in list(self._tasks):
+                task.cancel()
+            if self._control_connection is not None:
+                self._control_connection.close()
+                self._control_connection = None
+
+    def _create_task(self, coroutine: Coroutine) -> None:
+        """
+        Run a coroutine in the background, keeping a reference to its task
+        """
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
@@ -0,0 +1,43 @@
+from .async_socket_connection import AsyncSocketConnection
+from .chunk_decoder import ChunkDecoder
+from .iobuffer import IOBuffer
+from .message_decoder import MessageDecoder
+from .millenniumdb_error import MillenniumDBError
+
+
+class AsyncMessageReceiver:
+    """
+    Represents the receiver of the incoming messages of an asyncio connection
+    """
+
+    def __init__(self, connection: AsyncSocketConnection):
+        self._connection = connection
+        self._receiver_buffer = IOBuffer()
+        self._chunk_decoder = ChunkDecoder(connection, self._receiver_buffer)
+        self._message_decoder = MessageDecoder(self._receiver_buffer)
+
+    async def receive(self) -> object:
+        """
+        Decode and return the incoming message
+        """
+        # Decode chunks
+        await self._decode_chunks()
+
+        # Decode message
+        msg = self._message_decoder.decode()
+
+        # Reset receiver buffer for the next message
+        self._receiver_buffer.reset()
+
+        return msg
+
+    async def _decode_chunks(self) -> None:
+        """
+        Receive all the chunks of a message until the SEAL is received
+        """
+        recvall_into = self._connection.recvall_into
+        try:
+            for num_bytes in self._chunk_decoder.reads():
+                await recvall_into(self._receiver_buffer, num_bytes)
+        except Exception as e:
+            raise MillenniumDBError("ChunkDecoder Error: could not decode chunk") from e
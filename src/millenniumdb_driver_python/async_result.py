@@ -0,0 +1,193 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Tuple, Union
+
+from . import protocol
+from .async_message_receiver import AsyncMessageReceiver
+from .async_socket_connection import AsyncSocketConnection
+from .millenniumdb_error import MillenniumDBError, ResultError
+from .record import Record, RecordSchema
+from .request_builder import RequestBuilder
+from .response_handler import ResponseHandler
+from .template import BoundQuery
+
+
+class AsyncResult:
+    """
+    This class represents the result of a query run on an asyncio session
+    """
+
+    def __init__(
+        self,
+        driver: "AsyncDriver",
+        session: "AsyncSession",
+        connection: AsyncSocketConnection,
+        message_receiver: AsyncMessageReceiver,
+        response_handler: ResponseHandler,
+        stream: bool = False,
+    ):
+        """
+        attributes:
+        _stream (bool): Whether the records are decoded lazily while iterating
+        _streaming (bool): Whether the server is still sending the result
+        """
+        self._driver = driver
+        self._session = session
+        self._connection = connection
+        self._variables = []
+        self._query_preamble = None
+        self._schema = RecordSchema([])
+        self._records = []
+        self._summary = None
+        self._exception = None
+        self._stream = stream
+        self._streaming = True
+        self._message_receiver = message_receiver
+        self._response_handler = response_handler
+
+    def variables(self) -> Tuple[str]:
+        return self._variables
+
+    async def records(self) -> List[Record]:
+        await self._consume()
+        return self._records
+
+    async def values(self) -> List[object]:
+        return [record.values() for record in await self.records()]
+
+    async def data(self) -> List[Dict[str, object]]:
+        return [record.to_dict() for record in await self.records()]
+
+    async def to_df(self) -> "DataFrame":
+        from pandas import DataFrame
+
+        return DataFrame(await self.data())
+
+    async def summary(self) -> object:
+        await self._consume()
+        return self._summary
+
+    async def __aiter__(self) -> AsyncIterator[Record]:
+        while self._streaming:
+            record = await self._fetch_record()
+            if record is None:
+                break
+            yield record
+        # Records received by _consume while iterating
+        for record in self._records:
+            yield record
+
+    async def _fetch_record(self) -> Record:
+        """
+        Receive the next record from the server. Returns None and handles
+        the termination message when there are no more records.
+        If the task is cancelled, the query is cancelled on the server
+        """
+        try:
+            message = await self._message_receiver.receive()
+        except asyncio.CancelledError:
+            await asyncio.shield(self._cancel())
+            raise
+        if message["type"] == protocol.ResponseType.RECORD:
+            return self._schema.record(message["payload"])
+        self._response_handler.handle(message)
+        return None
+
+    async def _consume(self) -> None:
+        """
+        Receive all the remaining records of the result
+        """
+        while self._streaming:
+            record = await self._fetch_record()
+            if record is None:
+                break
+            self._records.append(record)
+
+    async def _cancel(self) -> None:
+        """
+        Cancel the query on the server and drop the connection of the session,
+        as it has not received the whole response
+        """
+        self._session._lose_connection()
+        if self._streaming and self._query_preamble is not None:
+            self._streaming = False
+            try:
+                await self._driver.cancel(self)
+            except MillenniumDBError:
+                # Best effort, the task is being cancelled anyway
+                pass
+
+    async def _cancel_on_variables(self, receiving: asyncio.Future) -> None:
+        """
+        Cancel the query of a task that was cancelled before its variables
+        arrived. They are awaited in the background, as the CANCEL request
+        needs the preamble, and then the connection of the session is closed
+
+        :param receiving: The receive of the variables that was started, or
+            None if the task was cancelled while sending the query
+        """
+        try:
+            if receiving is None:
+                receiving = self._message_receiver.receive()
+            message = await receiving
+            if message["type"] == protocol.ResponseType.VARIABLES:
+                self._query_preamble = message["payload"]["queryPreamble"]
+                await self._driver.cancel(self)
+        except MillenniumDBError:
+            # Best effort, the task that awaited the query is gone
+            pass
+        finally:
+            self._streaming = False
+            self._connection.close()
+
+    async def _try_cancel(self, timeout: float) -> None:
+        await asyncio.sleep(timeout)
+        if self._streaming:
+            try:
+                await self._driver.cancel(self)
+            except MillenniumDBError:
+                # The query goes on, as if it had no timeout
+                pass
+
+    async def _run(self, query: Union[str, BoundQuery], timeout: float) -> None:
+        def on_variables(variables, query_preamble) -> None:
+            self._variables = variables
+            self._query_preamble = query_preamble
+            self._schema = RecordSchema(variables)
+
+            if timeout > 0.0:
+                self._driver._create_task(self._try_cancel(timeout))
+
+        def on_success(summary) -> None:
+            self._summary = summary
+            self._streaming = False
+
+        def on_error(error) -> None:
+            self._streaming = False
+            self._exception = error
+            raise ResultError(self) from self._exception
+
+        self._response_handler.add_observer(
+            {
+                "on_variables": on_variables,
+                "on_success": on_success,
+                "on_error": on_error,
+            }
+        )
+        receiving = None
+        try:
+            await self._connection.sendall(RequestBuilder.run(query))
+
+            # on_variables, received in its own task so that cancelling this
+            # one does not leave a message half read
+            receiving = asyncio.ensure_future(self._message_receiver.receive())
+            message = await asyncio.shield(receiving)
+        except asyncio.CancelledError:
+            # The query runs on the server until its preamble arrives
+            self._session._lose_connection(close_connection=False)
+            self._driver._create_task(self._cancel_on_variables(receiving))
+            raise
+        self._response_handler.handle(message)
+
+        # on_record / on_success
+        if not self._stream:
+            await self._consume()
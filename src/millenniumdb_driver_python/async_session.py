@@ -0,0 +1,144 @@
+from functools import wraps
+from typing import Union
+
+from .async_message_receiver import AsyncMessageReceiver
+from .async_result import AsyncResult
+from .async_socket_connection import AsyncSocketConnection
+from .catalog import Catalog
+from .millenniumdb_error import MillenniumDBError
+from .request_builder import RequestBuilder
+from .response_handler import ResponseHandler
+from .template import BoundQuery
+
+
+def _ensure_session_open(func):
+    """
+    Ensure that the session is open and connected before executing a coroutine
+    """
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if not self._open:
+            raise MillenniumDBError("Session Error: session is closed")
+        if self._connection is None:
+            await self._connect()
+        return await func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncSession:
+    """
+    The class represents an asyncio session with the MillenniumDB server.
+    The connection is opened when the session is entered or first used.
+    A session must not be shared by concurrent tasks
+    """
+
+    def __init__(self, host: str, port: int, driver: "AsyncDriver"):
+        self._host = host
+        self._port = port
+        self._driver = driver
+        self._open = True
+        self._connection = None
+        self._message_receiver = None
+        self._response_handler = ResponseHandler()
+        # The last result, that may still be streaming records
+        self._last_result = None
+
+    @_ensure_session_open
+    async def run(
+        self,
+        query: Union[str, BoundQuery],
+        timeout: float = 0.0,
+        stream: bool = False,
+    ) -> AsyncResult:
+        """
+        Run a query on the server. Cancelling the task that awaits the query,
+        or iterates its records, cancels the query on the server and closes
+        the session
+
+        :param query: The query string to execute, or a template bound by
+            Template.bind
+        :param timeout: Seconds until the query is cancelled, 0.0 means no timeout
+        :param stream: Return as soon as the variables are received and decode
+            the records while iterating the result
+        """
+        await self._consume_last_result()
+        result = AsyncResult(
+            self._driver,
+            self,
+            self._connection,
+            self._message_receiver,
+            self._response_handler,
+            stream,
+        )
+        self._last_result = result
+        await result._run(query, timeout)
+        return result
+
+    @_ensure_session_open
+    async def catalog(self) -> Catalog:
+        """
+        Get the catalog of the MillenniumDB server
+        """
+        await self._consume_last_result()
+        catalog = None
+
+        def on_success(summary) -> None:
+            nonlocal catalog
+            catalog = Catalog._from_summary(summary)
+
+        def on_error(error) -> None:
+            raise error
+
+        self._response_handler.add_observer(
+            {"on_success": on_success, "on_error": on_error}
+        )
+        await self._connection.sendall(RequestBuilder.catalog())
+
+        message = await self._message_receiver.receive()
+        self._response_handler.handle(message)
+        return catalog
+
+    async def _connect(self) -> None:
+        self._connection = await AsyncSocketConnection.connect(self._host, self._port)
+        self._message_receiver = AsyncMessageReceiver(self._connection)
+
+    async def _consume_last_result(self) -> None:
+        """
+        Receive the remaining records of the last result, so the connection
+        is ready for the next request
+        """
+        if self._last_result is not None:
+            await self._last_result._consume()
+            self._last_result = None
+
+    def _lose_connection(self, close_connection: bool = True) -> None:
+        """
+        Close the session when its connection is left in the middle of a response
+
+        :param close_connection: Whether to close the connection now, otherwise
+            the result that was left closes it
+        """
+        self._open = False
+        if self._connection is not None and close_connection:
+            self._connection.close()
+        self._driver._sessions.discard(self)
+
+    async def close(self) -> None:
+        """
+        Close the session
+        """
+        if self._open:
+            self._open = False
+            if self._connection is not None:
+                self._connection.close()
+            self._driver._sessions.discard(self)
+
+    async def __aenter__(self):
+        if self._connection is None and self._open:
+            await self._connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
@@ -0,0 +1,112 @@
+import asyncio
+
+from . import protocol
+from .iobuffer import IOBuffer
+from .millenniumdb_error import MillenniumDBError
+
+
+class AsyncSocketConnection:
+    """
+    Represents the asyncio stream connection to the server
+    """
+
+    # The bytes read at once by discard_incoming
+    DISCARD_SIZE = 64 * 1024
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        attributes:
+        _reader (StreamReader): The stream for the incoming data
+        _writer (StreamWriter): The stream for the outgoing data
+        """
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "AsyncSocketConnection":
+        """
+        Open a connection to the server and perform the handshake
+        """
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port),
+                protocol.DEFAULT_CONNECTION_TIMEOUT,
+            )
+        except asyncio.TimeoutError as e:
+            raise MillenniumDBError(
+                "AsyncSocketConnection Error: socket timed out while establishing"
+                " connection"
+            ) from e
+        except Exception as e:
+            raise MillenniumDBError(
+                f"AsyncSocketConnection Error: could not connect to {host}:{port}"
+            ) from e
+
+        connection = cls(reader, writer)
+        await connection._handshake()
+        return connection
+
+    async def sendall(self, iobuffer: IOBuffer) -> None:
+        """
+        Send the data to the server
+        """
+        self._writer.write(iobuffer.view[: iobuffer.num_used_bytes])
+        await self._writer.drain()
+
+    async def recvall_into(self, iobuffer: IOBuffer, num_bytes: int) -> None:
+        end = iobuffer.num_used_bytes + num_bytes
+        if end > len(iobuffer):
+            iobuffer.extend(end - len(iobuffer))
+
+        try:
+            data = await self._reader.readexactly(num_bytes)
+        except asyncio.IncompleteReadError as e:
+            raise MillenniumDBError(
+                "AsyncSocketConnection Error: no data received"
+            ) from e
+
+        iobuffer.view[iobuffer.num_used_bytes : end] = data
+        iobuffer.num_used_bytes = end
+
+    async def discard_incoming(self) -> None:
+        """
+        Read and drop the incoming data until the connection is closed by
+        either end, then close it
+        """
+        try:
+            while await self._reader.read(AsyncSocketConnection.DISCARD_SIZE):
+                pass
+        except OSError:
+            pass
+        finally:
+            self.close()
+
+    def is_closing(self) -> bool:
+        """
+        Whether the connection is closed or being closed
+        """
+        return self._writer.is_closing()
+
+    def close(self) -> None:
+        """
+        Close the connection
+        """
+        try:
+            self._writer.close()
+        except (OSError, RuntimeError):
+            pass
+
+    async def _handshake(self) -> None:
+        """
+        Perform the handshake with the server
+        """
+        self._writer.write(protocol.DRIVER_PREAMBLE_BYTES)
+        await self._writer.drain()
+        try:
+            response = await self._reader.readexactly(8)
+        except asyncio.IncompleteReadError as e:
+            raise MillenniumDBError(
+                "AsyncSocketConnection Error: handshake failed"
+            ) from e
+        if response != protocol.SERVER_PREAMBLE_BYTES:
+            raise MillenniumDBError("AsyncSocketConnection Error: handshake failed")
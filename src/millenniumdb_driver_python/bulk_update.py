@@ -0,0 +1,239 @@
+from collections import deque
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterable, List
+
+from .iobuffer import IOBuffer
+from .message_receiver import MessageReceiver
+from .millenniumdb_error import MillenniumDBError
+from .request_builder import RequestBuilder
+from .response_handler import ResponseHandler
+from .socket_connection import SocketConnection
+
+
+class UpdateBatch:
+    """
+    A group of update statements sent in a single UPDATE request
+    """
+
+    __slots__ = (
+        "index",
+        "first_statement",
+        "num_statements",
+        "num_bytes",
+        "summary",
+        "error",
+    )
+
+    def __init__(
+        self, index: int, first_statement: int, num_statements: int, num_bytes: int
+    ):
+        """
+        attributes:
+        index (int): The position of the batch in the bulk update
+        first_statement (int): The position of the first statement of the batch
+        num_statements (int): The number of statements of the batch
+        num_bytes (int): The size of the encoded statements of the batch
+        summary (object): The summary of the update if it succeeded
+        error (MillenniumDBError or None): The error of the update if it failed
+        """
+        self.index = index
+        self.first_statement = first_statement
+        self.num_statements = num_statements
+        self.num_bytes = num_bytes
+        self.summary = None
+        self.error = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        state = "ok" if self.error is None else f"error={self.error}"
+        return (
+            f"UpdateBatch<{self.index}, statements={self.first_statement}"
+            f"..{self.first_statement + self.num_statements - 1}, {state}>"
+        )
+
+
+class BulkUpdate:
+    """
+    Sends a stream of update statements to the server, packed into UPDATE
+    requests of a bounded size with several requests in flight.
+
+    The statements are read from the iterable as they are sent, so the
+    memory used does not depend on the number of statements. Only the
+    batches that failed are kept
+    """
+
+    DEFAULT_BATCH_BYTES = 1024 * 1024
+    DEFAULT_MAX_IN_FLIGHT = 4
+    # Several update operations in one request are separated by semicolons
+    DEFAULT_SEPARATOR = ";\n"
+
+    def __init__(
+        self,
+        connection: SocketConnection,
+        message_receiver: MessageReceiver,
+        response_handler: ResponseHandler,
+        send_buffer: IOBuffer,
+        updates: Iterable[str],
+        batch_bytes: int = DEFAULT_BATCH_BYTES,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        separator: str = DEFAULT_SEPARATOR,
+        on_batch: Callable[[UpdateBatch], None] = None,
+    ):
+        """
+        attributes:
+        _batch_bytes (int): The size above which a batch is sent, a statement
+            larger than it is sent alone
+        _max_in_flight (int): The maximum number of batches sent whose
+            response has not been received
+        _separator (bytes): The encoded separator between the statements of a batch
+        _on_batch (Callable[[UpdateBatch], None] or None): Called with each
+            batch once its response is received
+        _in_flight (Deque[UpdateBatch]): The batches waiting for their response
+        _failed_batches (List[UpdateBatch]): The batches whose update failed
+        """
+        if batch_bytes < 1 or max_in_flight < 1:
+            raise MillenniumDBError(
+                "BulkUpdate Error: batch_bytes and max_in_flight must be at least 1"
+            )
+
+        self._connection = connection
+        self._message_receiver = message_receiver
+        self._response_handler = response_handler
+        self._send_buffer = send_buffer
+        self._batch_bytes = batch_bytes
+        self._max_in_flight = max_in_flight
+        self._separator = separator.encode("utf-8")
+        self._on_batch = on_batch
+        self._in_flight: Deque[UpdateBatch] = deque()
+        self._failed_batches: List[UpdateBatch] = []
+
+        self._num_statements = 0
+        self._num_bytes = 0
+        self._num_batches = 0
+        self._elapsed = 0.0
+        self._bulk_update(updates)
+
+    def failed_batches(self) -> List[UpdateBatch]:
+        """
+        Get the batches whose update failed
+        """
+        return self._failed_batches
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the totals and the throughput of the bulk update
+
+        :return: A dictionary with the number of statements, bytes, batches and
+            failed batches, the elapsed seconds, and the statements and bytes
+            sent per second
+        """
+        elapsed = self._elapsed if self._elapsed > 0.0 else float("inf")
+        return {
+            "statements": self._num_statements,
+            "bytes": self._num_bytes,
+            "batches": self._num_batches,
+            "failed_batches": len(self._failed_batches),
+            "elapsed": self._elapsed,
+            "statements_per_second": self._num_statements / elapsed,
+            "bytes_per_second": self._num_bytes / elapsed,
+        }
+
+    def _bulk_update(self, updates: Iterable[str]) -> None:
+        start = perf_counter()
+        separator = self._separator
+        statements: List[bytes] = []
+        num_batch_bytes = 0
+        first_statement = 0
+
+        try:
+            for update in updates:
+                # A trailing semicolon would be doubled by the separator
+                statement = update.rstrip(" \t\r\n;").encode("utf-8")
+                if len(statement) == 0:
+                    continue
+
+                num_statement_bytes = len(statement)
+                if statements:
+                    num_statement_bytes += len(separator)
+                if (
+                    statements
+                    and num_batch_bytes + num_statement_bytes > self._batch_bytes
+                ):
+                    self._send_batch(first_statement, statements, num_batch_bytes)
+                    first_statement += len(statements)
+                    statements = []
+                    num_batch_bytes = 0
+                    num_statement_bytes = len(statement)
+
+                statements.append(statement)
+                num_batch_bytes += num_statement_bytes
+
+            if statements:
+                self._send_batch(first_statement, statements, num_batch_bytes)
+
+            while self._in_flight:
+                self._receive_batch()
+        except BaseException:
+            self._discard_in_flight()
+            raise
+        finally:
+            self._elapsed = perf_counter() - start
+
+    def _send_batch(
+        self, first_statement: int, statements: List[bytes], num_bytes: int
+    ) -> None:
+        """
+        Send the statements of a batch, waiting for the oldest batch in flight
+        if there are too many
+        """
+        if len(self._in_flight) >= self._max_in_flight:
+            self._receive_batch()
+
+        batch = UpdateBatch(
+            self._num_batches, first_statement, len(statements), num_bytes
+        )
+
+        def on_success(summary) -> None:
+            batch.summary = summary
+
+        def on_error(error) -> None:
+            batch.error = error
+
+        self._response_handler.add_observer(
+            {"on_success": on_success, "on_error": on_error}
+        )
+        self._send_buffer.reset()
+        RequestBuilder.update(self._separator.join(statements), self._send_buffer)
+        self._connection.sendall(self._send_buffer)
+
+        self._in_flight.append(batch)
+        self._num_batches += 1
+        self._num_statements += len(statements)
+        self._num_bytes += num_bytes
+
+    def _receive_batch(self) -> None:
+        """
+        Receive the response of the oldest batch in flight
+        """
+        batch = self._in_flight.popleft()
+        message = self._message_receiver.receive()
+        self._response_handler.handle(message)
+        if batch.error is not None:
+            self._failed_batches.append(batch)
+        if self._on_batch is not None:
+            self._on_batch(batch)
+
+    def _discard_in_flight(self) -> None:
+        """
+        Receive the responses of the batches in flight after an error, so the
+        connection is ready for the next request
+        """
+        try:
+            while self._in_flight:
+                self._in_flight.popleft()
+                self._response_handler.handle(self._message_receiver.receive())
+        except (MillenniumDBError, OSError):
+            pass
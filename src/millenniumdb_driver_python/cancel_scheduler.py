@@ -0,0 +1,217 @@
+import heapq
+from itertools import count
+from threading import Condition, Lock, Thread
+from time import monotonic
+from typing import Dict, List, Tuple
+from weakref import ref
+
+from .millenniumdb_error import MillenniumDBError
+from .request_builder import RequestBuilder
+from .socket_connection import SocketConnection
+
+
+class CancelScheduler:
+    """
+    Cancels the queries of a driver when their timeout expires.
+
+    A single thread waits for the earliest deadline of all the running
+    queries, and the CANCEL requests are sent through a control connection
+    to the server of each query, that is opened once and used for nothing
+    else. The server may answer the CANCEL requests, the answers are
+    discarded before sending the next one.
+
+    The deadlines of the queries that finish before them stay in the heap
+    until it is compacted, once they are more than COMPACT_FRACTION of it
+    """
+
+    COMPACT_FRACTION = 0.5
+
+    # A smaller heap is not compacted
+    MIN_COMPACT_SIZE = 100
+
+    def __init__(self):
+        """
+        attributes:
+        _deadlines (List[Tuple[float, int, ref]]): The heap of the deadlines, with a
+            sequence number breaking ties and a weak reference to the result
+        _finished (int): The queries in the heap that finished before their deadline
+        _thread (Thread or None): The thread that waits for the deadlines,
+            started with the first deadline
+        _connections (Dict[Tuple[str, int], SocketConnection]): The control
+            connection to each server, by host and port
+        _connection_lock (Lock): Serializes the CANCEL requests
+        """
+        self._open = True
+        self._deadlines: List[Tuple[float, int, ref]] = []
+        self._sequence = count()
+        self._finished = 0
+        self._condition = Condition()
+        self._thread = None
+        self._connections: Dict[Tuple[str, int], SocketConnection] = {}
+        self._connection_lock = Lock()
+
+        self._scheduled = 0
+        self._cancelled = 0
+        self._errors = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def schedule(self, result: "Result", timeout: float) -> None:
+        """
+        Cancel a query if it is still running after timeout seconds
+
+        :param result: The result of the query, that must have received its preamble
+        :param timeout: Seconds from now until the query is cancelled
+        """
+        deadline = monotonic() + timeout
+        with self._condition:
+            if not self._open:
+                return
+            heapq.heappush(
+                self._deadlines, (deadline, next(self._sequence), ref(result))
+            )
+            self._scheduled += 1
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._run, name="millenniumdb-cancel-scheduler", daemon=True
+                )
+                self._thread.start()
+            elif self._deadlines[0][0] == deadline:
+                # The new deadline is the earliest one
+                self._condition.notify()
+
+    def finished(self) -> None:
+        """
+        Note that a query whose deadline was scheduled finished, compacting
+        the heap if too many of its deadlines are of finished queries
+        """
+        with self._condition:
+            self._finished += 1
+            size = len(self._deadlines)
+            if (
+                size >= CancelScheduler.MIN_COMPACT_SIZE
+                and self._finished > size * CancelScheduler.COMPACT_FRACTION
+            ):
+                self._deadlines = [
+                    entry for entry in self._deadlines if _is_running(entry[2])
+                ]
+                heapq.heapify(self._deadlines)
+                self._finished = 0
+
+    def cancel(self, result: "Result") -> None:
+        """
+        Send a CANCEL request for a query through the control connection to
+        the server that runs it
+        """
+        if result._query_preamble is None:
+            raise MillenniumDBError(
+                "CancelScheduler Error: query has not been executed yet"
+            )
+
+        request = RequestBuilder.cancel(
+            result._query_preamble["workerIndex"],
+            result._query_preamble["cancellationToken"],
+        )
+        address = (result._connection.host, result._connection.port)
+        with self._connection_lock:
+            if not self._open:
+                raise MillenniumDBError("CancelScheduler Error: scheduler is closed")
+            connection = self._connections.get(address)
+            if connection is not None and not connection.discard_received():
+                connection.close()
+                connection = None
+            if connection is None:
+                connection = SocketConnection(*address, 0)
+                self._connections[address] = connection
+            try:
+                connection.sendall(request)
+            except OSError:
+                connection.close()
+                del self._connections[address]
+                raise
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the counters of the scheduler
+
+        :return: A dictionary with the number of queries with a timeout, the
+            queries cancelled when their deadline expired, the failed CANCEL
+            requests, the deadlines not expired yet (including those of
+            finished queries not compacted yet), and the mean and maximum seconds
+            from a deadline until its CANCEL request was sent
+        """
+        with self._condition:
+            return {
+                "scheduled": self._scheduled,
+                "cancelled": self._cancelled,
+                "errors": self._errors,
+                "pending": len(self._deadlines),
+                "mean_cancel_latency": (
+                    self._total_latency / self._cancelled
+                    if self._cancelled > 0
+                    else 0.0
+                ),
+                "max_cancel_latency": self._max_latency,
+            }
+
+    def close(self) -> None:
+        """
+        Stop the thread and close the control connections
+        """
+        with self._condition:
+            self._open = False
+            self._deadlines.clear()
+            self._finished = 0
+            self._condition.notify()
+        with self._connection_lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._connections.clear()
+
+    def _run(self) -> None:
+        """
+        Wait for the deadlines in order, cancelling the queries still running
+        """
+        while True:
+            with self._condition:
+                while True:
+                    if not self._open:
+                        return
+                    if len(self._deadlines) > 0:
+                        remaining = self._deadlines[0][0] - monotonic()
+                        if remaining <= 0.0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+
+                deadline, _, result_ref = heapq.heappop(self._deadlines)
+                # The result is gone or finished if the query is no longer running
+                result = result_ref()
+                if result is None or not result._streaming:
+                    if self._finished > 0:
+                        self._finished -= 1
+                    continue
+
+            # Send the request outside of the lock, so scheduling never waits for it
+            try:
+                self.cancel(result)
+            except (MillenniumDBError, OSError):
+                with self._condition:
+                    self._errors += 1
+                continue
+
+            latency = monotonic() - deadline
+            with self._condition:
+                self._cancelled += 1
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+
+
+def _is_running(result_ref: ref) -> bool:
+    """
+    Whether the query of a result is still running, it is finished if the
+    result is gone or has received its whole response
+    """
+    result = result_ref()
+    return result is not None and result._streaming
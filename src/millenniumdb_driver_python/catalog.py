@@ -35,6 +35,20 @@ class Catalog:
         self._version = None
         self._catalog()
 
+    @classmethod
+    def _from_summary(cls, summary) -> "Catalog":
+        """
+        Build the catalog from the summary of a CATALOG response that has
+        already been received
+        """
+        catalog = cls.__new__(cls)
+        catalog._connection = None
+        catalog._message_receiver = None
+        catalog._response_handler = None
+        catalog._model_id = summary["modelId"]
+        catalog._version = summary["version"]
+        return catalog
+
     @property
     def model_id(self) -> int:
         """
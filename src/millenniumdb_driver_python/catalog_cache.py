@@ -0,0 +1,177 @@
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable, Dict
+
+from .catalog import Catalog
+
+
+class CatalogCache:
+    """
+    Caches the catalog of the server for a time to live, so getting the
+    model ID and version does not need a round trip to the server.
+
+    The catalog is refreshed in the background once most of its time to
+    live has passed, and only one refresh runs at a time. Callers that find
+    no valid catalog wait for the refresh that is running instead of
+    starting another one
+    """
+
+    DEFAULT_TTL = 60.0
+
+    # The fraction of the time to live after which the catalog is refreshed
+    REFRESH_FRACTION = 0.75
+
+    def __init__(self, fetch: Callable[[], Catalog], ttl: float = DEFAULT_TTL):
+        """
+        attributes:
+        _fetch (Callable[[], Catalog]): Gets the catalog from the server
+        _ttl (float): Seconds a catalog is valid, 0.0 disables the cache
+        _catalog (Catalog or None): The cached catalog
+        _fetched_at (float): The monotonic time when the catalog was fetched
+        _refreshing (bool): Whether the catalog is being fetched
+        _generation (int): Increased by each invalidation, so a refresh that
+            started before it does not store its catalog
+        """
+        self._fetch = fetch
+        self._ttl = ttl
+        self._catalog = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._generation = 0
+        self._open = True
+        self._condition = Condition()
+
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._errors = 0
+
+    def get(self, fetch: Callable[[], Catalog] = None) -> Catalog:
+        """
+        Get the cached catalog, fetching it if there is no valid catalog
+
+        :param fetch: Gets the catalog through a connection the caller already
+            holds, instead of the fetch of the cache, which needs a connection
+            of its own. The caller neither waits for the refresh of another
+            caller nor starts one in the background
+        """
+        own_fetch = fetch is not None
+        if fetch is None:
+            fetch = self._fetch
+        if self._ttl <= 0.0:
+            with self._condition:
+                self._misses += 1
+            return fetch()
+
+        with self._condition:
+            while True:
+                if self._catalog is not None:
+                    age = monotonic() - self._fetched_at
+                    if age < self._ttl:
+                        self._hits += 1
+                        if (
+                            age >= self._ttl * CatalogCache.REFRESH_FRACTION
+                            and not own_fetch
+                        ):
+                            self._start_refresh()
+                        return self._catalog
+
+                if not self._refreshing or own_fetch:
+                    break
+                # Wait for the refresh that is running instead of starting another
+                self._condition.wait()
+
+            self._misses += 1
+            if not own_fetch:
+                self._refreshing = True
+            generation = self._generation
+
+        try:
+            catalog = fetch()
+        except Exception:
+            with self._condition:
+                self._errors += 1
+                if not own_fetch:
+                    self._refreshing = False
+                    self._condition.notify_all()
+            raise
+
+        with self._condition:
+            if not own_fetch:
+                self._refreshing = False
+            self._store(catalog, generation)
+        return catalog
+
+    def invalidate(self) -> None:
+        """
+        Discard the cached catalog, the next call to get fetches it again
+        """
+        with self._condition:
+            self._catalog = None
+            self._generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the cache
+
+        :return: A dictionary with the hits, the misses that fetched the catalog
+            while the caller waited, the background refreshes and the errors
+        """
+        with self._condition:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+                "errors": self._errors,
+            }
+
+    def close(self) -> None:
+        """
+        Stop starting background refreshes
+        """
+        with self._condition:
+            self._open = False
+
+    def _start_refresh(self) -> None:
+        """
+        Refresh the catalog in the background, unless it is already being fetched.
+        Must be called holding the condition
+        """
+        if self._refreshing or not self._open:
+            return
+        self._refreshing = True
+        self._refreshes += 1
+        Thread(
+            target=self._refresh,
+            args=[self._generation],
+            name="millenniumdb-catalog-refresh",
+            daemon=True,
+        ).start()
+
+    def _refresh(self, generation: int) -> None:
+        """
+        Fetch the catalog in the background. If it fails the cached catalog
+        is kept until it expires
+        """
+        try:
+            catalog = self._fetch()
+        except Exception:
+            with self._condition:
+                self._errors += 1
+                self._refreshing = False
+                self._condition.notify_all()
+            return
+
+        with self._condition:
+            self._refreshing = False
+            self._store(catalog, generation)
+
+    def _store(self, catalog: Catalog, generation: int) -> None:
+        """
+        Store a fetched catalog and wake the callers waiting for it.
+        Must be called holding the condition
+        """
+        if generation == self._generation:
+            self._catalog = catalog
+            self._fetched_at = monotonic()
+        self._condition.notify_all()
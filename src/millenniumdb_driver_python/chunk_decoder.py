@@ -1,3 +1,6 @@
+from typing import Iterator, Union
+
+from .async_socket_connection import AsyncSocketConnection
 from .iobuffer import IOBuffer
 from .millenniumdb_error import MillenniumDBError
 from .socket_connection import SocketConnection
@@ -11,32 +14,50 @@ class ChunkDecoder:
 
     SEAL = 0x00_00
 
-    def __init__(self, connection: SocketConnection, iobuffer: IOBuffer):
+    def __init__(
+        self,
+        connection: Union[SocketConnection, AsyncSocketConnection],
+        iobuffer: IOBuffer,
+    ):
         """
         attributes:
-        _connection (SocketConnection): The Socket connection
+        _connection (SocketConnection or AsyncSocketConnection): The connection,
+            an asyncio one is read by its receiver through reads()
         _iobuffer (IOBuffer): The IOBuffer of the incoming data
+        num_chunks (int): The number of chunks decoded, without the SEALs
+        num_bytes (int): The number of bytes decoded, with the chunk sizes
         """
         self._connection = connection
         self._iobuffer = iobuffer
+        self.num_chunks = 0
+        self.num_bytes = 0
 
     def decode(self):
         """
         Initialize the decoding loop until the SEAL is received
         """
+        recvall_into = self._connection.recvall_into
         try:
-            # Get first chunk size
-            self._connection.recvall_into(self._iobuffer, 2)
-            chunk_size = self._iobuffer.pop_uint16()
-
-            # Decode all the chunks until we reach the SEAL
-            while chunk_size != ChunkDecoder.SEAL:
-                # Receive current chunk and next chunk size in the same recv call
-                self._connection.recvall_into(
-                    self._iobuffer,
-                    chunk_size + 2,
-                )
-                chunk_size = self._iobuffer.pop_uint16()
-
+            for num_bytes in self.reads():
+                recvall_into(self._iobuffer, num_bytes)
         except Exception as e:
             raise MillenniumDBError("ChunkDecoder Error: could not decode chunk") from e
+
+    def reads(self) -> Iterator[int]:
+        """
+        The decoding loop without the I/O, shared with the asyncio receiver.
+        Yields the number of bytes to receive into the IOBuffer before the
+        loop is resumed, until the SEAL is received
+        """
+        # Get first chunk size
+        yield 2
+        chunk_size = self._iobuffer.pop_uint16()
+        self.num_bytes += 2
+
+        # Decode all the chunks until we reach the SEAL
+        while chunk_size != ChunkDecoder.SEAL:
+            # Receive current chunk and next chunk size in the same recv call
+            yield chunk_size + 2
+            self.num_chunks += 1
+            self.num_bytes += chunk_size + 2
+            chunk_size = self._iobuffer.pop_uint16()
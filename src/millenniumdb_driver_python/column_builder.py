@@ -0,0 +1,208 @@
+from array import array
+from typing import Dict, List
+
+from . import protocol
+from .iobuffer import IOBuffer
+from .message_decoder import MessageDecoder
+from .millenniumdb_error import MillenniumDBError
+
+
+class Column:
+    """
+    A column of values of the same variable. Numeric and boolean values are
+    stored in a typed array while all the values have the same DataType,
+    otherwise the column falls back to a list of objects
+    """
+
+    # The array typecode of each DataType that can be stored in a typed array
+    TYPECODES = {
+        protocol.DataType.BOOL_FALSE: "b",
+        protocol.DataType.BOOL_TRUE: "b",
+        protocol.DataType.UINT8: "B",
+        protocol.DataType.UINT32: "I",
+        protocol.DataType.UINT64: "Q",
+        protocol.DataType.INT64: "q",
+        protocol.DataType.FLOAT: "f",
+        protocol.DataType.DOUBLE: "d",
+    }
+
+    # The typecode of each python type when the DataType is not known
+    PYTHON_TYPECODES = {bool: "b", int: "q", float: "d"}
+
+    def __init__(self):
+        """
+        attributes:
+        _typecode (str or None): The typecode of the typed array, None if the
+            column stores objects
+        _data (array or List[object]): The values of the column
+        """
+        self._typecode = None
+        self._data = []
+
+    def append(self, typecode: str, value: object) -> None:
+        """
+        Append a value, its typecode is None if it cannot be stored in a typed array
+        """
+        if typecode is not None and typecode == self._typecode:
+            self._data.append(value)
+            return
+
+        if typecode is not None and self._typecode is None and len(self._data) == 0:
+            self._typecode = typecode
+            self._data = array(typecode)
+            self._data.append(value)
+            return
+
+        if self._typecode is not None:
+            # Mixed types, fall back to objects
+            self._data = self._data.tolist()
+            if self._typecode == "b":
+                self._data = [bool(x) for x in self._data]
+            self._typecode = None
+        self._data.append(value)
+
+    def append_value(self, value: object) -> None:
+        """
+        Append a decoded value, inferring its typecode from its python type
+        """
+        typecode = Column.PYTHON_TYPECODES.get(type(value))
+        if typecode == "q" and not -(2**63) <= value < 2**63:
+            typecode = None
+        self.append(typecode, value)
+
+    def to_numpy(self) -> "ndarray":
+        """
+        Get the column as a NumPy array. Typed arrays are not copied
+        """
+        import numpy
+
+        if self._typecode == "b":
+            return numpy.frombuffer(self._data, dtype=numpy.bool_)
+        if self._typecode is not None:
+            return numpy.frombuffer(self._data, dtype=numpy.dtype(self._typecode))
+
+        res = numpy.empty(len(self._data), dtype=object)
+        res[:] = self._data
+        return res
+
+    def values(self) -> List[object]:
+        """
+        Get the list of objects of the column, or its typed array
+        """
+        return self._data
+
+    def is_typed(self) -> bool:
+        """
+        Check if the column is stored in a typed array
+        """
+        return self._typecode is not None
+
+    def is_string(self) -> bool:
+        """
+        Check if the column only stores strings
+        """
+        return self._typecode is None and all(type(x) is str for x in self._data)
+
+    def __getitem__(self, index: int) -> object:
+        value = self._data[index]
+        return bool(value) if self._typecode == "b" else value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ColumnBuilder:
+    """
+    Builds the columns of a result while its RECORD messages are decoded,
+    without building a record for each row
+    """
+
+    def __init__(self, num_columns: int = 0):
+        self._columns: List[Column] = [Column() for _ in range(num_columns)]
+
+    def decode_message(self, decoder: MessageDecoder, iobuffer: IOBuffer) -> object:
+        """
+        Decode an incoming message. The values of a RECORD message are appended
+        to the columns and its payload is returned as None
+        """
+        if iobuffer.read_uint8() != protocol.DataType.MAP:
+            raise MillenniumDBError("ColumnBuilder Error: message is not a map")
+
+        message = {}
+        for _ in range(iobuffer.read_uint32()):
+            key = decoder.decode()
+            if (
+                key == "payload"
+                and message.get("type") == protocol.ResponseType.RECORD
+                and iobuffer.peek_uint8() == protocol.DataType.LIST
+            ):
+                self._decode_record(decoder, iobuffer)
+                message[key] = None
+            else:
+                message[key] = decoder.decode()
+
+        if (
+            message.get("type") == protocol.ResponseType.RECORD
+            and message["payload"] is not None
+        ):
+            # The payload was decoded before the type of the message
+            self.append_values(message["payload"])
+            message["payload"] = None
+        return message
+
+    def append_values(self, values: List[object]) -> None:
+        """
+        Append the decoded values of a row
+        """
+        self._check_length(len(values))
+        for column, value in zip(self._columns, values):
+            column.append_value(value)
+
+    def columns(self) -> List[Column]:
+        return self._columns
+
+    def num_rows(self) -> int:
+        return len(self._columns[0]) if self._columns else 0
+
+    def to_numpy(self, variables: List[str]) -> Dict[str, "ndarray"]:
+        """
+        Get a NumPy array for each variable
+        """
+        return {
+            variables[i]: column.to_numpy() for i, column in enumerate(self._columns)
+        }
+
+    def to_df(self, variables: List[str], categorical: bool = False) -> "DataFrame":
+        """
+        Build a DataFrame from the columns
+
+        :param categorical: Store the columns of strings as categorical columns
+        """
+        from pandas import Categorical, DataFrame
+
+        data = {}
+        for variable, column in zip(variables, self._columns):
+            if categorical and column.is_string():
+                data[variable] = Categorical(column.values())
+            elif column.is_typed():
+                data[variable] = column.to_numpy()
+            else:
+                # Let pandas infer the dtype of the objects
+                data[variable] = column.values()
+        return DataFrame(data, columns=variables)
+
+    def _decode_record(self, decoder: MessageDecoder, iobuffer: IOBuffer) -> None:
+        iobuffer.read_uint8()  # LIST
+        size = iobuffer.read_uint32()
+        self._check_length(size)
+        typecodes = Column.TYPECODES
+        for column in self._columns:
+            typecode = typecodes.get(iobuffer.peek_uint8())
+            column.append(typecode, decoder.decode())
+
+    def _check_length(self, num_values: int) -> None:
+        if num_values != len(self._columns):
+            raise MillenniumDBError(
+                "ColumnBuilder Error: Number of variables does not match the number"
+                " of values"
+            )
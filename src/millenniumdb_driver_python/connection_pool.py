@@ -0,0 +1,200 @@
+from collections import deque
+from threading import Condition
+from time import monotonic
+from typing import Dict
+
+from .millenniumdb_error import MillenniumDBError
+from .socket_connection import SocketConnection
+
+
+class ConnectionPool:
+    """
+    A bounded pool of handshaken connections to the MillenniumDB server
+    """
+
+    DEFAULT_MIN_SIZE = 0
+    DEFAULT_MAX_SIZE = 100
+    DEFAULT_IDLE_TIMEOUT = 300.0
+    DEFAULT_ACQUIRE_TIMEOUT = 60.0
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        min_size: int = DEFAULT_MIN_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+        read_ahead_size: int = SocketConnection.DEFAULT_READ_AHEAD_SIZE,
+    ):
+        """
+        attributes:
+        _host (str): The hostname of the server
+        _port (int): The port of the server
+        _min_size (int): The number of connections kept even if they are idle
+        _max_size (int): The maximum number of connections, idle or in use
+        _idle_timeout (float): Seconds until an idle connection is evicted
+        _acquire_timeout (float): Seconds to wait for a connection when the pool is full
+        _read_ahead_size (int): The size of the blocks read from the sockets
+        _idle (Deque[Tuple[SocketConnection, float]]): The idle connections and the
+            time when they were released, the most recently released is at the right
+        _size (int): The number of connections owned by the pool, idle or in use
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise MillenniumDBError(
+                "ConnectionPool Error: invalid pool size "
+                f"(min_size={min_size}, max_size={max_size})"
+            )
+
+        self._host = host
+        self._port = port
+        self._min_size = min_size
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._acquire_timeout = acquire_timeout
+        self._read_ahead_size = read_ahead_size
+        self._idle = deque()
+        self._size = 0
+        self._open = True
+        self._condition = Condition()
+
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._evictions = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), monotonic()))
+            self._size += 1
+
+    def acquire(self, timeout: float = None) -> SocketConnection:
+        """
+        Get an idle connection, or open a new one if the pool is not full.
+        Otherwise wait until a connection is released
+
+        :param timeout: Seconds to wait for a connection, defaults to the
+            acquire timeout of the pool
+        :return: A handshaken connection
+        """
+        if timeout is None:
+            timeout = self._acquire_timeout
+        deadline = monotonic() + timeout
+        waited = False
+
+        with self._condition:
+            while True:
+                if not self._open:
+                    raise MillenniumDBError("ConnectionPool Error: pool is closed")
+
+                self._evict_expired()
+                while self._idle:
+                    connection, _ = self._idle.pop()
+                    if connection.is_alive():
+                        self._hits += 1
+                        return connection
+                    self._evict(connection)
+
+                if self._size < self._max_size:
+                    self._size += 1
+                    self._misses += 1
+                    break
+
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                remaining = deadline - monotonic()
+                if remaining <= 0.0 or not self._condition.wait(remaining):
+                    raise MillenniumDBError(
+                        "ConnectionPool Error: timed out waiting for a connection"
+                    )
+
+        # Connect outside of the lock, the slot is already reserved
+        try:
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection: SocketConnection) -> None:
+        """
+        Return a connection to the pool so it can be reused
+        """
+        with self._condition:
+            if not self._open:
+                connection.close()
+                self._size -= 1
+                return
+
+            self._idle.append((connection, monotonic()))
+            self._evict_expired()
+            self._condition.notify()
+
+    def discard(self, connection: SocketConnection) -> None:
+        """
+        Close a connection that must not be reused, freeing its slot in the pool
+        """
+        connection.close()
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def max_size(self) -> int:
+        """
+        The maximum number of connections of the pool, idle or in use
+        """
+        return self._max_size
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the pool
+
+        :return: A dictionary with the hits, misses, waits and evictions of the
+            pool, and its current size, idle and in use connections
+        """
+        with self._condition:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "evictions": self._evictions,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+            }
+
+    def close(self) -> None:
+        """
+        Close the pool and all its idle connections. Connections in use are
+        closed when they are released
+        """
+        with self._condition:
+            self._open = False
+            while self._idle:
+                connection, _ = self._idle.pop()
+                connection.close()
+                self._size -= 1
+            self._condition.notify_all()
+
+    def _connect(self) -> SocketConnection:
+        return SocketConnection(self._host, self._port, self._read_ahead_size)
+
+    def _evict_expired(self) -> None:
+        """
+        Evict the connections that have been idle longer than the idle timeout,
+        keeping at least the minimum size of the pool
+        """
+        now = monotonic()
+        while (
+            self._idle
+            and self._size > self._min_size
+            and now - self._idle[0][1] > self._idle_timeout
+        ):
+            connection, _ = self._idle.popleft()
+            self._evict(connection)
+
+    def _evict(self, connection: SocketConnection) -> None:
+        connection.close()
+        self._size -= 1
+        self._evictions += 1
@@ -1,10 +1,24 @@
 from functools import wraps
+from typing import Dict, Iterable, Sequence, Tuple, Union
 from urllib.parse import urlparse
 
+from .cancel_scheduler import CancelScheduler
 from .catalog import Catalog
+from .catalog_cache import CatalogCache
+from .connection_pool import ConnectionPool
+from .fan_out import FanOut
+from .intern_pool import InternPool
+from .load_balancer import LoadBalancer
+from .message_receiver import MessageReceiver
 from .millenniumdb_error import MillenniumDBError
+from .parallel_decoder import ParallelDecoder
+from .query_stats import QueryHooks
 from .result import Result
+from .result_cache import CacheKey, ResultCache, normalize_query
 from .session import Session
+from .slow_query_log import SlowQueryLog
+from .socket_connection import SocketConnection
+from .template import BoundQuery, Template
 
 
 def _ensure_driver_open(func):
@@ -21,58 +35,326 @@ def _ensure_driver_open(func):
 class Driver:
     """
     A driver that manages sessions and connections sending
-    queries and receiving results from the MillenniumDB server
+    queries and receiving results from the MillenniumDB server.
+
+    Given several URLs of servers holding the same data, for example read
+    replicas, each new session is sent to one of them by a LoadBalancer
     """
 
-    def __init__(self, url: str):
+    # The number of prepared templates kept, the cache is cleared when full
+    MAX_CACHED_TEMPLATES = 1000
+
+    def __init__(
+        self,
+        url: Union[str, Sequence[str]],
+        min_pool_size: int = ConnectionPool.DEFAULT_MIN_SIZE,
+        max_pool_size: int = ConnectionPool.DEFAULT_MAX_SIZE,
+        idle_timeout: float = ConnectionPool.DEFAULT_IDLE_TIMEOUT,
+        acquire_timeout: float = ConnectionPool.DEFAULT_ACQUIRE_TIMEOUT,
+        read_ahead_size: int = SocketConnection.DEFAULT_READ_AHEAD_SIZE,
+        max_retained_buffer_size: int = (
+            MessageReceiver.DEFAULT_MAX_RETAINED_BUFFER_SIZE
+        ),
+        intern_pool_size: int = 0,
+        catalog_ttl: float = CatalogCache.DEFAULT_TTL,
+        hooks: Iterable[QueryHooks] = (),
+        slow_query_threshold: float = None,
+        decode_processes: int = 0,
+        parallel_decode_threshold: int = ParallelDecoder.DEFAULT_THRESHOLD,
+        result_cache_entries: int = 0,
+        result_cache_bytes: int = ResultCache.DEFAULT_MAX_BYTES,
+        result_cache_ttl: float = ResultCache.DEFAULT_TTL,
+        load_balancing: str = LoadBalancer.DEFAULT_STRATEGY,
+        eject_time: float = LoadBalancer.DEFAULT_EJECT_TIME,
+        eject_errors: int = LoadBalancer.DEFAULT_EJECT_ERRORS,
+    ):
         """
         parameters:
-        parsed_url (ParseResult): The parsed URL of the server
+        url (str or Sequence[str]): The URL of the server, or the URLs of
+            the servers the sessions are balanced over
+        min_pool_size (int): The number of connections kept open even if
+            idle, to each server
+        max_pool_size (int): The maximum number of connections to each server
+        idle_timeout (float): Seconds until an idle connection is closed
+        acquire_timeout (float): Seconds to wait for a connection when all are in use
+        read_ahead_size (int): The size of the blocks read from the sockets,
+            0 reads exactly the bytes of each chunk
+        max_retained_buffer_size (int): The size above which the buffer of a
+            received message shrinks back, None never shrinks it
+        intern_pool_size (int): The maximum number of graph objects of each class
+            shared by all the results of the driver, 0 disables the shared pool
+        catalog_ttl (float): Seconds the catalog of the server is cached,
+            0.0 gets it from the server every time
+        hooks (Iterable[QueryHooks]): Observe the start, first record, end and
+            errors of every query
+        slow_query_threshold (float or None): Seconds above which a query is
+            logged with its timing by a SlowQueryLog, None disables the log
+        decode_processes (int): The number of processes that decode the
+            records of the results run with a ParallelStorage, 0 disables them
+        parallel_decode_threshold (int): The size of the records of a result
+            below which they are decoded without the processes
+        result_cache_entries (int): The maximum number of results cached for
+            the queries run with cache=True, 0 disables the cache
+        result_cache_bytes (int): The maximum estimated memory of the cached results
+        result_cache_ttl (float): The default seconds a result is cached
+        load_balancing (str): How the server of each session is chosen among
+            several, "least_outstanding" or "ewma"
+        eject_time (float): Seconds until an ejected server is probed again
+        eject_errors (int): The number of queries in a row that fail or time
+            out on a server after which it is ejected, 0 only ejects the
+            servers that cannot be connected to
 
         attributes:
         _open (bool): The state of the driver
-        _host (str): The hostname of the server
-        _port (int): The port of the server
-        _sessions (List[Session]): The list of current sessions
+        _pool (ConnectionPool or LoadBalancer): The pool of connections used
+            by the sessions, a LoadBalancer for several servers
+        _load_balancer (LoadBalancer or None): The pool of connections to
+            several servers
+        _max_retained_buffer_size (int or None): The size above which the buffer
+            of a received message shrinks back
+        _intern_pool (InternPool or None): The graph objects shared by all results
+        _sessions (Set[Session]): The set of open sessions
+        _templates (Dict[str, Template]): The prepared templates, by query
+        _cancel_scheduler (CancelScheduler): Cancels the queries whose timeout expired
+        _catalog_cache (CatalogCache): The cached catalog of the server
+        _hooks (Tuple[QueryHooks]): The hooks called by every query, replaced
+            instead of modified so running queries are not affected
+        _parallel_decoder (ParallelDecoder or None): Decodes the records of
+            large results in worker processes
+        _result_cache (ResultCache or None): The cached results of the queries
         """
-        parsed_url = urlparse(url)
+        urls = [url] if isinstance(url, str) else list(url)
+        addresses = [
+            (parsed_url.hostname, parsed_url.port) for parsed_url in map(urlparse, urls)
+        ]
         self._open = True
-        self._host = parsed_url.hostname
-        self._port = parsed_url.port
-        self._sessions = []
+        if len(addresses) == 1:
+            self._load_balancer = None
+            self._pool = ConnectionPool(
+                *addresses[0],
+                min_pool_size,
+                max_pool_size,
+                idle_timeout,
+                acquire_timeout,
+                read_ahead_size,
+            )
+        else:
+            self._load_balancer = LoadBalancer(
+                addresses,
+                load_balancing,
+                eject_time,
+                eject_errors,
+                min_pool_size,
+                max_pool_size,
+                idle_timeout,
+                acquire_timeout,
+                read_ahead_size,
+            )
+            self._pool = self._load_balancer
+        self._max_retained_buffer_size = max_retained_buffer_size
+        self._intern_pool = (
+            InternPool(intern_pool_size) if intern_pool_size > 0 else None
+        )
+        self._sessions = set()
+        self._templates: Dict[str, Template] = {}
+        self._cancel_scheduler = CancelScheduler()
+        self._catalog_cache = CatalogCache(self._fetch_catalog, catalog_ttl)
+        self._hooks: Tuple[QueryHooks] = tuple(hooks)
+        if self._load_balancer is not None:
+            # Counts the queries and measures the latency of each server
+            self._hooks += (self._load_balancer,)
+        if slow_query_threshold is not None:
+            self._hooks += (SlowQueryLog(slow_query_threshold),)
+        self._parallel_decoder = (
+            ParallelDecoder(decode_processes, parallel_decode_threshold)
+            if decode_processes > 0
+            else None
+        )
+        self._result_cache = (
+            ResultCache(result_cache_entries, result_cache_bytes, result_cache_ttl)
+            if result_cache_entries > 0
+            else None
+        )
 
     @_ensure_driver_open
     def catalog(self) -> Catalog:
         """
-        Get the catalog of the MillenniumDB server
+        Get the catalog of the MillenniumDB server. The catalog is cached for
+        the catalog_ttl of the driver and refreshed in the background
         """
-        with self.session() as session:
-            return session.catalog()
+        return self._catalog_cache.get()
+
+    def invalidate_catalog(self) -> None:
+        """
+        Discard the cached catalog, so the next call to catalog gets it from
+        the server. For example after the server has been restarted
+        """
+        self._catalog_cache.invalidate()
 
     @_ensure_driver_open
     def cancel(self, result: Result) -> None:
         """
-        Cancel a running query on the server
+        Cancel a running query on the server, through the control connection
+        of the driver
         """
-        with self.session() as session:
-            session._cancel(result)
+        self._cancel_scheduler.cancel(result)
+
+    def invalidate_results(self, prefix: str = None, tag: str = None) -> int:
+        """
+        Discard the cached results whose query starts with prefix, or that
+        were cached with the tag, or all of them if neither is given. For
+        example after running updates
+
+        :return: The number of results discarded
+        """
+        if self._result_cache is None:
+            return 0
+        return self._result_cache.invalidate(prefix, tag)
+
+    def add_hooks(self, hooks: QueryHooks) -> None:
+        """
+        Call the hooks for the queries started from now on
+        """
+        self._hooks += (hooks,)
 
     @_ensure_driver_open
-    def session(self) -> Session:
+    def session(self, acquire_timeout: float = None) -> Session:
         """
-        Create a new session
+        Create a new session using a connection from the pool
+
+        :param acquire_timeout: Seconds to wait for a connection when all are
+            in use, defaults to the acquire timeout of the driver
         """
-        session = Session(self._host, self._port, self)
-        self._sessions.append(session)
+        session = Session(self._pool.acquire(acquire_timeout), self)
+        self._sessions.add(session)
         return session
 
+    @_ensure_driver_open
+    def run_all(
+        self,
+        queries: Iterable[Union[str, BoundQuery]],
+        concurrency: int = FanOut.DEFAULT_CONCURRENCY,
+        timeout: float = 0.0,
+        ordered: bool = True,
+        acquire_timeout: float = None,
+        **options,
+    ) -> FanOut:
+        """
+        Run independent queries concurrently, each worker thread running
+        queries on its own session. A failed query does not stop the others,
+        the error is kept in its QueryOutcome
+
+        :param queries: The query strings to execute, or templates bound by
+            Template.bind
+        :param concurrency: The number of sessions running queries at the same
+            time, also bounded by the max_pool_size of the driver
+        :param timeout: Seconds until each query is cancelled, 0.0 means no timeout
+        :param ordered: Yield the outcomes in the order of the queries instead
+            of as they complete
+        :param acquire_timeout: Seconds to wait for a connection when all are
+            in use, defaults to the acquire timeout of the driver
+        :param options: The keyword arguments of Session.run for every query,
+            except stream and a PrefetchStorage
+        :return: The outcomes of the queries, their wall time and latencies
+        """
+        return FanOut(
+            self, queries, concurrency, timeout, ordered, acquire_timeout, **options
+        )
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the connection pool
+        """
+        return self._pool.stats()
+
+    def host_stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Get the health, the queries, the sessions in use and the latency of
+        each server of a driver with several URLs, by host:port
+        """
+        if self._load_balancer is None:
+            raise MillenniumDBError("Driver Error: the driver has a single server")
+        return self._load_balancer.host_stats()
+
+    def catalog_stats(self) -> Dict[str, int]:
+        """
+        Get the hits, misses, background refreshes and errors of the catalog cache
+        """
+        return self._catalog_cache.stats()
+
+    def result_cache_stats(self) -> Dict[str, int]:
+        """
+        Get the hits, misses, evictions, expirations and invalidations of the
+        result cache, and its number of entries and their estimated memory
+        """
+        if self._result_cache is None:
+            raise MillenniumDBError("Driver Error: the result cache is disabled")
+        return self._result_cache.stats()
+
+    def cancel_stats(self) -> Dict[str, float]:
+        """
+        Get the number of queries cancelled by their timeout, and the seconds
+        from their deadline until the CANCEL request was sent
+        """
+        return self._cancel_scheduler.stats()
+
     def close(self) -> None:
         """
-        Close the driver and all its sessions"""
+        Close the driver, all its sessions and connections"""
         if self._open:
             self._open = False
-            for session in self._sessions:
+            for session in list(self._sessions):
                 session.close()
+            self._cancel_scheduler.close()
+            self._catalog_cache.close()
+            self._pool.close()
+            if self._parallel_decoder is not None:
+                self._parallel_decoder.close()
+
+    def _fetch_catalog(self) -> Catalog:
+        """
+        Get the catalog from the server through a session
+        """
+        with self.session() as session:
+            return session.catalog()
+
+    def _result_cache_key(
+        self, query: Union[str, BoundQuery], session: Session
+    ) -> CacheKey:
+        """
+        Get the key of the cached result of a query, with the catalog of the
+        server. A catalog that is not cached is fetched through the connection
+        of the session, which would otherwise wait for another connection
+        while holding its own
+        """
+        if self._result_cache is None:
+            raise MillenniumDBError(
+                "Driver Error: cache requires a driver with result_cache_entries"
+            )
+        catalog = self._catalog_cache.get(session.catalog)
+        return (normalize_query(query), catalog.model_id, catalog.version)
+
+    def _template(self, template: str) -> Template:
+        """
+        Get the cached template of a query, preparing it if needed
+        """
+        res = self._templates.get(template)
+        if res is None:
+            if len(self._templates) >= Driver.MAX_CACHED_TEMPLATES:
+                self._templates.clear()
+            res = Template(template)
+            self._templates[template] = res
+        return res
+
+    def _release(self, session: Session, reusable: bool) -> None:
+        """
+        Return the connection of a closed session to the pool
+        """
+        self._sessions.discard(session)
+        if reusable:
+            self._pool.release(session._connection)
+        else:
+            self._pool.discard(session._connection)
 
     def __enter__(self):
         return self
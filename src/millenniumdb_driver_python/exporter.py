@@ -0,0 +1,434 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+from decimal import Decimal
+from time import perf_counter
+from typing import BinaryIO, Callable, Dict, Iterable, List, Tuple, Union
+
+from .graph_objects import (
+    IRI,
+    DateTime,
+    GraphAnon,
+    GraphEdge,
+    GraphNode,
+    GraphPath,
+    SimpleDate,
+    StringDatatype,
+    StringLang,
+    Time,
+)
+from .millenniumdb_error import MillenniumDBError
+
+# The characters escaped inside a string literal, as in N-Triples
+_LITERAL_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+)
+
+
+def _literal(value: str) -> str:
+    return '"' + value.translate(_LITERAL_ESCAPES) + '"'
+
+
+def _iri_text(value: IRI) -> str:
+    return f"<{value.iri}>"
+
+
+def _string_lang_text(value: StringLang) -> str:
+    return f"{_literal(value.str)}@{value.lang}"
+
+
+def _string_datatype_text(value: StringDatatype) -> str:
+    return f"{_literal(value.str)}^^<{value.datatype}>"
+
+
+def _path_text(value: GraphPath) -> str:
+    """
+    Write a path as (start)-[type]->(node)<-[type]-(node)...
+    """
+    parts = [f"({value.start})"]
+    for node, type_, reverse in zip(
+        value.nodes()[1:], value.edges(), value.reverse_flags()
+    ):
+        if reverse:
+            parts.append(f"<-[{to_text(type_)}]-({node})")
+        else:
+            parts.append(f"-[{to_text(type_)}]->({node})")
+    return "".join(parts)
+
+
+def _bool_text(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def _float_text(value: float) -> str:
+    return repr(value)
+
+
+def _json_text(value: object) -> str:
+    return json.dumps(to_json(value), ensure_ascii=False, separators=(",", ":"))
+
+
+# The textual form of each type of value, the other values use str
+_TEXT: Dict[type, Callable[[object], str]] = {
+    str: str,
+    int: str,
+    float: _float_text,
+    bool: _bool_text,
+    Decimal: str,
+    IRI: _iri_text,
+    StringLang: _string_lang_text,
+    StringDatatype: _string_datatype_text,
+    GraphNode: str,
+    GraphEdge: str,
+    GraphAnon: str,
+    SimpleDate: str,
+    Time: str,
+    DateTime: str,
+    GraphPath: _path_text,
+    list: _json_text,
+    dict: _json_text,
+}
+
+
+def to_text(value: object) -> str:
+    """
+    Get the textual form of a value: IRIs as <iri>, literals with a language
+    or a datatype as in N-Triples, dates and times in ISO 8601, paths as
+    (a)-[type]->(b), lists and maps as JSON and None as an empty string
+    """
+    if value is None:
+        return ""
+    return _TEXT.get(type(value), str)(value)
+
+
+def to_json(value: object) -> object:
+    """
+    Get a value that json can serialize: strings, numbers, booleans and None
+    are kept, lists and maps are converted item by item and the other values
+    are written in their textual form
+    """
+    if value is None or type(value) in (str, int, float, bool):
+        return value
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): to_json(item) for key, item in value.items()}
+    return to_text(value)
+
+
+class Export:
+    """
+    Writes the records of a streamed result to a file as they are received,
+    in CSV, NDJSON or Parquet, without building a Record or a dictionary for
+    each row. The rows are written in batches, so the memory used does not
+    depend on the number of rows.
+
+    Parquet needs pyarrow. Booleans, 64-bit integers and floats get typed
+    Parquet columns, the other values are written in their textual form.
+    The type of a column is widened as the batches are written: integers
+    mixed with floats become float64, any other mix of types becomes a
+    string, and a column takes the type of its first value that is not None
+    """
+
+    FORMATS = ("csv", "ndjson", "parquet")
+
+    DEFAULT_BATCH_ROWS = 10_000
+
+    def __init__(
+        self,
+        variables: Tuple[str],
+        rows: Iterable[Tuple[object]],
+        file: Union[str, BinaryIO],
+        format: str = "csv",
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        header: bool = True,
+    ):
+        """
+        attributes:
+        _variables (Tuple[str]): The names of the columns
+        _format (str): One of FORMATS
+        _batch_rows (int): The number of rows written at once, the size of
+            the row groups of a Parquet file
+        _header (bool): Whether a CSV file starts with the names of the columns
+        """
+        if format not in Export.FORMATS:
+            raise MillenniumDBError(
+                f"Export Error: format must be one of {', '.join(Export.FORMATS)}"
+            )
+        if batch_rows < 1:
+            raise MillenniumDBError("Export Error: batch_rows must be at least 1")
+
+        self._variables = variables
+        self._format = format
+        self._batch_rows = batch_rows
+        self._header = header
+
+        self._num_rows = 0
+        self._num_bytes = 0
+        self._num_batches = 0
+        self._elapsed = 0.0
+
+        start = perf_counter()
+        owns_file = isinstance(file, str)
+        if owns_file:
+            file = open(file, "wb")
+        try:
+            if format == "parquet":
+                self._write_parquet(rows, file)
+            else:
+                self._write_text(rows, file)
+        finally:
+            if owns_file:
+                file.close()
+            self._elapsed = perf_counter() - start
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the totals and the throughput of the export
+
+        :return: A dictionary with the format, the number of rows, bytes
+            written and batches, the elapsed seconds, including receiving the
+            result, and the rows and bytes written per second
+        """
+        elapsed = self._elapsed if self._elapsed > 0.0 else float("inf")
+        return {
+            "format": self._format,
+            "rows": self._num_rows,
+            "bytes": self._num_bytes,
+            "batches": self._num_batches,
+            "elapsed": self._elapsed,
+            "rows_per_second": self._num_rows / elapsed,
+            "bytes_per_second": self._num_bytes / elapsed,
+        }
+
+    def _write_text(self, rows: Iterable[Tuple[object]], file: BinaryIO) -> None:
+        """
+        Write the rows as CSV or as one JSON object per line
+        """
+        buffer = io.StringIO()
+        if self._format == "csv":
+            writer = csv.writer(buffer, lineterminator="\n")
+            if self._header:
+                writer.writerow(self._variables)
+            text = _TEXT
+
+            def write_row(values: Tuple[object]) -> None:
+                writer.writerow(
+                    [
+                        "" if value is None else text.get(type(value), str)(value)
+                        for value in values
+                    ]
+                )
+
+        else:
+            variables = self._variables
+            encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+            def write_row(values: Tuple[object]) -> None:
+                buffer.write(encode(dict(zip(variables, map(to_json, values)))))
+                buffer.write("\n")
+
+        num_batch_rows = 0
+        for values in rows:
+            write_row(values)
+            num_batch_rows += 1
+            if num_batch_rows == self._batch_rows:
+                self._flush_text(buffer, file, num_batch_rows)
+                num_batch_rows = 0
+        if num_batch_rows > 0 or buffer.tell() > 0:
+            self._flush_text(buffer, file, num_batch_rows)
+
+    def _flush_text(self, buffer: io.StringIO, file: BinaryIO, num_rows: int) -> None:
+        data = buffer.getvalue().encode("utf-8")
+        file.write(data)
+        buffer.seek(0)
+        buffer.truncate()
+        self._num_rows += num_rows
+        self._num_bytes += len(data)
+        self._num_batches += 1
+
+    def _write_parquet(self, rows: Iterable[Tuple[object]], file: BinaryIO) -> None:
+        """
+        Write the rows as a Parquet file with one row group per batch.
+
+        The schema of a Parquet file cannot change, so the row groups are
+        written to temporary segments, a new one each time a type is widened.
+        A single segment is copied to the file, otherwise the row groups of
+        every segment are converted to the final types
+        """
+        import pyarrow.parquet
+
+        start_position = file.tell() if file.seekable() else 0
+        # The temporary files and the schema of their row groups
+        segments: List[Tuple[BinaryIO, "pyarrow.Schema"]] = []
+        writer = None
+
+        def write_batch(columns: List[List[object]], num_rows: int) -> None:
+            nonlocal writer
+            schema = segments[-1][1] if segments else None
+            new_schema = self._widen_schema(schema, columns)
+            if new_schema != schema:
+                if writer is not None:
+                    writer.close()
+                segment = tempfile.TemporaryFile()
+                segments.append((segment, new_schema))
+                writer = pyarrow.parquet.ParquetWriter(segment, new_schema)
+            if num_rows > 0:
+                self._write_row_group(writer, new_schema, columns, num_rows)
+
+        try:
+            columns: List[List[object]] = [[] for _ in self._variables]
+            num_batch_rows = 0
+            for values in rows:
+                for column, value in zip(columns, values):
+                    column.append(value)
+                num_batch_rows += 1
+                if num_batch_rows == self._batch_rows:
+                    write_batch(columns, num_batch_rows)
+                    columns = [[] for _ in self._variables]
+                    num_batch_rows = 0
+            if num_batch_rows > 0 or not segments:
+                write_batch(columns, num_batch_rows)
+            writer.close()
+            writer = None
+            self._write_segments(segments, file)
+        finally:
+            if writer is not None:
+                writer.close()
+            for segment, _ in segments:
+                segment.close()
+        self._num_bytes = (
+            file.tell() - start_position if file.seekable() else self._num_bytes
+        )
+
+    def _widen_schema(
+        self, schema: Union["pyarrow.Schema", None], columns: List[List[object]]
+    ) -> "pyarrow.Schema":
+        """
+        Get the schema of the rows written so far and a new batch, null for
+        a column without values yet
+        """
+        import pyarrow
+
+        fields = []
+        for i, (variable, column) in enumerate(zip(self._variables, columns)):
+            arrow_type = _arrow_type(column)
+            if schema is not None:
+                arrow_type = _widen_type(schema.field(i).type, arrow_type)
+            fields.append(pyarrow.field(variable, arrow_type))
+        return pyarrow.schema(fields)
+
+    def _write_row_group(
+        self,
+        writer: "pyarrow.parquet.ParquetWriter",
+        schema: "pyarrow.Schema",
+        columns: List[List[object]],
+        num_rows: int,
+    ) -> None:
+        import pyarrow
+
+        arrays = [
+            _arrow_array(column, field.type) for field, column in zip(schema, columns)
+        ]
+        writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        self._num_rows += num_rows
+        self._num_batches += 1
+
+    def _write_segments(
+        self, segments: List[Tuple[BinaryIO, "pyarrow.Schema"]], file: BinaryIO
+    ) -> None:
+        """
+        Write the row groups of the segments to the file with the widest type
+        of each column, a column without values is a string
+        """
+        import pyarrow
+        import pyarrow.parquet
+
+        schema = pyarrow.schema(
+            [
+                (
+                    field.with_type(pyarrow.string())
+                    if pyarrow.types.is_null(field.type)
+                    else field
+                )
+                for field in segments[-1][1]
+            ]
+        )
+        if len(segments) == 1 and segments[0][1] == schema:
+            segments[0][0].seek(0)
+            shutil.copyfileobj(segments[0][0], file)
+            return
+
+        with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+            for segment, _ in segments:
+                segment.seek(0)
+                parquet_file = pyarrow.parquet.ParquetFile(segment)
+                for i in range(parquet_file.num_row_groups):
+                    table = parquet_file.read_row_group(i)
+                    arrays = [
+                        _widen_array(array, field.type)
+                        for array, field in zip(table.columns, schema)
+                    ]
+                    writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+
+def _arrow_type(column: List[object]) -> "pyarrow.DataType":
+    """
+    Get the narrowest type of the values of a column, null if they are all None
+    """
+    import pyarrow
+
+    types = {type(value) for value in column if value is not None}
+    if not types:
+        return pyarrow.null()
+    if types == {bool}:
+        return pyarrow.bool_()
+    if types <= {int, float}:
+        # An integer out of the range of int64 may not fit in a float either
+        if int in types and not all(
+            type(value) is not int or -(2**63) <= value < 2**63 for value in column
+        ):
+            return pyarrow.string()
+        return pyarrow.int64() if types == {int} else pyarrow.float64()
+    return pyarrow.string()
+
+
+def _widen_type(
+    current: "pyarrow.DataType", new: "pyarrow.DataType"
+) -> "pyarrow.DataType":
+    """
+    Get the type that holds the values of two types
+    """
+    import pyarrow
+
+    if current == new or pyarrow.types.is_null(new):
+        return current
+    if pyarrow.types.is_null(current):
+        return new
+    if {current, new} == {pyarrow.int64(), pyarrow.float64()}:
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def _arrow_array(
+    column: List[object], arrow_type: "pyarrow.DataType"
+) -> "pyarrow.Array":
+    """
+    Get the values of a column as an array of a type that holds them
+    """
+    import pyarrow
+
+    if pyarrow.types.is_string(arrow_type):
+        column = [None if value is None else to_text(value) for value in column]
+    return pyarrow.array(column, type=arrow_type)
+
+
+def _widen_array(array: "pyarrow.ChunkedArray", arrow_type: "pyarrow.DataType"):
+    """
+    Convert the values written with a narrower type to a wider one
+    """
+    if array.type == arrow_type:
+        return array
+    return _arrow_array(array.to_pylist(), arrow_type)
@@ -0,0 +1,315 @@
+from inspect import signature
+from queue import SimpleQueue
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Union
+
+from .millenniumdb_error import MillenniumDBError, ResultError
+from .query_stats import QueryStats
+from .record_storage import PrefetchStorage
+from .result import Result
+from .session import Session
+from .template import BoundQuery
+
+# Put by each worker once it has no more queries to run
+_WORKER_DONE = None
+
+# The keyword arguments of Session.run that can be given to every query
+_RUN_OPTIONS = frozenset(signature(Session.run).parameters) - {
+    "self",
+    "query",
+    "timeout",
+}
+
+
+class QueryOutcome:
+    """
+    The result or the error of a query run by a FanOut
+    """
+
+    __slots__ = ("index", "query", "result", "error", "latency")
+
+    def __init__(self, index: int, query: Union[str, BoundQuery]):
+        """
+        attributes:
+        index (int): The position of the query in the queries of the FanOut
+        query (str or BoundQuery): The query
+        result (Result or None): The result of the query if it succeeded
+        error (Exception or None): The error of the query if it failed, a
+            ResultError if it failed on the server
+        latency (float): Seconds from acquiring the session of the query until
+            its whole result was received
+        """
+        self.index = index
+        self.query = query
+        self.result = None
+        self.error = None
+        self.latency = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    @property
+    def stats(self) -> Union[QueryStats, None]:
+        """
+        The stats of the query, None if it failed before it was sent
+        """
+        if self.result is not None:
+            return self.result.stats()
+        if isinstance(self.error, ResultError):
+            return self.error.result.stats()
+        return None
+
+    def __repr__(self) -> str:
+        error = self.error
+        if isinstance(error, ResultError) and error.__cause__ is not None:
+            error = error.__cause__
+        state = "ok" if error is None else f"error={error}"
+        return f"QueryOutcome<{self.index}, latency={self.latency:.6f}s, {state}>"
+
+
+class FanOut:
+    """
+    Runs independent queries on a bounded number of sessions of a driver,
+    each session used by a single worker thread.
+
+    The queries are read from the iterable as the workers become free, and
+    the outcomes are yielded in the order of the queries or as they
+    complete. A failed query does not affect the others.
+
+    Each worker keeps its session until there are no more queries, so there
+    are no more workers than connections in the pool of the driver
+    """
+
+    DEFAULT_CONCURRENCY = 8
+
+    def __init__(
+        self,
+        driver: "Driver",
+        queries: Iterable[Union[str, BoundQuery]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = 0.0,
+        ordered: bool = True,
+        acquire_timeout: float = None,
+        **options,
+    ):
+        """
+        attributes:
+        _driver (Driver): The driver whose sessions run the queries
+        _queries (Iterator[Tuple[int, str or BoundQuery]]): The queries not
+            taken by a worker yet, with their position
+        _timeout (float): Seconds until each query is cancelled, 0.0 means no timeout
+        _ordered (bool): Whether the outcomes are yielded in the order of the queries
+        _acquire_timeout (float or None): Seconds to wait for a connection
+        _options (Dict[str, object]): The keyword arguments of Session.run
+        _done (SimpleQueue[QueryOutcome or None]): The outcomes of the finished
+            queries, and _WORKER_DONE once each worker has finished
+        _outcomes (List[QueryOutcome]): The outcomes received so far
+        _stopped (bool): Whether the workers stop taking queries
+        _queries_error (Exception or None): The error raised by the queries
+        _num_taken (int): The number of queries taken by the workers
+        _workers (List[Thread]): The worker threads, no more than the
+            connections of the pool of the driver
+        """
+        if concurrency < 1:
+            raise MillenniumDBError("FanOut Error: concurrency must be at least 1")
+        unknown_options = options.keys() - _RUN_OPTIONS
+        if unknown_options:
+            raise MillenniumDBError(
+                "FanOut Error: unknown options " + ", ".join(sorted(unknown_options))
+            )
+        # A streamed result would be read after its session was closed
+        if options.get("stream") or isinstance(options.get("storage"), PrefetchStorage):
+            raise MillenniumDBError(
+                "FanOut Error: stream and PrefetchStorage cannot be used with run_all"
+            )
+
+        self._driver = driver
+        self._queries = enumerate(queries)
+        self._queries_lock = Lock()
+        self._timeout = timeout
+        self._ordered = ordered
+        self._acquire_timeout = acquire_timeout
+        self._options = options
+        self._done: SimpleQueue = SimpleQueue()
+        self._outcomes: List[QueryOutcome] = []
+        self._stopped = False
+        self._queries_error = None
+        self._num_taken = 0
+        self._elapsed = None
+
+        concurrency = min(concurrency, driver._pool.max_size())
+        self._start_time = perf_counter()
+        self._workers = [
+            Thread(target=self._work, name=f"millenniumdb-fan-out-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._iter = self._iter_outcomes()
+
+    def __iter__(self) -> Iterator[QueryOutcome]:
+        return self._iter
+
+    def outcomes(self) -> List[QueryOutcome]:
+        """
+        Wait for all the queries and get their outcomes in the order of the queries
+        """
+        for _ in self._iter:
+            pass
+        return sorted(self._outcomes, key=lambda outcome: outcome.index)
+
+    def results(self) -> List[Union[Result, ResultError]]:
+        """
+        Wait for all the queries and get their results in the order of the
+        queries, with the error of each failed query in place of its result
+        """
+        return [
+            outcome.result if outcome.error is None else outcome.error
+            for outcome in self.outcomes()
+        ]
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the totals and the latencies of the queries finished so far
+
+        :return: A dictionary with the number of queries and failed queries,
+            the number of workers, the wall seconds since the start (until
+            the last query finished once all have), the queries per second,
+            and the mean, median, 99th percentile and maximum seconds of
+            each query
+        """
+        latencies = sorted(outcome.latency for outcome in self._outcomes)
+        elapsed = (
+            self._elapsed
+            if self._elapsed is not None
+            else perf_counter() - self._start_time
+        )
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "queries": len(latencies),
+            "failed_queries": sum(
+                1 for outcome in self._outcomes if outcome.error is not None
+            ),
+            "concurrency": len(self._workers),
+            "elapsed": elapsed,
+            "queries_per_second": len(latencies) / elapsed if elapsed > 0.0 else 0.0,
+            "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50_latency": percentile(0.5),
+            "p99_latency": percentile(0.99),
+            "max_latency": latencies[-1] if latencies else 0.0,
+        }
+
+    def close(self) -> None:
+        """
+        Stop running the queries not taken by a worker yet and wait for the
+        running ones
+        """
+        self._stopped = True
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def _iter_outcomes(self) -> Iterator[QueryOutcome]:
+        """
+        Yield the outcomes as they are put by the workers, holding back the
+        ones that finished before an earlier query if they are ordered
+        """
+        pending: Dict[int, QueryOutcome] = {}
+        next_index = 0
+        num_running = len(self._workers)
+        try:
+            while num_running > 0:
+                outcome = self._done.get()
+                if outcome is _WORKER_DONE:
+                    num_running -= 1
+                    continue
+                self._outcomes.append(outcome)
+                if not self._ordered:
+                    yield outcome
+                    continue
+                pending[outcome.index] = outcome
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+            self._elapsed = perf_counter() - self._start_time
+            if len(self._outcomes) < self._num_taken:
+                raise MillenniumDBError(
+                    f"FanOut Error: {self._num_taken - len(self._outcomes)} queries"
+                    " were taken by a worker that stopped before their outcome"
+                )
+            if self._queries_error is not None:
+                raise MillenniumDBError(
+                    "FanOut Error: could not read the queries"
+                ) from self._queries_error
+        finally:
+            self.close()
+
+    def _next_query(self):
+        """
+        Take the next query and its position, None if there are no more
+        """
+        with self._queries_lock:
+            if self._stopped:
+                return None
+            try:
+                item = next(self._queries, None)
+            except Exception as e:
+                # Raised by the iterable of the queries, the workers stop and
+                # the error is raised to the caller once they finish
+                self._stopped = True
+                self._queries_error = e
+                return None
+            if item is not None:
+                self._num_taken += 1
+            return item
+
+    def _work(self) -> None:
+        """
+        Run queries on a session of the worker until there are no more. The
+        error of a query is kept in its outcome, and a session whose query
+        failed other than on the server is replaced for the next query
+        """
+        session = None
+        try:
+            while True:
+                item = self._next_query()
+                if item is None:
+                    break
+
+                outcome = QueryOutcome(*item)
+                start = perf_counter()
+                try:
+                    if session is None:
+                        session = self._driver.session(self._acquire_timeout)
+                    outcome.result = session.run(
+                        outcome.query, self._timeout, **self._options
+                    )
+                    # The result is read after its session is closed, so its
+                    # records out of memory are deleted with the result instead
+                    session._results.discard(outcome.result)
+                except ResultError as e:
+                    outcome.error = e
+                except Exception as e:
+                    # The connection may be in the middle of a response
+                    outcome.error = e
+                    if session is not None:
+                        session.close()
+                        session = None
+                outcome.latency = perf_counter() - start
+                self._done.put(outcome)
+        finally:
+            if session is not None:
+                session.close()
+            self._done.put(_WORKER_DONE)
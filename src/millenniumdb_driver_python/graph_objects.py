@@ -1,4 +1,6 @@
-from typing import List
+from array import array
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
 
 
 class GraphNode:
@@ -6,6 +8,8 @@ class GraphNode:
     Represents a node in the graph
     """
 
+    __slots__ = ("id",)
+
     def __init__(self, id: str):
         """
         attributes:
@@ -19,12 +23,26 @@ class GraphNode:
     def __repr__(self) -> str:
         return f"GraphNode<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GraphNode):
+            return NotImplemented
+        return self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __reduce__(self) -> tuple:
+        # Much faster to pickle than the default for __slots__ classes
+        return (GraphNode, (self.id,))
+
 
 class GraphEdge:
     """
     Represents an edge in the graph
     """
 
+    __slots__ = ("id",)
+
     def __init__(self, id: str):
         """
         attributes:
@@ -38,12 +56,25 @@ class GraphEdge:
     def __repr__(self) -> str:
         return f"GraphEdge<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GraphEdge):
+            return NotImplemented
+        return self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __reduce__(self) -> tuple:
+        return (GraphEdge, (self.id,))
+
 
 class GraphAnon:
     """
     Represents an anonymous node in the graph
     """
 
+    __slots__ = ("id",)
+
     def __init__(self, id: str):
         """
         attributes:
@@ -57,8 +88,21 @@ class GraphAnon:
     def __repr__(self) -> str:
         return f"GraphAnon<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GraphAnon):
+            return NotImplemented
+        return self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __reduce__(self) -> tuple:
+        return (GraphAnon, (self.id,))
+
 
 class SimpleDate:
+    __slots__ = ("year", "month", "day", "tzMinuteOffset")
+
     def __init__(self, year: int, month: int, day: int, tzMinuteOffset: int):
         self.year = year
         self.month = month
@@ -83,8 +127,24 @@ class SimpleDate:
     def __repr__(self) -> str:
         return f"SimpleDate<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SimpleDate):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __reduce__(self) -> tuple:
+        return (SimpleDate, (self.year, self.month, self.day, self.tzMinuteOffset))
+
+    def _key(self) -> tuple:
+        return (self.year, self.month, self.day, self.tzMinuteOffset)
+
 
 class Time:
+    __slots__ = ("hour", "minute", "second", "tzMinuteOffset")
+
     def __init__(self, hour: int, minute: int, second: int, tzMinuteOffset: int):
         self.hour = hour
         self.minute = minute
@@ -109,8 +169,24 @@ class Time:
     def __repr__(self) -> str:
         return f"Time<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Time):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __reduce__(self) -> tuple:
+        return (Time, (self.hour, self.minute, self.second, self.tzMinuteOffset))
+
+    def _key(self) -> tuple:
+        return (self.hour, self.minute, self.second, self.tzMinuteOffset)
+
 
 class DateTime:
+    __slots__ = ("year", "month", "day", "hour", "minute", "second", "tzMinuteOffset")
+
     def __init__(
         self,
         year: int,
@@ -150,12 +226,36 @@ class DateTime:
     def __repr__(self) -> str:
         return f"DateTime<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DateTime):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __reduce__(self) -> tuple:
+        return (DateTime, self._key())
+
+    def _key(self) -> tuple:
+        return (
+            self.year,
+            self.month,
+            self.day,
+            self.hour,
+            self.minute,
+            self.second,
+            self.tzMinuteOffset,
+        )
+
 
 class GraphPathSegment:
     """
     Represents a segment in the path
     """
 
+    __slots__ = ("from_", "to", "type", "reverse")
+
     def __init__(self, from_: object, to: object, type: object, reverse: bool) -> None:
         """
         attributes:
@@ -172,12 +272,38 @@ class GraphPathSegment:
         # as `(to)<-[type]-(from)` instead of `(from)-[type]->(to)`
         self.reverse = reverse
 
+    def __repr__(self) -> str:
+        if self.reverse:
+            return f"GraphPathSegment<({self.to})<-[{self.type}]-({self.from_})>"
+        return f"GraphPathSegment<({self.from_})-[{self.type}]->({self.to})>"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GraphPathSegment):
+            return NotImplemented
+        return (
+            self.from_ == other.from_
+            and self.to == other.to
+            and self.type == other.type
+            and bool(self.reverse) == bool(other.reverse)
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.from_, self.to, self.type, bool(self.reverse)))
+
 
 class GraphPath:
     """
-    Represents a path in the graph
+    Represents a path in the graph.
+
+    The path is stored as flat sequences: its nodes, the type of each
+    segment and the direction of each segment, so each node is kept once
+    even though it ends a segment and starts the next one. The
+    GraphPathSegment objects are only created when the segments are first
+    read, and kept afterwards
     """
 
+    __slots__ = ("_nodes", "_types", "_reverse", "_segments")
+
     def __init__(
         self,
         start: object,
@@ -185,25 +311,181 @@ class GraphPath:
         segments: List[GraphPathSegment],
     ) -> None:
         """
+        Build a path from its starting and ending nodes and its segments, the
+        end is the node that ends the last segment. The decoded paths are
+        built with from_flat instead
+
         attributes:
-        start (object): The starting node of the path
-        end (object): The ending node of the path
-        segments (List[GraphPathSegment]): The segments of the path
-        length (int): The number of segments in the path
+        _nodes (Tuple[object]): The nodes of the path, one more than its segments
+        _types (Tuple[object]): The type of each segment
+        _reverse (bytes): 1 for each segment in reverse direction, 0 otherwise
+        _segments (List[GraphPathSegment] or None): The segments, once read
+        """
+        segments = list(segments)
+        nodes = [start]
+        types = []
+        reverse = bytearray()
+        for segment in segments:
+            nodes.append(segment.to)
+            types.append(segment.type)
+            reverse.append(1 if segment.reverse else 0)
+        self._nodes = tuple(nodes)
+        self._types = tuple(types)
+        self._reverse = bytes(reverse)
+        self._segments = segments
+
+    @classmethod
+    def from_flat(
+        cls,
+        nodes: Sequence[object],
+        types: Sequence[object],
+        reverse: bytes,
+    ) -> "GraphPath":
+        """
+        Build a path from its nodes, the type of each segment and the direction
+        of each segment, 1 if it is in reverse direction and 0 otherwise
+        """
+        path = cls.__new__(cls)
+        path._nodes = tuple(nodes)
+        path._types = tuple(types)
+        path._reverse = bytes(reverse)
+        path._segments = None
+        return path
+
+    @classmethod
+    def from_segments(
+        cls, start: object, segments: Iterable[GraphPathSegment]
+    ) -> "GraphPath":
+        """
+        Build a path from its starting node and its segments
         """
-        self.start = start
-        self.end = end
-        self.segments = segments
-        self.length = len(segments)
+        segments = list(segments)
+        return cls(start, segments[-1].to if segments else start, segments)
+
+    @property
+    def start(self) -> object:
+        return self._nodes[0]
+
+    @property
+    def end(self) -> object:
+        return self._nodes[-1]
+
+    @property
+    def length(self) -> int:
+        return len(self._types)
+
+    @property
+    def segments(self) -> List[GraphPathSegment]:
+        """
+        The segments of the path, created on the first access
+        """
+        if self._segments is None:
+            self._segments = list(self.iter_segments())
+        return self._segments
+
+    def iter_segments(self) -> Iterator[GraphPathSegment]:
+        """
+        Iterate over the segments of the path, creating each one when it is
+        reached unless they have been created already
+        """
+        if self._segments is not None:
+            yield from self._segments
+            return
+        nodes = self._nodes
+        for i, (type_, reverse) in enumerate(zip(self._types, self._reverse)):
+            yield GraphPathSegment(nodes[i], nodes[i + 1], type_, reverse == 1)
+
+    def nodes(self) -> Tuple[object]:
+        """
+        Get the nodes of the path in order, from start to end
+        """
+        return self._nodes
+
+    def edges(self) -> Tuple[object]:
+        """
+        Get the type of each segment of the path in order
+        """
+        return self._types
+
+    def reverse_flags(self) -> bytes:
+        """
+        Get the direction of each segment of the path, 1 if it is in reverse
+        direction and 0 otherwise
+        """
+        return self._reverse
 
     def __repr__(self) -> str:
         return f"GraphPath<length={self.length}>"
 
     def __len__(self) -> int:
-        return self.length
+        return len(self._types)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GraphPath):
+            return NotImplemented
+        return (
+            self._nodes == other._nodes
+            and self._types == other._types
+            and self._reverse == other._reverse
+        )
+
+    def __hash__(self) -> int:
+        return hash((self._nodes, self._types, self._reverse))
+
+    def __reduce__(self) -> tuple:
+        return (GraphPath.from_flat, (self._nodes, self._types, self._reverse))
+
+
+def paths_to_edge_list(paths: Iterable[GraphPath]) -> Dict[str, "ndarray"]:
+    """
+    Export the segments of many paths as an edge list, one row per segment,
+    without creating the GraphPathSegment objects. None values are skipped,
+    so a column of a result can be exported directly
+
+    :param paths: The paths, for example result.to_numpy()[variable]
+    :return: A dictionary of NumPy arrays with the position of the path of
+        each segment ("path"), its position in the path ("step"), its
+        starting and ending nodes ("from", "to"), its type ("type") and its
+        direction ("reverse")
+    """
+    import numpy
+
+    path_index = array("q")
+    steps = array("q")
+    from_nodes = []
+    to_nodes = []
+    types = []
+    reverse = bytearray()
+    for i, path in enumerate(paths):
+        if path is None:
+            continue
+        length = len(path._types)
+        path_index.extend(repeat(i, length))
+        steps.extend(range(length))
+        from_nodes.extend(path._nodes[:-1])
+        to_nodes.extend(path._nodes[1:])
+        types.extend(path._types)
+        reverse += path._reverse
+
+    def objects(values: list) -> "ndarray":
+        # Filled by position so the graph objects are not unpacked by NumPy
+        res = numpy.empty(len(values), dtype=object)
+        res[:] = values
+        return res
+
+    return {
+        "path": numpy.frombuffer(path_index, dtype=numpy.int64),
+        "step": numpy.frombuffer(steps, dtype=numpy.int64),
+        "from": objects(from_nodes),
+        "to": objects(to_nodes),
+        "type": objects(types),
+        "reverse": numpy.frombuffer(bytes(reverse), dtype=numpy.bool_),
+    }
 
 
 class IRI:
+    __slots__ = ("iri",)
+
     def __init__(self, iri: str):
         self.iri = iri
 
@@ -213,8 +495,21 @@ class IRI:
     def __repr__(self):
         return f"IRI<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IRI):
+            return NotImplemented
+        return self.iri == other.iri
+
+    def __hash__(self) -> int:
+        return hash(self.iri)
+
+    def __reduce__(self) -> tuple:
+        return (IRI, (self.iri,))
+
 
 class StringLang:
+    __slots__ = ("str", "lang")
+
     def __init__(self, str: str, lang: str):
         self.str = str
         self.lang = lang
@@ -225,14 +520,39 @@ class StringLang:
     def __repr__(self):
         return f"StringLang<{str(self)}>"
 
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StringLang):
+            return NotImplemented
+        return self.str == other.str and self.lang == other.lang
+
+    def __hash__(self) -> int:
+        return hash((self.str, self.lang))
+
+    def __reduce__(self) -> tuple:
+        return (StringLang, (self.str, self.lang))
+
 
 class StringDatatype:
-    def __init__(self, str: str, datatype: str):
+    __slots__ = ("str", "datatype")
+
+    def __init__(self, str: str, datatype: Union[str, IRI]):
         self.str = str
-        self.datatype = IRI(datatype)
+        # The datatype may be an IRI shared by many values
+        self.datatype = datatype if isinstance(datatype, IRI) else IRI(datatype)
 
     def __str__(self):
         return f'"{self.str}"^^<{str(self.datatype)}>'
 
     def __repr__(self):
         return f"StringDatatype<{str(self)}>"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StringDatatype):
+            return NotImplemented
+        return self.str == other.str and self.datatype == other.datatype
+
+    def __hash__(self) -> int:
+        return hash((self.str, self.datatype))
+
+    def __reduce__(self) -> tuple:
+        return (StringDatatype, (self.str, self.datatype))
@@ -0,0 +1,71 @@
+from threading import Lock
+from typing import Dict
+
+from .graph_objects import IRI, GraphAnon, GraphEdge, GraphNode
+
+
+class InternPool:
+    """
+    A pool of shared graph objects, so the same node, edge, anonymous node or
+    IRI repeated across a result is decoded to a single instance.
+
+    The objects are keyed by their UTF-8 encoded identifier, so a repeated
+    identifier is not decoded again. The pool is cleared when it reaches
+    its maximum size, bounding its memory.
+
+    The pool of a driver is shared by the threads of its sessions, so the
+    objects are created and the pool is cleared under a lock. A lookup of an
+    existing object is a single dictionary read and does not take it
+    """
+
+    DEFAULT_MAX_SIZE = 1_000_000
+
+    # The classes that can be interned
+    CLASSES = (GraphNode, GraphEdge, GraphAnon, IRI)
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        attributes:
+        _max_size (int): The maximum number of objects of each class
+        _objects (Dict[type, Dict[bytes, object]]): The shared objects of each
+            class, by identifier
+        _lock (Lock): Guards the creation of objects and the clearing of the pool
+        """
+        self._max_size = max_size
+        self._objects: Dict[type, Dict[bytes, object]] = {
+            cls: {} for cls in InternPool.CLASSES
+        }
+        self._lock = Lock()
+
+    def get(self, cls: type, identifier: bytes) -> object:
+        """
+        Get the shared object of a class for an encoded identifier,
+        creating it if it does not exist
+
+        :param cls: One of the classes in InternPool.CLASSES
+        :param identifier: The UTF-8 encoded identifier of the object
+        :return: The shared object
+        """
+        objects = self._objects[cls]
+        res = objects.get(identifier)
+        if res is None:
+            with self._lock:
+                # Another thread may have created it while this one waited
+                res = objects.get(identifier)
+                if res is None:
+                    if len(objects) >= self._max_size:
+                        objects.clear()
+                    res = cls(str(identifier, "utf-8"))
+                    objects[identifier] = res
+        return res
+
+    def clear(self) -> None:
+        """
+        Remove all the shared objects
+        """
+        with self._lock:
+            for objects in self._objects.values():
+                objects.clear()
+
+    def __len__(self) -> int:
+        return sum(len(objects) for objects in self._objects.values())
@@ -8,7 +8,19 @@ class IOBuffer:
 
     DEFAULT_INITIAL_BUFFER_SIZE = 4096
 
-    def __init__(self, initial_buffer_size: int = DEFAULT_INITIAL_BUFFER_SIZE):
+    def __init__(
+        self,
+        initial_buffer_size: int = DEFAULT_INITIAL_BUFFER_SIZE,
+        max_retained_size: int = None,
+    ):
+        """
+        attributes:
+        _initial_buffer_size (int): The size the buffer shrinks back to
+        _max_retained_size (int or None): The maximum size kept by reset, a larger
+            buffer shrinks back to its initial size. None never shrinks the buffer
+        """
+        self._initial_buffer_size = initial_buffer_size
+        self._max_retained_size = max_retained_size
         # Data itself. Should not be manipulated appart from extend method
         self._buffer = bytearray(initial_buffer_size)
         self._current_read_position = 0
@@ -17,16 +29,36 @@ class IOBuffer:
         self.num_used_bytes = 0
 
     def extend(self, num_bytes: int) -> None:
-        self._buffer += bytearray(num_bytes)
-        self.view = memoryview(self._buffer)
+        """
+        Grow the buffer by at least num_bytes, at least doubling its size so
+        the cost of copying the used bytes is amortized
+        """
+        new_size = max(2 * len(self._buffer), len(self._buffer) + num_bytes)
+        self._resize(new_size)
+
+    def reserve(self, num_bytes: int) -> None:
+        """
+        Make room for writing num_bytes after the used bytes
+        """
+        num_missing_bytes = self.num_used_bytes + num_bytes - len(self._buffer)
+        if num_missing_bytes > 0:
+            self.extend(num_missing_bytes)
 
     def reset(self) -> None:
         self.num_used_bytes = 0
         self._current_read_position = 0
+        if (
+            self._max_retained_size is not None
+            and len(self._buffer) > self._max_retained_size
+        ):
+            self._resize(self._initial_buffer_size)
 
     def __len__(self):
         return len(self._buffer)
 
+    def peek_uint8(self) -> int:
+        return self.view[self._current_read_position]
+
     def read_uint8(self) -> int:
         return self.view[self._update_current_read_position(1)]
 
@@ -72,6 +104,13 @@ class IOBuffer:
         self.num_used_bytes -= 2
         return res
 
+    def _resize(self, new_size: int) -> None:
+        buffer = bytearray(new_size)
+        num_copied_bytes = min(self.num_used_bytes, new_size)
+        buffer[:num_copied_bytes] = self.view[:num_copied_bytes]
+        self._buffer = buffer
+        self.view = memoryview(self._buffer)
+
     def _update_current_read_position(self, num_bytes: int) -> int:
         previous_read_position = self._current_read_position
         self._current_read_position += num_bytes
@@ -0,0 +1,143 @@
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Callable, Iterator, List
+
+from .intern_pool import InternPool
+from .iobuffer import IOBuffer
+from .message_decoder import MessageDecoder
+
+
+class LazyRecords(Sequence):
+    """
+    The records of a result kept as the bytes of their RECORD messages, with
+    the position of each message. A record is decoded when it is read, and
+    the records read by index are kept in a LRU cache.
+
+    The memory used is close to the size of the response, instead of the
+    several times larger size of the decoded values
+    """
+
+    DEFAULT_CACHE_SIZE = 1024
+
+    def __init__(
+        self,
+        make_record: Callable[[List[object]], object],
+        intern_pool: InternPool = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        """
+        attributes:
+        _make_record (Callable[[List[object]], object]): Builds a record from
+            its decoded values
+        _intern_pool (InternPool or None): The pool of the shared graph objects
+        _cache_size (int): The maximum number of decoded records kept
+        _data (bytearray): The bytes of the RECORD messages, one after another
+        _offsets (array): The position of each message in _data
+        _cache (OrderedDict[int, object]): The records read last, by index
+        _iobuffer (IOBuffer or None): Reads _data once all the records were
+            appended, as _data cannot grow while it is read
+        _decoder (MessageDecoder or None): Decodes the records read by index
+        """
+        self._make_record = make_record
+        self._intern_pool = intern_pool
+        self._cache_size = cache_size
+        self._data = bytearray()
+        self._offsets = array("Q")
+        self._cache = OrderedDict()
+        self._iobuffer = None
+        self._decoder = None
+
+    def append(self, message: memoryview) -> None:
+        """
+        Append the bytes of a RECORD message
+        """
+        self._offsets.append(len(self._data))
+        self._data += message
+
+    def finish(self) -> None:
+        """
+        Start reading the records once all of them have been appended
+        """
+        if self._iobuffer is not None:
+            return
+        self._iobuffer = IOBuffer(0)
+        self._iobuffer.view = memoryview(self._data)
+        self._iobuffer.num_used_bytes = len(self._data)
+        self._decoder = self._new_decoder(self._iobuffer)
+
+    def map(self, function: Callable[[object], object]) -> "MappedSequence":
+        """
+        Get the records converted by a function, that is called each time a
+        record is read
+        """
+        return MappedSequence(self, function)
+
+    def num_bytes(self) -> int:
+        """
+        Get the size of the kept messages and their positions
+        """
+        return len(self._data) + len(self._offsets) * self._offsets.itemsize
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[object]:
+        # The records are decoded one after another, without the cache
+        iobuffer = IOBuffer(0)
+        iobuffer.view = self._iobuffer.view
+        iobuffer.num_used_bytes = len(self._data)
+        decoder = self._new_decoder(iobuffer)
+        make_record = self._make_record
+        for _ in range(len(self._offsets)):
+            yield make_record(decoder.decode()["payload"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+
+        cache = self._cache
+        record = cache.get(index)
+        if record is not None:
+            cache.move_to_end(index)
+            return record
+
+        self._iobuffer._current_read_position = self._offsets[index]
+        record = self._make_record(self._decoder.decode()["payload"])
+        cache[index] = record
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+        return record
+
+    def __repr__(self) -> str:
+        return f"LazyRecords<{len(self)} records, {self.num_bytes()} bytes>"
+
+    def _new_decoder(self, iobuffer: IOBuffer) -> MessageDecoder:
+        decoder = MessageDecoder(iobuffer)
+        decoder.set_intern_pool(self._intern_pool)
+        return decoder
+
+
+class MappedSequence(Sequence):
+    """
+    A sequence whose items are converted by a function each time they are read
+    """
+
+    def __init__(self, items: Sequence, function: Callable[[object], object]):
+        self._items = items
+        self._function = function
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[object]:
+        return map(self._function, self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._function(item) for item in self._items[index]]
+        return self._function(self._items[index])
@@ -0,0 +1,376 @@
+from itertools import count
+from threading import Lock, Thread
+from time import monotonic
+from typing import Dict, List, Sequence, Tuple
+
+from .catalog import Catalog
+from .connection_pool import ConnectionPool
+from .message_receiver import MessageReceiver
+from .millenniumdb_error import MillenniumDBError
+from .query_stats import QueryHooks, QueryStats
+from .response_handler import ResponseHandler
+from .socket_connection import SocketConnection
+
+
+class HostPool(ConnectionPool):
+    """
+    The connection pool of one host of a LoadBalancer, with the health and
+    the latency of the host. A connection that cannot be opened ejects the
+    host instead of failing the driver, as do too many queries in a row that
+    fail on the host
+    """
+
+    def __init__(
+        self,
+        balancer: "LoadBalancer",
+        host: str,
+        port: int,
+        min_size: int = ConnectionPool.DEFAULT_MIN_SIZE,
+        max_size: int = ConnectionPool.DEFAULT_MAX_SIZE,
+        idle_timeout: float = ConnectionPool.DEFAULT_IDLE_TIMEOUT,
+        acquire_timeout: float = ConnectionPool.DEFAULT_ACQUIRE_TIMEOUT,
+        read_ahead_size: int = SocketConnection.DEFAULT_READ_AHEAD_SIZE,
+    ):
+        """
+        attributes:
+        address (str): The host and port, as host:port
+        healthy (bool): Whether the host gets new sessions
+        retry_at (float): The monotonic time when an ejected host is probed
+        probing (bool): Whether the host is being probed
+        requests (int): The number of queries started on the host
+        errors (int): The number of queries that failed on the host
+        consecutive_errors (int): The number of queries that failed on the
+            host since the last one that succeeded
+        failures (int): The number of connections and probes that failed
+        ejections (int): The number of times the host was ejected
+        latency (float or None): The moving average of the seconds until the
+            variables of a query arrive, None until a query has finished
+        _balancer (LoadBalancer): The load balancer the pool belongs to
+        """
+        self.address = f"{host}:{port}"
+        self.healthy = True
+        self.retry_at = 0.0
+        self.probing = False
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.failures = 0
+        self.ejections = 0
+        self.latency = None
+        self._balancer = balancer
+        super().__init__(
+            host, port, 0, max_size, idle_timeout, acquire_timeout, read_ahead_size
+        )
+        self._min_size = min_size
+        try:
+            for _ in range(min_size):
+                self._idle.append((self._connect(), monotonic()))
+                self._size += 1
+        except MillenniumDBError:
+            # The host was ejected, it is probed again later
+            pass
+
+    def in_flight(self) -> int:
+        """
+        The number of connections lent to sessions, the outstanding requests
+        of the host
+        """
+        return self._size - len(self._idle)
+
+    def _connect(self) -> SocketConnection:
+        try:
+            connection = super()._connect()
+        except Exception:
+            self._balancer._eject(self)
+            raise
+        if not self.healthy:
+            # Tried while every host was ejected
+            self._balancer._restore(self)
+        return connection
+
+
+class LoadBalancer(QueryHooks):
+    """
+    Spreads the sessions of a driver over several servers holding the same
+    data, for example read replicas, with a connection pool for each one.
+
+    Each new session goes to the host with the fewest sessions in use, or
+    with the lowest moving average of its latency weighted by its sessions
+    in use. Ties are broken in turn, so idle hosts share the load.
+
+    A host whose connection cannot be opened, or whose last eject_errors
+    queries failed or timed out, is ejected, and probed with a CATALOG
+    request once its eject time has passed. If every host is
+    ejected, all of them are tried rather than failing until a probe succeeds
+    """
+
+    STRATEGIES = ("least_outstanding", "ewma")
+
+    DEFAULT_STRATEGY = "least_outstanding"
+    DEFAULT_EJECT_TIME = 10.0
+    DEFAULT_EJECT_ERRORS = 5
+
+    # The weight of each new latency in the moving average of a host
+    EWMA_WEIGHT = 0.3
+
+    def __init__(
+        self,
+        addresses: Sequence[Tuple[str, int]],
+        strategy: str = DEFAULT_STRATEGY,
+        eject_time: float = DEFAULT_EJECT_TIME,
+        eject_errors: int = DEFAULT_EJECT_ERRORS,
+        min_size: int = ConnectionPool.DEFAULT_MIN_SIZE,
+        max_size: int = ConnectionPool.DEFAULT_MAX_SIZE,
+        idle_timeout: float = ConnectionPool.DEFAULT_IDLE_TIMEOUT,
+        acquire_timeout: float = ConnectionPool.DEFAULT_ACQUIRE_TIMEOUT,
+        read_ahead_size: int = SocketConnection.DEFAULT_READ_AHEAD_SIZE,
+    ):
+        """
+        attributes:
+        _strategy (str): One of STRATEGIES
+        _eject_time (float): Seconds until an ejected host is probed again
+        _eject_errors (int): The number of queries in a row that fail on a
+            host after which it is ejected, 0 does not eject on query errors
+        _pools (List[HostPool]): The pool of each host, min_size and max_size
+            apply to each one
+        _by_address (Dict[str, HostPool]): The pools by host:port
+        _turn (count): Rotates the hosts that are tried first on a tie
+        _lock (Lock): Guards the health and the counters of the hosts
+        """
+        # A host given twice would have two pools for the same connections
+        addresses = list(dict.fromkeys(addresses))
+        if len(addresses) == 0:
+            raise MillenniumDBError("LoadBalancer Error: there are no hosts")
+        if strategy not in LoadBalancer.STRATEGIES:
+            raise MillenniumDBError(
+                "LoadBalancer Error: strategy must be one of "
+                f"{', '.join(LoadBalancer.STRATEGIES)}"
+            )
+        if eject_errors < 0:
+            raise MillenniumDBError(
+                "LoadBalancer Error: eject_errors cannot be negative"
+            )
+
+        self._strategy = strategy
+        self._eject_time = eject_time
+        self._eject_errors = eject_errors
+        self._turn = count()
+        self._open = True
+        self._lock = Lock()
+        self._pools: List[HostPool] = []
+        self._by_address: Dict[str, HostPool] = {}
+        try:
+            for host, port in addresses:
+                pool = HostPool(
+                    self,
+                    host,
+                    port,
+                    min_size,
+                    max_size,
+                    idle_timeout,
+                    acquire_timeout,
+                    read_ahead_size,
+                )
+                self._pools.append(pool)
+                self._by_address[pool.address] = pool
+        except Exception:
+            self.close()
+            raise
+
+    def acquire(self, timeout: float = None) -> SocketConnection:
+        """
+        Get a connection to the host chosen by the strategy, trying the next
+        one if the host cannot be connected to
+
+        :param timeout: Seconds to wait for a connection when all the
+            connections of the chosen host are in use
+        :return: A handshaken connection
+        """
+        error = None
+        for pool in self._candidates():
+            try:
+                return pool.acquire(timeout)
+            except MillenniumDBError as e:
+                if pool.healthy:
+                    # Timed out or closed, the host itself did not fail
+                    raise
+                error = e
+        raise MillenniumDBError(
+            "LoadBalancer Error: could not connect to any host"
+        ) from error
+
+    def release(self, connection: SocketConnection) -> None:
+        """
+        Return a connection to the pool of its host
+        """
+        self._by_address[connection.address].release(connection)
+
+    def discard(self, connection: SocketConnection) -> None:
+        """
+        Close a connection that must not be reused, freeing its slot in the
+        pool of its host
+        """
+        self._by_address[connection.address].discard(connection)
+
+    def max_size(self) -> int:
+        """
+        The maximum number of connections of all the hosts together
+        """
+        return sum(pool.max_size() for pool in self._pools)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the pools of all the hosts added together
+        """
+        res = {}
+        for pool in self._pools:
+            for name, value in pool.stats().items():
+                res[name] = res.get(name, 0) + value
+        return res
+
+    def host_stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Get the health and the counters of each host
+
+        :return: A dictionary by host:port with whether the host is healthy,
+            its queries started and failed, its sessions in use, the moving
+            average of its latency in seconds, and its failed connections and
+            probes and ejections
+        """
+        with self._lock:
+            return {
+                pool.address: {
+                    "healthy": pool.healthy,
+                    "requests": pool.requests,
+                    "errors": pool.errors,
+                    "in_flight": pool.in_flight(),
+                    "latency": pool.latency if pool.latency is not None else 0.0,
+                    "failures": pool.failures,
+                    "ejections": pool.ejections,
+                }
+                for pool in self._pools
+            }
+
+    def close(self) -> None:
+        """
+        Close the pools of all the hosts
+        """
+        with self._lock:
+            self._open = False
+        for pool in self._pools:
+            pool.close()
+
+    def on_query_start(self, stats: QueryStats) -> None:
+        pool = self._by_address.get(stats.host)
+        if pool is not None:
+            with self._lock:
+                pool.requests += 1
+
+    def on_query_end(self, stats: QueryStats) -> None:
+        pool = self._by_address.get(stats.host)
+        if pool is None:
+            return
+        # Without the time spent behind the earlier pipelined queries
+        if stats.time_to_variables is not None:
+            latency = stats.time_to_variables - stats.time_to_receive
+        else:
+            latency = stats.total_time - stats.time_to_receive
+        with self._lock:
+            if pool.latency is None:
+                pool.latency = latency
+            else:
+                pool.latency += LoadBalancer.EWMA_WEIGHT * (latency - pool.latency)
+
+            # A failed query includes one cancelled after its timeout
+            if stats.error is None:
+                pool.consecutive_errors = 0
+                return
+            pool.consecutive_errors += 1
+            if 0 < self._eject_errors <= pool.consecutive_errors:
+                self._set_ejected(pool)
+
+    def on_error(self, stats: QueryStats, error: Exception) -> None:
+        pool = self._by_address.get(stats.host)
+        if pool is not None:
+            with self._lock:
+                pool.errors += 1
+
+    def _candidates(self) -> List[HostPool]:
+        """
+        Get the hosts to try in order, starting the probes of the ejected
+        hosts whose eject time has passed
+        """
+        now = monotonic()
+        with self._lock:
+            if not self._open:
+                raise MillenniumDBError("LoadBalancer Error: load balancer is closed")
+            pools = []
+            for pool in self._pools:
+                if pool.healthy:
+                    pools.append(pool)
+                elif not pool.probing and now >= pool.retry_at:
+                    pool.probing = True
+                    Thread(
+                        target=self._probe,
+                        args=[pool],
+                        name="millenniumdb-probe",
+                        daemon=True,
+                    ).start()
+            if not pools:
+                pools = list(self._pools)
+            turn = next(self._turn) % len(pools)
+
+        # The sort is stable, so the hosts of a tie keep their turns
+        pools = pools[turn:] + pools[:turn]
+        if self._strategy == "ewma":
+            return sorted(
+                pools,
+                key=lambda pool: (pool.latency or 0.0) * (pool.in_flight() + 1),
+            )
+        return sorted(pools, key=HostPool.in_flight)
+
+    def _eject(self, pool: HostPool) -> None:
+        """
+        Stop giving sessions to a host that could not be connected to
+        """
+        with self._lock:
+            pool.failures += 1
+            self._set_ejected(pool)
+
+    def _set_ejected(self, pool: HostPool) -> None:
+        """
+        Eject a host until it is probed, the lock must be held
+        """
+        if pool.healthy:
+            pool.healthy = False
+            pool.ejections += 1
+            pool.retry_at = monotonic() + self._eject_time
+
+    def _probe(self, pool: HostPool) -> None:
+        """
+        Get the catalog of an ejected host through a new connection, the
+        host gets sessions again if it answers
+        """
+        try:
+            connection = SocketConnection(pool._host, pool._port, 0)
+            try:
+                Catalog(connection, MessageReceiver(connection), ResponseHandler())
+            finally:
+                connection.close()
+        except (MillenniumDBError, OSError):
+            with self._lock:
+                pool.failures += 1
+                pool.probing = False
+                pool.retry_at = monotonic() + self._eject_time
+            return
+
+        self._restore(pool)
+
+    def _restore(self, pool: HostPool) -> None:
+        """
+        Give sessions again to a host that answered
+        """
+        with self._lock:
+            pool.probing = False
+            pool.healthy = True
+            pool.consecutive_errors = 0
@@ -1,5 +1,6 @@
 from decimal import Decimal
-from typing import Dict, List
+from struct import Struct
+from typing import Callable, List, Tuple
 
 from . import protocol
 from .graph_objects import (
@@ -9,160 +10,298 @@ from .graph_objects import (
     GraphEdge,
     GraphNode,
     GraphPath,
-    GraphPathSegment,
     SimpleDate,
     StringDatatype,
     StringLang,
     Time,
 )
+from .intern_pool import InternPool
 from .iobuffer import IOBuffer
-from .millenniumdb_error import MillenniumDBError
+
+# Precompiled big endian formats of the fixed width values
+_UINT16 = Struct(">H")
+_UINT32 = Struct(">I")
+_UINT64 = Struct(">Q")
+_INT64 = Struct(">q")
+_FLOAT = Struct(">f")
+_DOUBLE = Struct(">d")
+_DATE = Struct(">4q")
+_TIME = Struct(">4q")
+_DATETIME = Struct(">7q")
+
+# A scalar decoder receives the view and the position after the type byte,
+# and returns the decoded value and the position after it
+ScalarDecoder = Callable[[memoryview, int], Tuple[object, int]]
+
+
+def _decode_string(view: memoryview, pos: int) -> Tuple[str, int]:
+    (size,) = _UINT32.unpack_from(view, pos)
+    pos += 4
+    return str(view[pos : pos + size], "utf-8"), pos + size
+
+
+def _decode_null(view: memoryview, pos: int) -> Tuple[object, int]:
+    return None, pos
+
+
+def _decode_false(view: memoryview, pos: int) -> Tuple[bool, int]:
+    return False, pos
+
+
+def _decode_true(view: memoryview, pos: int) -> Tuple[bool, int]:
+    return True, pos
+
+
+def _decode_uint8(view: memoryview, pos: int) -> Tuple[int, int]:
+    return view[pos], pos + 1
+
+
+def _fixed_width_decoder(struct_: Struct) -> ScalarDecoder:
+    unpack_from = struct_.unpack_from
+    size = struct_.size
+
+    def decode(view: memoryview, pos: int) -> Tuple[object, int]:
+        return unpack_from(view, pos)[0], pos + size
+
+    return decode
+
+
+def _decode_decimal(view: memoryview, pos: int) -> Tuple[Decimal, int]:
+    decimal_string, pos = _decode_string(view, pos)
+    return Decimal(decimal_string), pos
+
+
+def _decode_string_lang(view: memoryview, pos: int) -> Tuple[StringLang, int]:
+    str_, pos = _decode_string(view, pos)
+    lang, pos = _decode_string(view, pos)
+    return StringLang(str_, lang), pos
+
+
+def _decode_string_datatype(view: memoryview, pos: int) -> Tuple[StringDatatype, int]:
+    str_, pos = _decode_string(view, pos)
+    datatype, pos = _decode_string(view, pos)
+    return StringDatatype(str_, datatype), pos
+
+
+def _string_decoder(cls: type) -> ScalarDecoder:
+    def decode(view: memoryview, pos: int) -> Tuple[object, int]:
+        string, pos = _decode_string(view, pos)
+        return cls(string), pos
+
+    return decode
+
+
+def _struct_decoder(struct_: Struct, cls: type) -> ScalarDecoder:
+    unpack_from = struct_.unpack_from
+    size = struct_.size
+
+    def decode(view: memoryview, pos: int) -> Tuple[object, int]:
+        return cls(*unpack_from(view, pos)), pos + size
+
+    return decode
+
+
+def _build_scalar_decoders() -> List[ScalarDecoder]:
+    """
+    Build the table of scalar decoders indexed by type byte. The entries of
+    the containers (LIST, MAP and PATH) and unknown types are None
+    """
+    decoders = [None] * 256
+    decoders[protocol.DataType.NULL] = _decode_null
+    decoders[protocol.DataType.BOOL_FALSE] = _decode_false
+    decoders[protocol.DataType.BOOL_TRUE] = _decode_true
+    decoders[protocol.DataType.UINT8] = _decode_uint8
+    decoders[protocol.DataType.UINT16] = _fixed_width_decoder(_UINT16)
+    decoders[protocol.DataType.UINT32] = _fixed_width_decoder(_UINT32)
+    decoders[protocol.DataType.UINT64] = _fixed_width_decoder(_UINT64)
+    decoders[protocol.DataType.INT64] = _fixed_width_decoder(_INT64)
+    decoders[protocol.DataType.FLOAT] = _fixed_width_decoder(_FLOAT)
+    decoders[protocol.DataType.DOUBLE] = _fixed_width_decoder(_DOUBLE)
+    decoders[protocol.DataType.DECIMAL] = _decode_decimal
+    decoders[protocol.DataType.STRING] = _decode_string
+    decoders[protocol.DataType.STRING_LANG] = _decode_string_lang
+    decoders[protocol.DataType.STRING_DATATYPE] = _decode_string_datatype
+    decoders[protocol.DataType.IRI] = _string_decoder(IRI)
+    decoders[protocol.DataType.NAMED_NODE] = _string_decoder(GraphNode)
+    decoders[protocol.DataType.EDGE] = _string_decoder(GraphEdge)
+    decoders[protocol.DataType.ANON] = _string_decoder(GraphAnon)
+    decoders[protocol.DataType.DATE] = _struct_decoder(_DATE, SimpleDate)
+    decoders[protocol.DataType.TIME] = _struct_decoder(_TIME, Time)
+    decoders[protocol.DataType.DATETIME] = _struct_decoder(_DATETIME, DateTime)
+    return decoders
+
+
+def _interned_decoder(intern_pool: InternPool, cls: type) -> ScalarDecoder:
+    get = intern_pool.get
+
+    def decode(view: memoryview, pos: int) -> Tuple[object, int]:
+        (size,) = _UINT32.unpack_from(view, pos)
+        pos += 4
+        return get(cls, bytes(view[pos : pos + size])), pos + size
+
+    return decode
+
+
+def _interned_string_datatype_decoder(intern_pool: InternPool) -> ScalarDecoder:
+    decode_iri = _interned_decoder(intern_pool, IRI)
+
+    def decode(view: memoryview, pos: int) -> Tuple[StringDatatype, int]:
+        str_, pos = _decode_string(view, pos)
+        datatype, pos = decode_iri(view, pos)
+        return StringDatatype(str_, datatype), pos
+
+    return decode
+
+
+def _build_interned_scalar_decoders(intern_pool: InternPool) -> List[ScalarDecoder]:
+    """
+    Build a table of scalar decoders that take the nodes, edges, anonymous
+    nodes, IRIs and datatype IRIs from the intern pool
+    """
+    decoders = list(MessageDecoder.SCALAR_DECODERS)
+    decoders[protocol.DataType.IRI] = _interned_decoder(intern_pool, IRI)
+    decoders[protocol.DataType.NAMED_NODE] = _interned_decoder(intern_pool, GraphNode)
+    decoders[protocol.DataType.EDGE] = _interned_decoder(intern_pool, GraphEdge)
+    decoders[protocol.DataType.ANON] = _interned_decoder(intern_pool, GraphAnon)
+    decoders[protocol.DataType.STRING_DATATYPE] = _interned_string_datatype_decoder(
+        intern_pool
+    )
+    return decoders
+
+
+# The kinds of the containers being decoded
+_LIST = protocol.DataType.LIST.value
+_MAP = protocol.DataType.MAP.value
+_PATH = protocol.DataType.PATH.value
+
+# The states of a path being decoded
+_PATH_START = 0
+_PATH_TYPE = 1
+_PATH_TO = 2
 
 
 class MessageDecoder:
     """
-    Represents the decoder of the incoming messages
+    Represents the decoder of the incoming messages.
+
+    The scalar values are decoded through a table indexed by their type byte.
+    The containers (LIST, MAP and PATH) are decoded with an explicit stack
+    instead of recursion, so deeply nested values do not exhaust the stack
     """
 
+    SCALAR_DECODERS: List[ScalarDecoder] = _build_scalar_decoders()
+
     def __init__(self, iobuffer: IOBuffer):
         """
         attributes:
         _iobuffer (IOBuffer): The IOBuffer of the incoming
+        _scalar_decoders (List[ScalarDecoder]): The scalar decoders by type byte
         """
         self._iobuffer = iobuffer
+        self._scalar_decoders = MessageDecoder.SCALAR_DECODERS
+
+    def set_intern_pool(self, intern_pool: InternPool) -> None:
+        """
+        Take the graph objects from an intern pool, or stop interning them if None
+        """
+        if intern_pool is None:
+            self._scalar_decoders = MessageDecoder.SCALAR_DECODERS
+        else:
+            self._scalar_decoders = _build_interned_scalar_decoders(intern_pool)
 
     def decode(self) -> object:
         """
         Decode the incoming message
         """
-        type_ = self._iobuffer.read_uint8()
-
-        match type_:
-
-            case protocol.DataType.NULL:
-                return None
-
-            case protocol.DataType.BOOL_FALSE:
-                return False
-
-            case protocol.DataType.BOOL_TRUE:
-                return True
-
-            case protocol.DataType.UINT8:
-                return self._iobuffer.read_uint8()
-
-            case protocol.DataType.UINT32:
-                return self._iobuffer.read_uint32()
-
-            case protocol.DataType.UINT64:
-                return self._iobuffer.read_uint64()
-
-            case protocol.DataType.INT64:
-                return self._iobuffer.read_int64()
-
-            case protocol.DataType.FLOAT:
-                return self._iobuffer.read_float()
-
-            case protocol.DataType.DOUBLE:
-                return self._iobuffer.read_double()
-
-            case protocol.DataType.DECIMAL:
-                decimal_string = self._decode_string()
-                return Decimal(decimal_string)
-
-            case protocol.DataType.STRING:
-                return self._decode_string()
-
-            case protocol.DataType.STRING_LANG:
-                str_ = self._decode_string()
-                lang = self._decode_string()
-                return StringLang(str_, lang)
-
-            case protocol.DataType.STRING_DATATYPE:
-                str_ = self._decode_string()
-                datatype = self._decode_string()
-                return StringDatatype(str_, datatype)
-
-            case protocol.DataType.IRI:
-                iri = self._decode_string()
-                return IRI(iri)
-
-            case protocol.DataType.LIST:
-                return self._decode_list()
-
-            case protocol.DataType.MAP:
-                return self._decode_map()
-
-            case protocol.DataType.NAMED_NODE:
-                node_id = self._decode_string()
-                return GraphNode(node_id)
-
-            case protocol.DataType.EDGE:
-                edge_id = self._decode_string()
-                return GraphEdge(edge_id)
-
-            case protocol.DataType.ANON:
-                anon_id = self._decode_string()
-                return GraphAnon(anon_id)
-
-            case protocol.DataType.DATE:
-                year = self._iobuffer.read_int64()
-                month = self._iobuffer.read_int64()
-                day = self._iobuffer.read_int64()
-                tz_minute_offset = self._iobuffer.read_int64()
-                return SimpleDate(year, month, day, tz_minute_offset)
-
-            case protocol.DataType.TIME:
-                hour = self._iobuffer.read_int64()
-                minute = self._iobuffer.read_int64()
-                second = self._iobuffer.read_int64()
-                tz_minute_offset = self._iobuffer.read_int64()
-                return Time(hour, minute, second, tz_minute_offset)
-
-            case protocol.DataType.DATETIME:
-                year = self._iobuffer.read_int64()
-                month = self._iobuffer.read_int64()
-                day = self._iobuffer.read_int64()
-                hour = self._iobuffer.read_int64()
-                minute = self._iobuffer.read_int64()
-                second = self._iobuffer.read_int64()
-                tz_minute_offset = self._iobuffer.read_int64()
-                return DateTime(
-                    year, month, day, hour, minute, second, tz_minute_offset
-                )
-
-            case protocol.DataType.PATH:
-                path_length = self._iobuffer.read_uint32()
-                if path_length == 0:
-                    node = self.decode()
-                    return GraphPath(node, node, [])
-                path_segments = []
-                from_ = self.decode()
-                start = from_
-                for _ in range(path_length):
-                    reverse = self._iobuffer.read_uint8() == protocol.DataType.BOOL_TRUE
-                    type_ = self.decode()
-                    to = self.decode()
-                    path_segments.append(GraphPathSegment(from_, to, type_, reverse))
-                    from_ = to
-                end = from_
-                return GraphPath(start, end, path_segments)
-
-            case _:
+        iobuffer = self._iobuffer
+        view = iobuffer.view
+        pos = iobuffer._current_read_position
+        scalar_decoders = self._scalar_decoders
+
+        # Each frame is a list [kind, container, remaining, ...] of a container
+        # whose values are being decoded
+        stack = []
+        while True:
+            type_ = view[pos]
+            pos += 1
+            scalar_decoder = scalar_decoders[type_]
+
+            if scalar_decoder is not None:
+                value, pos = scalar_decoder(view, pos)
+
+            elif type_ == _LIST:
+                (size,) = _UINT32.unpack_from(view, pos)
+                pos += 4
+                if size > 0:
+                    stack.append([_LIST, [], size])
+                    continue
+                value = []
+
+            elif type_ == _MAP:
+                (size,) = _UINT32.unpack_from(view, pos)
+                pos += 4
+                if size > 0:
+                    # [kind, map, remaining entries, key, has key]
+                    stack.append([_MAP, {}, size, None, False])
+                    continue
+                value = {}
+
+            elif type_ == _PATH:
+                (path_length,) = _UINT32.unpack_from(view, pos)
+                pos += 4
+                # [kind, nodes, remaining segments, state, types, reverse flags]
+                stack.append([_PATH, [], path_length, _PATH_START, [], bytearray()])
+                continue
+
+            else:
+                iobuffer._current_read_position = pos
                 raise NotImplementedError
 
-    def _decode_string(self) -> str:
-        size = self._iobuffer.read_uint32()
-        return self._iobuffer.read_string(size)
-
-    def _decode_list(self) -> List:
-        size = self._iobuffer.read_uint32()
-        return [self.decode() for _ in range(size)]
-
-    def _decode_map(self) -> Dict[str, object]:
-        size = self._iobuffer.read_uint32()
-        res = {}
-        for _ in range(size):
-            key = self.decode()
-            res[key] = self.decode()
-        return res
+            # Add the value to its containers, closing the completed ones
+            while stack:
+                frame = stack[-1]
+                kind = frame[0]
+
+                if kind == _LIST:
+                    frame[1].append(value)
+                    frame[2] -= 1
+                    if frame[2] > 0:
+                        break
+                    value = frame[1]
+
+                elif kind == _MAP:
+                    if not frame[4]:
+                        frame[3] = value
+                        frame[4] = True
+                        break
+                    frame[1][frame[3]] = value
+                    frame[4] = False
+                    frame[2] -= 1
+                    if frame[2] > 0:
+                        break
+                    value = frame[1]
+
+                else:
+                    state = frame[3]
+                    if state == _PATH_TYPE:
+                        frame[4].append(value)
+                        frame[3] = _PATH_TO
+                        break
+                    # The start node or the node that ends a segment
+                    frame[1].append(value)
+                    if state == _PATH_TO:
+                        frame[2] -= 1
+                    if frame[2] == 0:
+                        value = GraphPath.from_flat(frame[1], frame[4], frame[5])
+                        stack.pop()
+                        continue
+                    # The next segment starts with its direction as a raw byte
+                    frame[5].append(view[pos] == protocol.DataType.BOOL_TRUE)
+                    pos += 1
+                    frame[3] = _PATH_TYPE
+                    break
+
+                stack.pop()
+            else:
+                iobuffer._current_read_position = pos
+                return value
@@ -1,10 +1,31 @@
-from typing import Any, List, Tuple
+from struct import Struct
+from typing import Dict, Union
 
 from . import protocol
 from .chunk_decoder import ChunkDecoder
+from .column_builder import ColumnBuilder
+from .intern_pool import InternPool
 from .iobuffer import IOBuffer
+from .lazy_records import LazyRecords
 from .message_decoder import MessageDecoder
+from .parallel_decoder import RecordBatches
 from .socket_connection import SocketConnection
+from .spill_file import SpillFile
+
+# The first bytes of a RECORD message whose type comes before its payload:
+# a map of two entries, the key "type" and the UINT8 value RECORD
+_RECORD_PREFIX = Struct(">BIBI4sBB").pack(
+    protocol.DataType.MAP,
+    2,
+    protocol.DataType.STRING,
+    4,
+    b"type",
+    protocol.DataType.UINT8,
+    protocol.ResponseType.RECORD,
+)
+
+# Returned in place of the RECORD messages that were not decoded
+_UNDECODED_RECORD = {"type": protocol.ResponseType.RECORD, "payload": None}
 
 
 class MessageReceiver:
@@ -14,10 +35,37 @@ class MessageReceiver:
 
     SEAL = 0x00_00
 
-    def __init__(self, connection: SocketConnection):
-        self._receiver_buffer = IOBuffer()
+    DEFAULT_MAX_RETAINED_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        connection: SocketConnection,
+        max_retained_buffer_size: int = DEFAULT_MAX_RETAINED_BUFFER_SIZE,
+    ):
+        """
+        attributes:
+        _receiver_buffer (IOBuffer): The buffer of the message being decoded, it
+            shrinks back after a message larger than max_retained_buffer_size
+        _num_messages (int): The number of messages received
+        _initial_num_recv_calls (int): The recv calls of the connection before
+            this receiver was created
+        _initial_num_bytes_received (int): The bytes received by the connection
+            before this receiver was created
+        """
+        self._connection = connection
+        self._receiver_buffer = IOBuffer(max_retained_size=max_retained_buffer_size)
         self._chunk_decoder = ChunkDecoder(connection, self._receiver_buffer)
         self._message_decoder = MessageDecoder(self._receiver_buffer)
+        self._num_messages = 0
+        self._initial_num_recv_calls = connection.num_recv_calls
+        self._initial_num_bytes_received = connection.num_bytes_received
+
+    def set_intern_pool(self, intern_pool: InternPool) -> None:
+        """
+        Take the graph objects of the next messages from an intern pool,
+        or stop interning them if None
+        """
+        self._message_decoder.set_intern_pool(intern_pool)
 
     def receive(self) -> object:
         """
@@ -25,6 +73,7 @@ class MessageReceiver:
         """
         # Decode chunks
         self._chunk_decoder.decode()
+        self._num_messages += 1
 
         # Decode message
         msg = self._message_decoder.decode()
@@ -34,12 +83,71 @@ class MessageReceiver:
 
         return msg
 
-    def receive_records(self) -> Tuple[List[object], Any]:
-        records = []
+    def receive_columns(self, column_builder: ColumnBuilder) -> object:
+        """
+        Decode and return the incoming message, appending the values of a
+        RECORD message to the columns instead of building its payload
+        """
+        self._chunk_decoder.decode()
+        self._num_messages += 1
+        msg = column_builder.decode_message(
+            self._message_decoder, self._receiver_buffer
+        )
+        self._receiver_buffer.reset()
+        return msg
+
+    def receive_undecoded(
+        self, records: Union[LazyRecords, SpillFile, RecordBatches]
+    ) -> object:
+        """
+        Receive the incoming message, appending its bytes to the records
+        without decoding it if it is a RECORD message. The payload of an
+        undecoded message is returned as None
+        """
+        self._chunk_decoder.decode()
+        self._num_messages += 1
+        buffer = self._receiver_buffer
+        message = buffer.view[: buffer.num_used_bytes]
+        if message[: len(_RECORD_PREFIX)] == _RECORD_PREFIX:
+            records.append(message)
+            msg = _UNDECODED_RECORD
+        else:
+            msg = self._message_decoder.decode()
+            if msg["type"] == protocol.ResponseType.RECORD:
+                # The payload came before the type, the message is kept as it is
+                records.append(message)
+                msg = _UNDECODED_RECORD
+        del message
+        buffer.reset()
+        return msg
+
+    @property
+    def num_messages(self) -> int:
+        return self._num_messages
+
+    @property
+    def num_chunks(self) -> int:
+        return self._chunk_decoder.num_chunks
 
-        msg = self.receive()
-        while msg["type"] == protocol.ResponseType.RECORD:
-            records.append(msg["payload"])
-            msg = self.receive()
+    @property
+    def num_bytes(self) -> int:
+        return self._chunk_decoder.num_bytes
 
-        return records, msg
+    def io_stats(self) -> Dict[str, float]:
+        """
+        Get the number of messages, chunks, recv calls and bytes received by
+        this receiver
+        """
+        num_recv_calls = self._connection.num_recv_calls - self._initial_num_recv_calls
+        num_bytes_received = (
+            self._connection.num_bytes_received - self._initial_num_bytes_received
+        )
+        return {
+            "messages": self._num_messages,
+            "chunks": self._chunk_decoder.num_chunks,
+            "recv_calls": num_recv_calls,
+            "bytes_received": num_bytes_received,
+            "recv_calls_per_message": (
+                num_recv_calls / self._num_messages if self._num_messages else 0.0
+            ),
+        }
@@ -0,0 +1,175 @@
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import Lock
+from typing import Iterator, List, Tuple, Union
+
+from .iobuffer import IOBuffer
+from .message_decoder import MessageDecoder
+from .millenniumdb_error import MillenniumDBError
+
+
+def decode_batch(data: bytes) -> List[Tuple[object]]:
+    """
+    Decode the values of the RECORD messages of a batch, in a worker process
+
+    :param data: The bytes of whole RECORD messages, one after another
+    :return: The values of each record
+    """
+    iobuffer = IOBuffer(0)
+    iobuffer.view = memoryview(data)
+    iobuffer.num_used_bytes = len(data)
+    decoder = MessageDecoder(iobuffer)
+    res = []
+    while iobuffer._current_read_position < len(data):
+        res.append(tuple(decoder.decode()["payload"]))
+    return res
+
+
+class ParallelDecoder:
+    """
+    Decodes the records of large results in a pool of worker processes,
+    started when the first result needs them.
+
+    The bytes of the RECORD messages are split into batches at message
+    boundaries. The batches of a result are kept until it exceeds the
+    threshold, so smaller results are decoded by the process that received
+    them. Past the threshold each batch is sent to the pool as soon as it
+    is full, while the next one is received
+    """
+
+    DEFAULT_BATCH_BYTES = 1024 * 1024
+    DEFAULT_THRESHOLD = 4 * 1024 * 1024
+
+    def __init__(
+        self,
+        num_processes: int,
+        threshold: int = DEFAULT_THRESHOLD,
+        batch_bytes: int = DEFAULT_BATCH_BYTES,
+    ):
+        """
+        attributes:
+        num_processes (int): The number of worker processes
+        threshold (int): The size of the records of a result below which
+            they are decoded without the pool
+        batch_bytes (int): The size above which a batch is sent to the pool
+        _executor (ProcessPoolExecutor or None): The pool, started when needed
+        """
+        if num_processes < 1:
+            raise MillenniumDBError(
+                "ParallelDecoder Error: num_processes must be at least 1"
+            )
+        self.num_processes = num_processes
+        self.threshold = threshold
+        self.batch_bytes = batch_bytes
+        self._executor = None
+        self._lock = Lock()
+        self._open = True
+
+    def batches(self) -> "RecordBatches":
+        """
+        Get the batches for the records of a new result
+        """
+        return RecordBatches(self)
+
+    def submit(self, data: bytes) -> Future:
+        """
+        Decode a batch in the pool
+        """
+        return self._get_executor().submit(decode_batch, data)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes
+        """
+        with self._lock:
+            self._open = False
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if not self._open:
+                raise MillenniumDBError("ParallelDecoder Error: decoder is closed")
+            if self._executor is None:
+                # Forking a process with the threads of the driver is unsafe
+                self._executor = ProcessPoolExecutor(
+                    self.num_processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+
+class RecordBatches:
+    """
+    The RECORD messages of a result, split into batches that are decoded
+    in the pool of a ParallelDecoder once the result exceeds its threshold
+    """
+
+    def __init__(self, parallel_decoder: ParallelDecoder):
+        """
+        attributes:
+        _parallel_decoder (ParallelDecoder): Decodes the batches
+        _batch (bytearray): The batch being filled
+        _batches (List[bytes or Future]): The full batches in order, as bytes
+            until the threshold is exceeded and as futures after it
+        _num_bytes (int): The size of the messages appended
+        _parallel (bool): Whether the batches are sent to the pool
+        """
+        self._parallel_decoder = parallel_decoder
+        self._batch = bytearray()
+        self._batches: List[Union[bytes, Future]] = []
+        self._num_bytes = 0
+        self._parallel = False
+
+    def append(self, message: memoryview) -> None:
+        """
+        Append the bytes of a RECORD message
+        """
+        self._batch += message
+        self._num_bytes += len(message)
+        if len(self._batch) >= self._parallel_decoder.batch_bytes:
+            self._flush()
+
+    def values(self) -> Iterator[Tuple[object]]:
+        """
+        Get the values of the records in order, once all were appended
+        """
+        if len(self._batch) > 0:
+            self._flush()
+        try:
+            for batch in self._batches:
+                if isinstance(batch, Future):
+                    yield from batch.result()
+                else:
+                    yield from decode_batch(batch)
+        except MillenniumDBError:
+            raise
+        except Exception as e:
+            raise MillenniumDBError(
+                "ParallelDecoder Error: could not decode records"
+            ) from e
+        finally:
+            self._batches = []
+
+    def is_parallel(self) -> bool:
+        """
+        Whether the result exceeded the threshold and its batches were sent
+        to the pool
+        """
+        return self._parallel
+
+    def _flush(self) -> None:
+        """
+        Close the batch being filled, sending the kept batches to the pool
+        once the threshold is exceeded
+        """
+        self._batches.append(bytes(self._batch))
+        self._batch = bytearray()
+        if not self._parallel and self._num_bytes >= self._parallel_decoder.threshold:
+            self._parallel = True
+            self._batches = [
+                self._parallel_decoder.submit(batch) for batch in self._batches
+            ]
+        elif self._parallel:
+            self._batches[-1] = self._parallel_decoder.submit(self._batches[-1])
@@ -0,0 +1,128 @@
+from collections import deque
+from threading import Condition, Thread
+from typing import Callable, Deque, Tuple, Union
+
+from .millenniumdb_error import MillenniumDBError
+from .record import Record
+
+
+class Prefetcher:
+    """
+    Receives the records of a streamed result in a background thread, into a
+    queue bounded by its number of records and their received bytes, while
+    the application consumes them.
+
+    The thread waits while the queue is full, so the server is not read
+    further ahead than the bounds. An error raised while receiving is raised
+    to the consumer after the records received before it
+    """
+
+    DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+    def __init__(
+        self,
+        fetch_record: Callable[[], Union[Record, Tuple[object], None]],
+        num_bytes: Callable[[], int],
+        max_records: int,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """
+        attributes:
+        _fetch_record (Callable): Receives the next record from the connection,
+            None once there are no more records
+        _num_bytes (Callable[[], int]): The bytes received by the connection so far
+        _max_records (int): The maximum number of records in the queue
+        _max_bytes (int): The maximum received bytes of the records in the
+            queue, a larger record is queued alone
+        _queue (Deque[Tuple[Record or Tuple[object], int]]): The records
+            received and not consumed yet, with their received bytes
+        _queued_bytes (int): The received bytes of the records in the queue
+        _done (bool): Whether the thread has received the last record
+        _error (BaseException or None): The error raised while receiving
+        _stopped (bool): Whether the consumer stopped reading the records
+        """
+        if max_records < 1 or max_bytes < 1:
+            raise MillenniumDBError(
+                "Prefetcher Error: max_records and max_bytes must be at least 1"
+            )
+        self._fetch_record = fetch_record
+        self._num_bytes = num_bytes
+        self._max_records = max_records
+        self._max_bytes = max_bytes
+        self._queue: Deque[Tuple[object, int]] = deque()
+        self._queued_bytes = 0
+        self._done = False
+        self._error = None
+        self._stopped = False
+        self._condition = Condition()
+        self._thread = Thread(
+            target=self._run, name="millenniumdb-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def get(self) -> Union[Record, Tuple[object], None]:
+        """
+        Get the next record, waiting until it is received. Returns None once
+        there are no more records, and raises the error of the result or of
+        the connection once the records before it have been read
+        """
+        with self._condition:
+            while not self._queue and not self._done:
+                self._condition.wait()
+            if self._queue:
+                record, num_bytes = self._queue.popleft()
+                self._queued_bytes -= num_bytes
+                self._condition.notify()
+                return record
+        if self._error is not None:
+            raise self._error
+        return None
+
+    def stop(self) -> None:
+        """
+        Stop receiving records once the current one is received, for a
+        result that is not read anymore
+        """
+        with self._condition:
+            self._stopped = True
+            self._queue.clear()
+            self._condition.notify_all()
+
+    def join(self) -> None:
+        """
+        Wait until the thread stops receiving
+        """
+        self._thread.join()
+
+    def _run(self) -> None:
+        error = None
+        try:
+            while True:
+                start = self._num_bytes()
+                record = self._fetch_record()
+                if record is None:
+                    break
+                num_bytes = self._num_bytes() - start
+                with self._condition:
+                    while (
+                        not self._stopped
+                        and self._queue
+                        and (
+                            len(self._queue) >= self._max_records
+                            or self._queued_bytes + num_bytes > self._max_bytes
+                        )
+                    ):
+                        self._condition.wait()
+                    if self._stopped:
+                        return
+                    self._queue.append((record, num_bytes))
+                    self._queued_bytes += num_bytes
+                    self._condition.notify()
+        except BaseException as e:
+            # Raised to the consumer, a ResultError if the query failed
+            error = e
+        finally:
+            with self._condition:
+                self._error = error
+                self._done = True
+                self._condition.notify_all()
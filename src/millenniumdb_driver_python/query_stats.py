@@ -0,0 +1,156 @@
+from typing import Dict, Union
+
+from .template import BoundQuery
+
+
+class QueryStats:
+    """
+    The timing of each step of a query and the size of its response.
+
+    The times are in seconds from the start of the query. The times of a
+    streamed result include the time the application spent between records,
+    the socket wait time does not
+    """
+
+    __slots__ = (
+        "query",
+        "host",
+        "connect_time",
+        "send_time",
+        "time_to_receive",
+        "time_to_variables",
+        "time_to_first_record",
+        "total_time",
+        "socket_wait_time",
+        "bytes_received",
+        "chunks_received",
+        "recv_calls",
+        "records",
+        "spilled_records",
+        "spilled_bytes",
+        "error",
+    )
+
+    def __init__(self, query: Union[str, BoundQuery]):
+        """
+        attributes:
+        query (str or BoundQuery): The query
+        host (str or None): The server that ran the query, as host:port,
+            None for a replayed result
+        connect_time (float): Seconds to connect and handshake, if the
+            connection was opened for this query
+        send_time (float): Seconds to write and send the request, 0.0 for
+            pipelined queries that are sent together
+        time_to_receive (float): Seconds until the response started to be
+            received, after the responses of the earlier pipelined queries
+        time_to_variables (float or None): Seconds until the variables were received
+        time_to_first_record (float or None): Seconds until the first record
+            was received, None if there are no records
+        total_time (float or None): Seconds until the whole response was
+            received, None while it is being received
+        socket_wait_time (float): Seconds spent waiting for data from the socket
+        bytes_received (int): The size of the response
+        chunks_received (int): The number of chunks of the response
+        recv_calls (int): The number of recv calls made for the response
+        records (int): The number of records received
+        spilled_records (int): The number of records spilled to disk
+        spilled_bytes (int): The size of the records spilled to disk
+        error (MillenniumDBError or None): The error of a failed query
+        """
+        self.query = query
+        self.host = None
+        self.connect_time = 0.0
+        self.send_time = 0.0
+        self.time_to_receive = 0.0
+        self.time_to_variables = None
+        self.time_to_first_record = None
+        self.total_time = None
+        self.socket_wait_time = 0.0
+        self.bytes_received = 0
+        self.chunks_received = 0
+        self.recv_calls = 0
+        self.records = 0
+        self.spilled_records = 0
+        self.spilled_bytes = 0
+        self.error = None
+
+    @property
+    def decode_time(self) -> float:
+        """
+        Seconds spent receiving the response without waiting for the socket,
+        mostly decoding it
+        """
+        if self.total_time is None:
+            return 0.0
+        receive_time = self.total_time - self.time_to_receive
+        return max(0.0, receive_time - self.socket_wait_time)
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        Get the stats as a dictionary, with the query as a string and the
+        error as its message
+        """
+        res = {name: getattr(self, name) for name in QueryStats.__slots__}
+        res["query"] = str(self.query)
+        res["decode_time"] = self.decode_time
+        res["error"] = None if self.error is None else str(self.error)
+        return res
+
+    def __str__(self) -> str:
+        def seconds(value: float) -> str:
+            return "-" if value is None else f"{value:.6f}s"
+
+        res = (
+            f"total={seconds(self.total_time)}"
+            f" connect={seconds(self.connect_time)}"
+            f" send={seconds(self.send_time)}"
+            f" receive={seconds(self.time_to_receive)}"
+            f" variables={seconds(self.time_to_variables)}"
+            f" first_record={seconds(self.time_to_first_record)}"
+            f" socket_wait={seconds(self.socket_wait_time)}"
+            f" decode={seconds(self.decode_time)}"
+            f" records={self.records}"
+            f" bytes={self.bytes_received}"
+            f" chunks={self.chunks_received}"
+        )
+        if self.host is not None:
+            res += f" host={self.host}"
+        if self.spilled_records > 0:
+            res += f" spilled_records={self.spilled_records}"
+        if self.error is not None:
+            res += f" error={self.error}"
+        return res
+
+    def __repr__(self) -> str:
+        return f"QueryStats<{self}>"
+
+
+class QueryHooks:
+    """
+    Observes the queries of a driver, for example to export metrics or to
+    log them. Subclasses override the methods they need, the hooks are
+    called in the thread of the query and must not raise.
+
+    A driver without hooks does not call any method
+    """
+
+    def on_query_start(self, stats: QueryStats) -> None:
+        """
+        Called before the request of a query is sent
+        """
+
+    def on_first_record(self, stats: QueryStats) -> None:
+        """
+        Called when the first record of a query is received
+        """
+
+    def on_query_end(self, stats: QueryStats) -> None:
+        """
+        Called when the whole response of a query has been received, after
+        on_error if the query failed
+        """
+
+    def on_error(self, stats: QueryStats, error: Exception) -> None:
+        """
+        Called when a query fails on the server
+        """
@@ -3,26 +3,94 @@ from typing import Dict, List, Tuple
 from .millenniumdb_error import MillenniumDBError
 
 
+class RecordSchema:
+    """
+    The variables of a result, shared by all its records
+    """
+
+    __slots__ = ("variables", "variable_to_index", "length")
+
+    def __init__(self, variables: List[str]):
+        """
+        attributes:
+        variables (Tuple[str]): The variables of the result
+        variable_to_index (Dict[str, int]): The index of each variable
+        length (int): The number of variables
+        """
+        self.variables = tuple(variables)
+        self.variable_to_index: Dict[str, int] = {
+            variable: i for i, variable in enumerate(self.variables)
+        }
+        self.length = len(self.variables)
+
+    def record(self, values: List[object]) -> "Record":
+        """
+        Build a record of this schema from its decoded values
+        """
+        return Record.from_schema(self, self.raw(values))
+
+    def raw(self, values: List[object]) -> Tuple[object]:
+        """
+        Get the decoded values of a record as a plain tuple
+        """
+        if len(values) != self.length:
+            raise MillenniumDBError(
+                "Record Error: Number of variables does not match the number of values"
+            )
+        return tuple(values)
+
+    def to_dict(self, values: Tuple[object]) -> Dict[str, object]:
+        """
+        Get the values of a raw record as a dictionary
+        """
+        return dict(zip(self.variables, values))
+
+
 class Record:
     """
     This class represents an entry in the result of a query
     """
 
+    __slots__ = ("_schema", "_values")
+
     def __init__(
         self,
         variables: List[str],
         values: List[object],
-        variableToIndex: Dict[str, int],
+        variableToIndex: Dict[str, int] = None,
     ):
-        if len(variables) != len(values):
-            raise MillenniumDBError(
-                "Record Error: Number of variables does not match the number of values"
-            )
+        """
+        Build a record with its own schema. The records of a result are built
+        with from_schema instead, sharing the schema of the result
 
-        self._variables = variables
-        self._values = values
-        self._variableToIndex = variableToIndex
-        self.length = len(variables)  # The number of variables in the record
+        attributes:
+        _schema (RecordSchema): The variables of the result, shared by its records
+        _values (Tuple[object]): The values of the record
+
+        parameters:
+        variableToIndex (Dict[str, int] or None): Kept for compatibility, the
+            index of each variable is taken from the variables
+        """
+        self._schema = RecordSchema(variables)
+        self._values = self._schema.raw(values)
+
+    @classmethod
+    def from_schema(cls, schema: RecordSchema, values: Tuple[object]) -> "Record":
+        """
+        Build a record of a schema shared with the other records of its
+        result, from its values already checked against the schema
+        """
+        record = cls.__new__(cls)
+        record._schema = schema
+        record._values = values
+        return record
+
+    @property
+    def length(self) -> int:
+        """
+        The number of variables in the record
+        """
+        return len(self._values)
 
     def entries(self) -> List[Tuple[str, object]]:
         """
@@ -30,7 +98,7 @@ class Record:
 
         :return: an iterable over all entries
         """
-        return [(self._variables[i], self._values[i]) for i in range(len(self))]
+        return list(zip(self._schema.variables, self._values))
 
     def values(self) -> List[object]:
         """
@@ -38,7 +106,7 @@ class Record:
 
         :return: an iterable over all values
         """
-        return self._values
+        return list(self._values)
 
     def __iter__(self):
         """
@@ -46,7 +114,7 @@ class Record:
 
         :yield: an iterable over all values
         """
-        yield from self.values()
+        yield from self._values
 
     def get(self, key):
         """
@@ -55,7 +123,10 @@ class Record:
         :param key: The variable name or its index emmited by the onVariables event
         :return: The value associated with the key
         """
-        index = key if isinstance(key, int) else self._variableToIndex.get(key, -1)
+        if isinstance(key, int):
+            index = key
+        else:
+            index = self._schema.variable_to_index.get(key, -1)
         if index < 0 or index > len(self._values) - 1:
             raise MillenniumDBError(f"Record Error: Index {index} is out of bounds")
         return self._values[index]
@@ -67,30 +138,31 @@ class Record:
         :param key: The variable name or its index emmited by the onVariables event
         :return: True if the record has a value associated with the key
         """
-        index = key if isinstance(key, int) else self._variableToIndex.get(key, -1)
+        if isinstance(key, int):
+            index = key
+        else:
+            index = self._schema.variable_to_index.get(key, -1)
         return index >= 0 and index < len(self._values)
 
     def to_dict(self):
         """
         Return the record as a dictionary
         """
-        res = {}
-        for i in range(len(self)):
-            res[self._variables[i]] = self._values[i]
-        return res
+        return self._schema.to_dict(self._values)
 
     def __str__(self):
         if len(self) == 0:
             return "{}"
 
+        variables = self._schema.variables
         res = "{"
-        res += f"{self._variables[0]}: {repr(self._values[0])}"
+        res += f"{variables[0]}: {repr(self._values[0])}"
         for i in range(1, len(self)):
-            res += f", {self._variables[i]}: {repr(self._values[i])}"
+            res += f", {variables[i]}: {repr(self._values[i])}"
         return res + "}"
 
     def __repr__(self):
         return f"Record<{str(self)}>"
 
     def __len__(self):
-        return self.length
+        return len(self._values)
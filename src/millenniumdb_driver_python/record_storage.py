@@ -0,0 +1,440 @@
+from typing import Callable, List, Sequence, Tuple, Union
+
+from .column_builder import ColumnBuilder
+from .lazy_records import LazyRecords
+from .millenniumdb_error import MillenniumDBError
+from .prefetcher import Prefetcher
+from .query_stats import QueryStats
+from .record import Record
+from .spill_file import SpilledRecords, SpillFile
+
+
+class RecordStorage:
+    """
+    Where a result keeps the records it receives, given to session.run as its
+    storage. This one decodes the records as they are received and keeps
+    them in memory, the subclasses spill them to disk, keep them undecoded,
+    decode them in worker processes or receive them in a background thread.
+
+    A storage only holds its options, so the same one can be given to any
+    number of queries. Each result gets its own RecordStore from it
+    """
+
+    # The options of session.run the storage cannot be used with
+    INCOMPATIBLE_OPTIONS: Tuple[str, ...] = ()
+
+    def check(
+        self, driver: "Driver", stream: bool, columnar: bool, intern: bool, cache: bool
+    ) -> None:
+        """
+        Check that the storage can be used with the options of a query, before
+        its request is sent
+
+        :param driver: The driver the query is run by
+        :param stream: Whether the records are received while iterating
+        :param columnar: Whether the values are decoded into columns
+        :param intern: Whether the graph objects are interned, by the result
+            or by the intern pool of the driver
+        :param cache: Whether the result is kept in the result cache
+        """
+        options = {
+            "stream": stream,
+            "columnar": columnar,
+            "intern": intern,
+            "cache": cache,
+        }
+        incompatible = [name for name in self.INCOMPATIBLE_OPTIONS if options[name]]
+        if incompatible:
+            raise MillenniumDBError(
+                f"Result Error: {type(self).__name__} cannot be used with "
+                f"{' or '.join(incompatible)}"
+            )
+
+    def open(self, result: "Result", stream: bool, columnar: bool) -> "RecordStore":
+        """
+        Get the store of the records of a result, whose options were checked
+
+        :param result: The result whose records are stored
+        :param stream: Whether the records are received while iterating
+        :param columnar: Whether the values are decoded into columns
+        """
+        # Columnar results are always received completely
+        if columnar:
+            return ColumnStore(result)
+        return self._store(result, stream)
+
+    def _store(self, result: "Result", stream: bool) -> "RecordStore":
+        return RecordStore(result, stream)
+
+
+class SpillStorage(RecordStorage):
+    """
+    Keeps the records in memory until a memory budget is exceeded, and the
+    records received after it undecoded in a temporary file, decoded again
+    when they are read
+    """
+
+    INCOMPATIBLE_OPTIONS = ("columnar", "cache")
+
+    def __init__(self, max_memory_bytes: int):
+        """
+        attributes:
+        max_memory_bytes (int): The memory budget of the records, estimated
+            from their size as received
+        """
+        if max_memory_bytes < 0:
+            raise MillenniumDBError(
+                "SpillStorage Error: max_memory_bytes cannot be negative"
+            )
+        self.max_memory_bytes = max_memory_bytes
+
+    def _store(self, result: "Result", stream: bool) -> "RecordStore":
+        return SpillStore(result, stream, self.max_memory_bytes)
+
+
+class LazyStorage(RecordStorage):
+    """
+    Keeps the records as the bytes received and decodes each one when it is
+    read, for random access to large results
+    """
+
+    INCOMPATIBLE_OPTIONS = ("columnar", "cache")
+
+    def _store(self, result: "Result", stream: bool) -> "RecordStore":
+        return LazyStore(result, stream)
+
+
+class ParallelStorage(RecordStorage):
+    """
+    Decodes the records in the processes of the driver, created with
+    decode_processes, if the result is large enough
+    """
+
+    INCOMPATIBLE_OPTIONS = ("stream", "columnar", "intern")
+
+    def check(
+        self, driver: "Driver", stream: bool, columnar: bool, intern: bool, cache: bool
+    ) -> None:
+        super().check(driver, stream, columnar, intern, cache)
+        if driver._parallel_decoder is None:
+            raise MillenniumDBError(
+                "Result Error: ParallelStorage requires a driver with decode_processes"
+            )
+
+    def _store(self, result: "Result", stream: bool) -> "RecordStore":
+        return ParallelStore(result)
+
+
+class PrefetchStorage(RecordStorage):
+    """
+    Streams the result, receiving the records ahead in a background thread
+    while they are being read
+    """
+
+    INCOMPATIBLE_OPTIONS = ("columnar", "cache")
+
+    def __init__(self, records: int, max_bytes: int = Prefetcher.DEFAULT_MAX_BYTES):
+        """
+        attributes:
+        records (int): The maximum number of records received ahead
+        max_bytes (int): The maximum size of the records received ahead, as
+            received from the server
+        """
+        if records < 1 or max_bytes < 1:
+            raise MillenniumDBError(
+                "PrefetchStorage Error: records and max_bytes must be at least 1"
+            )
+        self.records = records
+        self.max_bytes = max_bytes
+
+    def _store(self, result: "Result", stream: bool) -> "RecordStore":
+        return PrefetchStore(result, self.records, self.max_bytes)
+
+
+class RecordStore:
+    """
+    The records of one result, kept in memory as they are decoded. The
+    subclasses keep them as their RecordStorage says
+    """
+
+    def __init__(self, result: "Result", stream: bool):
+        """
+        attributes:
+        stream (bool): Whether the records are received while iterating,
+            instead of before the result is returned
+        _result (Result): The result whose records are stored
+        _records (List[Record or Tuple[object]]): The records decoded in memory
+        """
+        self.stream = stream
+        self._result = result
+        self._records: List[Union[Record, Tuple[object]]] = []
+
+    def start(self) -> None:
+        """
+        Prepare for the records, once the variables of the result are known
+        """
+
+    def start_stream(self) -> None:
+        """
+        Start streaming the records, once the result is returned
+        """
+
+    def next_record(self) -> Union[Record, Tuple[object], None]:
+        """
+        Receive the next record of a streamed result without keeping it.
+        Returns None when there are no more records
+        """
+        if not self._result._streaming:
+            return None
+        return self._result._receive_record()
+
+    def receive_all(self) -> None:
+        """
+        Receive all the remaining records of the result
+        """
+        while True:
+            record = self.next_record()
+            if record is None:
+                break
+            self._records.append(record)
+
+    def records(self) -> Sequence[Union[Record, Tuple[object]]]:
+        """
+        Get the records received, once they have all been received
+        """
+        return self._records
+
+    def columns(self) -> Union[ColumnBuilder, None]:
+        """
+        Get the columns of a columnar result, None if it is not columnar
+        """
+        return None
+
+    def stop(self) -> None:
+        """
+        Stop receiving records in the background, for a result that is not
+        read anymore
+        """
+
+    def close(self) -> None:
+        """
+        Release the resources of the records that are not kept in memory,
+        they cannot be read afterwards
+        """
+
+    def add_stats(self, stats: QueryStats) -> None:
+        """
+        Complete the stats of the result with those of the store
+        """
+
+    def _make_record(self) -> Callable[[Sequence[object]], object]:
+        schema = self._result._schema
+        return schema.raw if self._result._raw else schema.record
+
+
+class ColumnStore(RecordStore):
+    """
+    The values of a columnar result, decoded into typed columns
+    """
+
+    def __init__(self, result: "Result"):
+        """
+        attributes:
+        _columns (ColumnBuilder or None): The columns, created with the variables
+        """
+        super().__init__(result, False)
+        self._columns = None
+
+    def start(self) -> None:
+        self._columns = ColumnBuilder(len(self._result._variables))
+
+    def receive_all(self) -> None:
+        if self._columns is not None:
+            receive_columns = self._result._message_receiver.receive_columns
+            self._result._receive_all(lambda: receive_columns(self._columns))
+
+    def records(self) -> List[Union[Record, Tuple[object]]]:
+        if self._columns is not None and len(self._records) < self._columns.num_rows():
+            columns = self._columns.columns()
+            rows = [
+                tuple(column[i] for column in columns)
+                for i in range(self._columns.num_rows())
+            ]
+            if self._result._raw:
+                self._records = rows
+            else:
+                schema = self._result._schema
+                self._records = [Record.from_schema(schema, row) for row in rows]
+        return self._records
+
+    def columns(self) -> Union[ColumnBuilder, None]:
+        return self._columns
+
+
+class UndecodedStore(RecordStore):
+    """
+    Records received without decoding them, appended as the bytes of their
+    messages to a container created with the variables
+    """
+
+    def __init__(self, result: "Result", stream: bool):
+        """
+        attributes:
+        _undecoded (LazyRecords or SpillFile or RecordBatches or None): The
+            container of the undecoded records
+        """
+        super().__init__(result, stream)
+        self._undecoded = None
+
+    def _receive_undecoded(self) -> None:
+        """
+        Receive all the remaining records into the container
+        """
+        receive_undecoded = self._result._message_receiver.receive_undecoded
+        self._result._receive_all(lambda: receive_undecoded(self._undecoded))
+
+
+class SpillStore(UndecodedStore):
+    """
+    The records of a result with a memory budget, in memory until it is
+    exceeded and in a SpillFile afterwards
+    """
+
+    def __init__(self, result: "Result", stream: bool, max_memory_bytes: int):
+        """
+        attributes:
+        _max_memory_bytes (int): The memory budget of the records
+        _threshold (int): The bytes decoded by the receiver after which the
+            records are spilled
+        """
+        super().__init__(result, stream)
+        self._max_memory_bytes = max_memory_bytes
+        self._threshold = 0
+
+    def start(self) -> None:
+        self._threshold = (
+            self._result._message_receiver.num_bytes
+            + self._max_memory_bytes // self._result.MEMORY_PER_RECEIVED_BYTE
+        )
+
+    def receive_all(self) -> None:
+        result = self._result
+        receiver = result._message_receiver
+        while self._undecoded is None:
+            if receiver.num_bytes >= self._threshold:
+                if result._streaming:
+                    self._undecoded = SpillFile()
+                break
+            record = self.next_record()
+            if record is None:
+                break
+            self._records.append(record)
+
+        if self._undecoded is not None and result._streaming:
+            self._receive_undecoded()
+            self._undecoded.finish()
+
+    def records(self) -> Sequence[Union[Record, Tuple[object]]]:
+        if self._undecoded is None:
+            return self._records
+        return SpilledRecords(
+            self._records,
+            self._undecoded,
+            self._make_record(),
+            self._result._intern_pool,
+        )
+
+    def close(self) -> None:
+        if self._undecoded is not None:
+            self._undecoded.close()
+
+    def add_stats(self, stats: QueryStats) -> None:
+        if self._undecoded is not None:
+            stats.spilled_records = self._undecoded.num_records
+            stats.spilled_bytes = self._undecoded.num_bytes
+
+
+class LazyStore(UndecodedStore):
+    """
+    The records of a lazy result, kept undecoded in a LazyRecords
+    """
+
+    def start(self) -> None:
+        self._undecoded = LazyRecords(self._make_record(), self._result._intern_pool)
+
+    def receive_all(self) -> None:
+        if self._undecoded is not None:
+            self._receive_undecoded()
+            self._undecoded.finish()
+
+    def records(self) -> Sequence[Union[Record, Tuple[object]]]:
+        if self._undecoded is None:
+            return self._records
+        return self._undecoded
+
+
+class ParallelStore(UndecodedStore):
+    """
+    The records of a parallel result, received undecoded into RecordBatches
+    that are decoded by the processes of the driver
+    """
+
+    def __init__(self, result: "Result"):
+        super().__init__(result, False)
+
+    def start(self) -> None:
+        self._undecoded = self._result._driver._parallel_decoder.batches()
+
+    def receive_all(self) -> None:
+        if self._undecoded is None:
+            return
+        self._receive_undecoded()
+        make_record = self._make_record()
+        self._records = [make_record(values) for values in self._undecoded.values()]
+        self._undecoded = None
+
+
+class PrefetchStore(RecordStore):
+    """
+    The records of a streamed result, received ahead by a Prefetcher
+    """
+
+    def __init__(self, result: "Result", max_records: int, max_bytes: int):
+        """
+        attributes:
+        _max_records (int): The maximum number of records received ahead
+        _max_bytes (int): The maximum received bytes of the records received ahead
+        _prefetcher (Prefetcher or None): Receives the records in the
+            background, until they have all been read
+        """
+        super().__init__(result, True)
+        self._max_records = max_records
+        self._max_bytes = max_bytes
+        self._prefetcher = None
+
+    def start_stream(self) -> None:
+        if self._result._streaming:
+            receiver = self._result._message_receiver
+            self._prefetcher = Prefetcher(
+                self._result._receive_record,
+                lambda: receiver.num_bytes,
+                self._max_records,
+                self._max_bytes,
+            )
+
+    def next_record(self) -> Union[Record, Tuple[object], None]:
+        if self._prefetcher is None:
+            return super().next_record()
+        try:
+            record = self._prefetcher.get()
+        except BaseException:
+            self._prefetcher = None
+            raise
+        if record is None:
+            self._prefetcher = None
+        return record
+
+    def stop(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+            self._prefetcher = None
@@ -0,0 +1,206 @@
+import mmap
+from typing import Dict, Iterator, Union
+
+from .iobuffer import IOBuffer
+from .message_receiver import MessageReceiver
+from .millenniumdb_error import MillenniumDBError, ResultError
+from .response_handler import ResponseHandler
+from .result import Result
+
+
+class ReplayConnection:
+    """
+    Stands in for the socket connection of a result, receiving the bytes of
+    a capture instead of the bytes sent by the server. Requests are discarded
+    """
+
+    def __init__(self, data: memoryview):
+        """
+        attributes:
+        _data (memoryview): The captured bytes
+        _position (int): The position of the next byte to receive
+        num_recv_calls (int): The number of times bytes were received
+        num_bytes_received (int): The number of bytes received
+        recv_wait_time (float): Always 0.0, there is no socket to wait for
+        connect_time (float): Always 0.0, there is no connection
+        address (None): There is no server
+        """
+        self._data = data
+        self._position = 0
+        self.num_recv_calls = 0
+        self.num_bytes_received = 0
+        self.recv_wait_time = 0.0
+        self.connect_time = 0.0
+        self.address = None
+
+    def sendall(self, iobuffer: IOBuffer) -> None:
+        pass
+
+    def recvall_into(self, iobuffer: IOBuffer, num_bytes: int) -> None:
+        """
+        Copy the next num_bytes of the capture at the end of the used bytes
+        of the iobuffer
+        """
+        end = self._position + num_bytes
+        if end > len(self._data):
+            raise MillenniumDBError("ReplayConnection Error: the capture is truncated")
+
+        iobuffer.reserve(num_bytes)
+        start = iobuffer.num_used_bytes
+        iobuffer.view[start : start + num_bytes] = self._data[self._position : end]
+        iobuffer.num_used_bytes += num_bytes
+        self._position = end
+        self.num_recv_calls += 1
+        self.num_bytes_received += num_bytes
+
+    def at_end(self) -> bool:
+        return self._position >= len(self._data)
+
+    def rewind(self) -> None:
+        self._position = 0
+
+    def start_capture(self, file) -> None:
+        raise MillenniumDBError("ReplayConnection Error: cannot capture a replay")
+
+    def stop_capture(self) -> None:
+        pass
+
+
+class Replay:
+    """
+    Replays the responses captured by session.run(query, capture=...) from a
+    memory-mapped file, decoding them exactly as if they were received from
+    the server, with no network involved. The responses are replayed in the
+    order they were captured, each one as a Result
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_retained_buffer_size: int = (
+            MessageReceiver.DEFAULT_MAX_RETAINED_BUFFER_SIZE
+        ),
+    ):
+        """
+        attributes:
+        _file (BinaryIO): The capture file
+        _mmap (mmap or None): The memory map of the capture, None if it is empty
+        _connection (ReplayConnection): Receives the bytes of the capture
+        _last_result (Result or None): The last result, that may still be
+            streaming records
+        _intern_pool (None): Results take the shared intern pool of their
+            driver, a replay has none
+        _hooks (Tuple[QueryHooks]): Results call the hooks of their driver,
+            a replay has none
+        """
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            self._mmap = None
+        self._view = memoryview(self._mmap if self._mmap is not None else b"")
+        self._connection = ReplayConnection(self._view)
+        self._message_receiver = MessageReceiver(
+            self._connection, max_retained_buffer_size
+        )
+        self._response_handler = ResponseHandler()
+        self._last_result = None
+        self._intern_pool = None
+        self._hooks = ()
+        self._open = True
+
+    def run(
+        self,
+        stream: bool = False,
+        columnar: bool = False,
+        intern: bool = False,
+        raw: bool = False,
+    ) -> Result:
+        """
+        Replay the next captured response. The arguments are those of
+        session.run, except that the query comes from the capture
+
+        :return: The result of the captured query, a failed query raises
+            its ResultError as it did when it was captured
+        """
+        if not self._open:
+            raise MillenniumDBError("Replay Error: replay is closed")
+        self._consume_last_result()
+        if self._connection.at_end():
+            raise MillenniumDBError("Replay Error: no more captured responses")
+
+        self._last_result = Result(
+            self,
+            self._connection,
+            self._message_receiver,
+            self._response_handler,
+            "",
+            0.0,
+            stream,
+            columnar,
+            intern,
+            raw,
+        )
+        return self._last_result
+
+    def results(
+        self,
+        stream: bool = False,
+        columnar: bool = False,
+        intern: bool = False,
+        raw: bool = False,
+    ) -> Iterator[Union[Result, ResultError]]:
+        """
+        Replay the remaining captured responses. The ResultError of a failed
+        query is yielded in place of its result, like session.run_many
+        """
+        while True:
+            self._consume_last_result()
+            if not self._open or self._connection.at_end():
+                return
+            try:
+                result = self.run(stream, columnar, intern, raw)
+            except ResultError as e:
+                result = e
+            yield result
+
+    def rewind(self) -> None:
+        """
+        Replay the captured responses again from the first one
+        """
+        self._consume_last_result()
+        self._connection.rewind()
+
+    def io_stats(self) -> Dict[str, float]:
+        """
+        Get the number of messages and bytes replayed
+        """
+        return self._message_receiver.io_stats()
+
+    def close(self) -> None:
+        """
+        Close the memory map and the capture file
+        """
+        if self._open:
+            self._open = False
+            self._last_result = None
+            self._view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+            self._file.close()
+
+    def _consume_last_result(self) -> None:
+        """
+        Decode the remaining records of the last result, so the next response
+        starts at its first message
+        """
+        if self._last_result is not None:
+            last_result, self._last_result = self._last_result, None
+            last_result._consume()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
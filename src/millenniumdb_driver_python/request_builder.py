@@ -1,5 +1,12 @@
+from struct import Struct
+from typing import Union
+
 from . import protocol
 from .iobuffer import IOBuffer
+from .template import BoundQuery
+
+# The request length, the request type, and the type and length of the string
+_STRING_REQUEST_HEADER = Struct(">IBBI")
 
 
 # This class is for build requests
@@ -14,22 +21,38 @@ class RequestBuilder:
         return string.encode("utf-8")
 
     @staticmethod
-    def run(query: str) -> IOBuffer:
+    def run(query: Union[str, BoundQuery], iobuffer: IOBuffer = None) -> IOBuffer:
         """
         Builds a request to execute a query
 
-        :param query: The query string to execute
+        :param query: The query string to execute, or a bound template
+        :param iobuffer: The buffer where the request is written after its
+            used bytes, a new buffer if None
         :return: The encoded request
         """
-        query_bytes = RequestBuilder.encode_string(query)
-        query_bytes_length = len(query_bytes)
-        iobuffer = IOBuffer(10 + query_bytes_length)
-        iobuffer.write_uint32(len(iobuffer) - 4)
-        iobuffer.write_uint8(protocol.RequestType.QUERY)
-        iobuffer.write_uint8(protocol.DataType.STRING)
-        iobuffer.write_uint32(query_bytes_length)
-        iobuffer.write_bytes(query_bytes)
-        return iobuffer
+        if isinstance(query, BoundQuery):
+            query_bytes = query.query_bytes
+        else:
+            query_bytes = RequestBuilder.encode_string(query)
+        return RequestBuilder._string_request(
+            protocol.RequestType.QUERY, query_bytes, iobuffer
+        )
+
+    @staticmethod
+    def update(update: Union[str, bytes], iobuffer: IOBuffer = None) -> IOBuffer:
+        """
+        Builds a request to execute an update
+
+        :param update: The update string to execute, or its UTF-8 encoding
+        :param iobuffer: The buffer where the request is written after its
+            used bytes, a new buffer if None
+        :return: The encoded request
+        """
+        if isinstance(update, str):
+            update = RequestBuilder.encode_string(update)
+        return RequestBuilder._string_request(
+            protocol.RequestType.UPDATE, update, iobuffer
+        )
 
     @staticmethod
     def catalog() -> IOBuffer:
@@ -57,3 +80,30 @@ class RequestBuilder:
         iobuffer.write_uint32(cancellation_token_bytes_length)
         iobuffer.write_bytes(cancellation_token_bytes)
         return iobuffer
+
+    @staticmethod
+    def _string_request(
+        request_type: protocol.RequestType, string_bytes: bytes, iobuffer: IOBuffer
+    ) -> IOBuffer:
+        """
+        Builds a request whose only argument is a string
+        """
+        string_bytes_length = len(string_bytes)
+        if iobuffer is None:
+            iobuffer = IOBuffer(10 + string_bytes_length)
+        else:
+            iobuffer.reserve(10 + string_bytes_length)
+        # The header and the string are written with two copies into the view
+        position = iobuffer.num_used_bytes
+        _STRING_REQUEST_HEADER.pack_into(
+            iobuffer.view,
+            position,
+            6 + string_bytes_length,
+            request_type,
+            protocol.DataType.STRING,
+            string_bytes_length,
+        )
+        position += 10
+        iobuffer.view[position : position + string_bytes_length] = string_bytes
+        iobuffer.num_used_bytes = position + string_bytes_length
+        return iobuffer
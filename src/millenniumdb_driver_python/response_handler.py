@@ -1,4 +1,5 @@
-from typing import Callable, Dict, List
+from collections import deque
+from typing import Callable, Deque, Dict
 
 from . import protocol
 from .millenniumdb_error import MillenniumDBError
@@ -6,12 +7,16 @@ from .millenniumdb_error import MillenniumDBError
 
 class ResponseHandler:
     """
-    This class handles the responses coming from the server
+    This class handles the responses coming from the server.
+
+    Each request has a single observer, that handles every response of the
+    request until its SUCCESS or ERROR, so the observers of pipelined
+    requests stay in step with the responses even if a request fails early
     """
 
     def __init__(self):
         self._current_observer: Dict[str, Callable] = None
-        self._pending_observers: List[Dict[str, Callable]] = []
+        self._pending_observers: Deque[Dict[str, Callable]] = deque()
 
     def handle(self, message: Dict[str, object]) -> None:
         """
@@ -19,18 +24,23 @@ class ResponseHandler:
         """
         match message["type"]:
             case protocol.ResponseType.SUCCESS:
-                self._callback("on_success", message["payload"])
-                self._next_observer()
+                try:
+                    self._callback("on_success", message["payload"])
+                finally:
+                    # Always move on, even if the observer raised an error
+                    self._next_observer()
 
             case protocol.ResponseType.ERROR:
-                self._callback("on_error", MillenniumDBError(message["payload"]))
-                self._next_observer()
+                try:
+                    self._callback("on_error", MillenniumDBError(message["payload"]))
+                finally:
+                    self._next_observer()
 
             case protocol.ResponseType.VARIABLES:
+                # The request goes on with its records, the observer is kept
                 variables = message["payload"]["variables"]
                 query_preamble = message["payload"]["queryPreamble"]
                 self._callback("on_variables", variables, query_preamble)
-                self._next_observer()
 
             case _:
                 raise NotImplementedError
@@ -61,6 +71,6 @@ class ResponseHandler:
         Move to the next observer in the queue
         """
         if len(self._pending_observers) > 0:
-            self._current_observer = self._pending_observers.pop(0)
+            self._current_observer = self._pending_observers.popleft()
         else:
             self._current_observer = None
@@ -1,13 +1,20 @@
-from threading import Thread
-from time import sleep
-from typing import Dict, Iterator, List, Tuple
+from operator import attrgetter
+from time import perf_counter
+from typing import BinaryIO, Callable, Dict, Iterator, List, Tuple, Union
 
+from . import protocol
+from .column_builder import ColumnBuilder
+from .intern_pool import InternPool
+from .iobuffer import IOBuffer
 from .message_receiver import MessageReceiver
-from .millenniumdb_error import ResultError
-from .record import Record
+from .millenniumdb_error import MillenniumDBError, ResultError
+from .query_stats import QueryStats
+from .record import Record, RecordSchema
+from .record_storage import RecordStorage
 from .request_builder import RequestBuilder
 from .response_handler import ResponseHandler
 from .socket_connection import SocketConnection
+from .template import BoundQuery
 
 
 class Result:
@@ -15,91 +22,396 @@ class Result:
     This class represents the result of a query
     """
 
+    # The decoded records take about this many bytes of memory per byte received
+    MEMORY_PER_RECEIVED_BYTE = 4
+
+    # Decodes the records as they are received and keeps them in memory
+    DEFAULT_STORAGE = RecordStorage()
+
     def __init__(
         self,
         driver: "Driver",
         connection: SocketConnection,
         message_receiver: MessageReceiver,
         response_handler: ResponseHandler,
-        query: str,
+        query: Union[str, BoundQuery],
         timeout: float,
+        stream: bool = False,
+        columnar: bool = False,
+        intern: bool = False,
+        raw: bool = False,
+        send_buffer: IOBuffer = None,
+        pipelined: bool = False,
+        capture: Union[str, BinaryIO] = None,
+        storage: RecordStorage = None,
     ):
+        """
+        attributes:
+        _streaming (bool): Whether the server is still sending the result
+        _store (RecordStore): Keeps the records as the storage of the query says,
+            and receives them
+        _intern_pool (InternPool or None): The pool of the shared graph objects of
+            the result, the pool of the driver if it has one
+        _schema (RecordSchema): The variables of the result, shared by its records
+        _raw (bool): Whether the records are plain tuples instead of Records
+        _received (bool): Whether the response has started to be received
+        _send_buffer (IOBuffer or None): The buffer the request is written to,
+            a new buffer for each request if None. The request of a pipelined
+            result is sent by its session after the requests before it
+        _capture_file (BinaryIO or None): The file the response is written to
+            while it is received
+        _owns_capture_file (bool): Whether the capture file was opened by the
+            result and must be closed once the response is received
+        _stats (QueryStats): The timing of the query and the size of its response
+        _hooks (Tuple[QueryHooks]): The hooks of the driver
+        _start_time (float): The perf_counter time when the query started
+        _initial_counters (Tuple[int, int, int, int, float]): The bytes, chunks
+            and messages decoded by the receiver, and the recv calls and wait
+            time of the connection, when the response started to be received
+        """
         self._driver = driver
         self._connection = connection
         self._variables = []
         self._query_preamble = None
-        self._variable_to_index = {}
-        self._records = []
+        self._schema = RecordSchema([])
+        self._raw = raw
         self._summary = None
         self._exception = None
         self._streaming = True
+        self._intern_pool = driver._intern_pool
+        if self._intern_pool is None and intern:
+            self._intern_pool = InternPool()
+        if storage is None:
+            storage = Result.DEFAULT_STORAGE
+        self._store = storage.open(self, stream, columnar)
         self._message_receiver = message_receiver
         self._response_handler = response_handler
-        self._run(query, timeout)
+        self._received = False
+        self._send_buffer = send_buffer
+        self._capture_file = None
+        self._owns_capture_file = False
+        self._stats = QueryStats(query)
+        self._hooks = driver._hooks
+        self._initial_counters = None
+        if capture is not None:
+            self._start_capture(capture)
+        self._start()
+        if pipelined:
+            self._request(query, timeout)
+        else:
+            self._run(query, timeout)
 
     def variables(self) -> Tuple[str]:
         return self._variables
 
-    def records(self) -> List[Record]:
-        return self._records
+    def records(self) -> List[Union[Record, Tuple[object]]]:
+        """
+        Get the records of the result. If records were spilled to disk, they
+        are a sequence that decodes the spilled records as they are read. The
+        records of a lazy result are decoded when they are read
+        """
+        self._consume()
+        return self._store.records()
 
-    def values(self) -> List[object]:
-        return [record.values() for record in self._records]
+    def values(self) -> List[Tuple[object]]:
+        if self._raw:
+            return self.records()
+        records = self.records()
+        if not isinstance(records, list):
+            return records.map(Record.values)
+        return [record.values() for record in records]
+
+    def _rows(self) -> List[Tuple[object]]:
+        """
+        Get the values of each record as a tuple, shared with the record
+        """
+        records = self.records()
+        if self._raw:
+            return records
+        if not isinstance(records, list):
+            return records.map(attrgetter("_values"))
+        return [record._values for record in records]
 
     def data(self) -> List[Dict[str, object]]:
-        return [record.to_dict() for record in self._records]
+        records = self.records()
+        to_dict = self._schema.to_dict if self._raw else Record.to_dict
+        if not isinstance(records, list):
+            return records.map(to_dict)
+        return [to_dict(record) for record in records]
+
+    def to_df(self, categorical: bool = False) -> "DataFrame":
+        """
+        Get the result as a pandas DataFrame, built column by column
 
-    def to_df(self) -> "DataFrame":
-        from pandas import DataFrame
+        :param categorical: Store the columns of strings as categorical columns
+        """
+        return self._column_builder().to_df(self._variables, categorical)
 
-        return DataFrame(self.data())
+    def to_numpy(self) -> Dict[str, "ndarray"]:
+        """
+        Get the result as a NumPy array for each variable. Numeric and boolean
+        variables get typed arrays, the other variables get object arrays
+        """
+        return self._column_builder().to_numpy(self._variables)
 
     def summary(self) -> object:
+        self._consume()
         return self._summary
 
-    def __iter__(self) -> Iterator[Record]:
-        return iter(self._records)
+    def stats(self) -> QueryStats:
+        """
+        Get the timing of each step of the query and the size of its response.
+        The stats of a streamed result are complete once it has been consumed
+        """
+        return self._stats
+
+    def close(self) -> None:
+        """
+        Delete the records that are not kept in memory, such as the temporary
+        file of a result over its memory budget. They are also deleted when
+        the session of the result is closed, and cannot be read afterwards
+        """
+        self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __iter__(self) -> Iterator[Union[Record, Tuple[object]]]:
+        if not self._streaming:
+            return iter(self.records())
+        return self._iter_stream()
+
+    def __len__(self) -> int:
+        """
+        Get the number of records, receiving the whole result
+        """
+        return len(self.records())
+
+    def __getitem__(self, index):
+        """
+        Get a record or a list of records by their position, receiving the
+        whole result
+        """
+        return self.records()[index]
+
+    def __bool__(self) -> bool:
+        # Testing a result must not receive it, as __len__ does
+        return True
+
+    def _iter_stream(self) -> Iterator[Union[Record, Tuple[object]]]:
+        """
+        Decode the remaining records one at a time without keeping them
+        """
+        while True:
+            record = self._store.next_record()
+            if record is None:
+                break
+            yield record
+        # Records received by _consume while iterating
+        yield from self.records()
+
+    def _receive_record(self) -> Union[Record, Tuple[object]]:
+        """
+        Receive the next record from the server. Returns None and handles
+        the termination message when there are no more records
+        """
+        message = self._message_receiver.receive()
+        if message["type"] == protocol.ResponseType.RECORD:
+            if self._stats.time_to_first_record is None:
+                self._first_record()
+            if self._raw:
+                return self._schema.raw(message["payload"])
+            return self._schema.record(message["payload"])
+        self._response_handler.handle(message)
+        return None
 
-    def _try_cancel(self, timeout) -> None:
-        sleep(timeout)
-        if self._streaming:
-            self._driver.cancel(self)
+    def _consume(self) -> None:
+        """
+        Receive all the remaining records of the result
+        """
+        self._store.receive_all()
+
+    def _receive_all(self, receive: Callable[[], Dict[str, object]]) -> None:
+        """
+        Receive the remaining messages of the result with a function of the
+        receiver that stores the records itself, and returns the other
+        messages or a RECORD message without its payload
+        """
+        while self._streaming:
+            message = receive()
+            if message["type"] != protocol.ResponseType.RECORD:
+                self._response_handler.handle(message)
+            elif self._stats.time_to_first_record is None:
+                self._first_record()
+
+    def _column_builder(self) -> ColumnBuilder:
+        """
+        Get the columns of the result, building them from the records if the
+        result is not columnar
+        """
+        self._consume()
+        columns = self._store.columns()
+        if columns is not None:
+            return columns
+
+        column_builder = ColumnBuilder(len(self._variables))
+        for record in self.records():
+            column_builder.append_values(record if self._raw else record._values)
+        return column_builder
+
+    def _run(self, query: Union[str, BoundQuery], timeout: float) -> None:
+        if self._send_buffer is not None:
+            self._send_buffer.reset()
+        self._connection.sendall(self._request(query, timeout))
+        self._stats.send_time = perf_counter() - self._start_time
+        self._receive()
+
+    def _request(self, query: Union[str, BoundQuery], timeout: float) -> IOBuffer:
+        """
+        Add the observer of the result to the response handler and write
+        its request, that must be sent before any later request
+        """
 
-    def _run(self, query: str, timeout: float) -> None:
         def on_variables(variables, query_preamble) -> None:
+            self._stats.time_to_variables = perf_counter() - self._start_time
             self._variables = variables
             self._query_preamble = query_preamble
-            self._variable_to_index = {variables[i]: i for i in range(len(variables))}
+            self._schema = RecordSchema(variables)
+            self._store.start()
 
             if timeout > 0.0:
-                t = Thread(target=self._try_cancel, args=[timeout], daemon=True)
-                t.start()
+                self._driver._cancel_scheduler.schedule(self, timeout)
 
         def on_success(summary) -> None:
             self._summary = summary
             self._streaming = False
+            if timeout > 0.0 and self._query_preamble is not None:
+                self._driver._cancel_scheduler.finished()
+            self._stop_capture()
+            self._finish(None)
 
         def on_error(error) -> None:
             self._streaming = False
+            if timeout > 0.0 and self._query_preamble is not None:
+                self._driver._cancel_scheduler.finished()
             self._exception = error
+            self._stop_capture()
+            self._finish(error)
             raise ResultError(self) from self._exception
 
         self._response_handler.add_observer(
-            {"on_variables": on_variables, "on_error": on_error}
+            {
+                "on_variables": on_variables,
+                "on_success": on_success,
+                "on_error": on_error,
+            }
         )
-        self._response_handler.add_observer(
-            {"on_success": on_success, "on_error": on_error}
+        return RequestBuilder.run(query, self._send_buffer)
+
+    def _start(self) -> None:
+        """
+        Start timing the query, before its request is written
+        """
+        self._start_time = perf_counter()
+        self._stats.host = self._connection.address
+        # The connection was opened for this query if nothing was received on it
+        if self._connection.num_bytes_received == 0:
+            self._stats.connect_time = self._connection.connect_time
+        for hooks in self._hooks:
+            hooks.on_query_start(self._stats)
+
+    def _first_record(self) -> None:
+        self._stats.time_to_first_record = perf_counter() - self._start_time
+        for hooks in self._hooks:
+            hooks.on_first_record(self._stats)
+
+    def _finish(self, error: MillenniumDBError) -> None:
+        """
+        Complete the stats once the whole response has been received
+        """
+        stats = self._stats
+        stats.total_time = perf_counter() - self._start_time
+        if self._initial_counters is not None:
+            num_bytes, num_chunks, num_messages, num_recv_calls, recv_wait_time = (
+                self._initial_counters
+            )
+            receiver = self._message_receiver
+            stats.bytes_received = receiver.num_bytes - num_bytes
+            stats.chunks_received = receiver.num_chunks - num_chunks
+            stats.recv_calls = self._connection.num_recv_calls - num_recv_calls
+            stats.socket_wait_time = self._connection.recv_wait_time - recv_wait_time
+            # Without the VARIABLES and the SUCCESS or ERROR
+            stats.records = receiver.num_messages - num_messages - 1
+            if stats.time_to_variables is not None:
+                stats.records -= 1
+        self._store.add_stats(stats)
+        stats.error = error
+
+        for hooks in self._hooks:
+            if error is not None:
+                hooks.on_error(stats, error)
+            hooks.on_query_end(stats)
+
+    def _stop(self) -> None:
+        """
+        Stop receiving records in the background, for a result that is not
+        read anymore. The connection must not be reused unless the whole
+        response was received
+        """
+        self._store.stop()
+
+    def _start_capture(self, capture: Union[str, BinaryIO]) -> None:
+        """
+        Write the response of the query to a file, appending it to the file
+        if capture is a path
+        """
+        if isinstance(capture, str):
+            self._capture_file = open(capture, "ab")
+            self._owns_capture_file = True
+        else:
+            self._capture_file = capture
+        self._connection.start_capture(self._capture_file)
+
+    def _stop_capture(self) -> None:
+        """
+        Stop writing the response once it has been received
+        """
+        if self._capture_file is None:
+            return
+        try:
+            self._connection.stop_capture()
+        finally:
+            if self._owns_capture_file:
+                self._capture_file.close()
+            self._capture_file = None
+
+    def _receive(self) -> None:
+        """
+        Receive the response of the result once its request has been sent,
+        after the responses of all the earlier requests
+        """
+        if self._received:
+            return
+        self._received = True
+        self._stats.time_to_receive = perf_counter() - self._start_time
+        self._message_receiver.set_intern_pool(self._intern_pool)
+        self._initial_counters = (
+            self._message_receiver.num_bytes,
+            self._message_receiver.num_chunks,
+            self._message_receiver.num_messages,
+            self._connection.num_recv_calls,
+            self._connection.recv_wait_time,
         )
-        self._connection.sendall(RequestBuilder.run(query))
 
-        # on_variables
+        # on_variables, or on_error if the query failed
         message = self._message_receiver.receive()
         self._response_handler.handle(message)
 
         # on_record / on_success
-        raw_records, termination_message = self._message_receiver.receive_records()
-        self._records = [
-            Record(self._variables, raw_record, self._variable_to_index)
-            for raw_record in raw_records
-        ]
-        self._response_handler.handle(termination_message)
+        if self._store.stream:
+            self._store.start_stream()
+        else:
+            self._consume()
@@ -0,0 +1,342 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Tuple, Union
+
+from .column_builder import ColumnBuilder
+from .millenniumdb_error import MillenniumDBError
+from .query_stats import QueryStats
+from .record import Record, RecordSchema
+from .template import BoundQuery
+
+# The string literals and IRIs are kept as they are, the whitespace between
+# the other tokens is collapsed to a single space
+_NORMALIZE = re.compile(r""""(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|<[^<>\s]*>|\s+""")
+
+# The key of a cached result: the normalized query, the model ID and the version
+CacheKey = Tuple[str, int, int]
+
+
+def normalize_query(query: Union[str, BoundQuery]) -> str:
+    """
+    Normalize the text of a query, so queries that only differ in their
+    whitespace share a cache entry
+    """
+
+    def replace(match: "re.Match") -> str:
+        token = match.group()
+        return " " if token.isspace() else token
+
+    return _NORMALIZE.sub(replace, str(query)).strip()
+
+
+class CacheEntry:
+    """
+    The records and the summary of a query, shared by all the results that
+    hit it
+    """
+
+    __slots__ = (
+        "key",
+        "schema",
+        "rows",
+        "summary",
+        "stats",
+        "num_bytes",
+        "tags",
+        "expires_at",
+        "_records",
+    )
+
+    def __init__(
+        self,
+        key: CacheKey,
+        schema: RecordSchema,
+        rows: Tuple[Tuple[object]],
+        summary: object,
+        stats: QueryStats,
+        num_bytes: int,
+        tags: FrozenSet[str],
+        expires_at: float,
+    ):
+        """
+        attributes:
+        key (CacheKey): The key of the entry
+        schema (RecordSchema): The variables of the result
+        rows (Tuple[Tuple[object]]): The values of each record
+        summary (Mapping or object): The summary of the result, read-only
+        stats (QueryStats): The stats of the query that filled the entry
+        num_bytes (int): The estimated memory of the records
+        tags (FrozenSet[str]): The tags the entry can be invalidated by
+        expires_at (float): The monotonic time after which the entry is stale
+        _records (Tuple[Record] or None): The records, built by the first
+            result that needs them
+        """
+        self.key = key
+        self.schema = schema
+        self.rows = rows
+        self.summary = (
+            MappingProxyType(summary) if isinstance(summary, dict) else summary
+        )
+        self.stats = stats
+        self.num_bytes = num_bytes
+        self.tags = tags
+        self.expires_at = expires_at
+        self._records = None
+
+    def records(self) -> Tuple[Record]:
+        if self._records is None:
+            schema = self.schema
+            self._records = tuple(Record.from_schema(schema, row) for row in self.rows)
+        return self._records
+
+
+class CachedResult:
+    """
+    A result served from the result cache of a driver, without a query to
+    the server. Its records are shared with the other results of the same
+    entry, so they are returned as tuples and must not be modified. The
+    values of each record are copied into a list, as those of a Result
+    """
+
+    def __init__(self, entry: CacheEntry, raw: bool = False):
+        """
+        attributes:
+        _entry (CacheEntry): The cached records and summary
+        _raw (bool): Whether the records are plain tuples instead of Records
+        """
+        self._entry = entry
+        self._raw = raw
+
+    def variables(self) -> Tuple[str]:
+        return self._entry.schema.variables
+
+    def records(self) -> Tuple[Union[Record, Tuple[object]]]:
+        if self._raw:
+            return self._entry.rows
+        return self._entry.records()
+
+    def values(self) -> Union[Tuple[Tuple[object]], List[List[object]]]:
+        """
+        Get the values of each record, as lists like Record.values() copied
+        from the shared tuples, or the shared tuples themselves if raw
+        """
+        if self._raw:
+            return self._entry.rows
+        return [list(row) for row in self._entry.rows]
+
+    def data(self) -> List[Dict[str, object]]:
+        to_dict = self._entry.schema.to_dict
+        return [to_dict(row) for row in self._entry.rows]
+
+    def to_df(self, categorical: bool = False) -> "DataFrame":
+        """
+        Get the result as a pandas DataFrame, built column by column
+
+        :param categorical: Store the columns of strings as categorical columns
+        """
+        return self._column_builder().to_df(self.variables(), categorical)
+
+    def to_numpy(self) -> Dict[str, "ndarray"]:
+        """
+        Get the result as a NumPy array for each variable
+        """
+        return self._column_builder().to_numpy(self.variables())
+
+    def summary(self) -> object:
+        return self._entry.summary
+
+    def stats(self) -> QueryStats:
+        """
+        Get the stats of the query that filled the cache entry
+        """
+        return self._entry.stats
+
+    def __iter__(self) -> Iterator[Union[Record, Tuple[object]]]:
+        return iter(self.records())
+
+    def __len__(self) -> int:
+        return len(self._entry.rows)
+
+    def __getitem__(self, index):
+        return self.records()[index]
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return f"CachedResult<{self._entry.key[0]!r}, records={len(self)}>"
+
+    def _column_builder(self) -> ColumnBuilder:
+        column_builder = ColumnBuilder(self._entry.schema.length)
+        for row in self._entry.rows:
+            column_builder.append_values(row)
+        return column_builder
+
+
+class ResultCache:
+    """
+    Caches the results of queries in memory, evicting the least recently
+    used entries when the number of entries or their estimated memory exceed
+    the bounds. Each entry expires after its time to live.
+
+    The entries are keyed by the normalized query and the model ID and
+    version of the catalog, so a server with a different catalog does not
+    get the results of another. The cache does not know which entries an
+    update affects, they are invalidated explicitly
+    """
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DEFAULT_TTL = 60.0
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+    ):
+        """
+        attributes:
+        _max_entries (int): The maximum number of entries
+        _max_bytes (int): The maximum estimated memory of the entries, a
+            larger result is not cached
+        _ttl (float): The default seconds an entry is valid
+        _entries (OrderedDict[CacheKey, CacheEntry]): The entries, from the
+            least to the most recently used
+        _num_bytes (int): The estimated memory of the entries
+        """
+        if max_entries < 1 or max_bytes < 1:
+            raise MillenniumDBError(
+                "ResultCache Error: max_entries and max_bytes must be at least 1"
+            )
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._num_bytes = 0
+        self._lock = Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._rejections = 0
+
+    def get(self, key: CacheKey) -> Union[CacheEntry, None]:
+        """
+        Get the valid entry of a key, None if there is none
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= monotonic():
+                self._remove(entry)
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(
+        self,
+        key: CacheKey,
+        schema: RecordSchema,
+        rows: Tuple[Tuple[object]],
+        summary: object,
+        stats: QueryStats,
+        num_bytes: int,
+        tags: Iterable[str] = (),
+        ttl: float = None,
+    ) -> None:
+        """
+        Store the result of a query, evicting the least recently used
+        entries to make room for it
+
+        :param num_bytes: The estimated memory of the records
+        :param tags: The tags the entry can be invalidated by
+        :param ttl: Seconds the entry is valid, defaults to the ttl of the cache
+        """
+        if ttl is None:
+            ttl = self._ttl
+        with self._lock:
+            if num_bytes > self._max_bytes or ttl <= 0.0:
+                self._rejections += 1
+                return
+            old_entry = self._entries.get(key)
+            if old_entry is not None:
+                self._remove(old_entry)
+            entry = CacheEntry(
+                key,
+                schema,
+                rows,
+                summary,
+                stats,
+                num_bytes,
+                frozenset(tags),
+                monotonic() + ttl,
+            )
+            self._entries[key] = entry
+            self._num_bytes += num_bytes
+            while (
+                len(self._entries) > self._max_entries
+                or self._num_bytes > self._max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._num_bytes -= evicted.num_bytes
+                self._evictions += 1
+
+    def invalidate(self, prefix: str = None, tag: str = None) -> int:
+        """
+        Remove the entries whose normalized query starts with prefix, or that
+        have the tag, or all of them if neither is given
+
+        :return: The number of entries removed
+        """
+        if prefix is not None:
+            prefix = normalize_query(prefix)
+        with self._lock:
+            if prefix is None and tag is None:
+                entries = list(self._entries.values())
+            else:
+                entries = [
+                    entry
+                    for entry in self._entries.values()
+                    if (prefix is not None and entry.key[0].startswith(prefix))
+                    or (tag is not None and tag in entry.tags)
+                ]
+            for entry in entries:
+                self._remove(entry)
+            self._invalidations += len(entries)
+            return len(entries)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the cache
+
+        :return: A dictionary with the hits, the misses, the entries evicted
+            to make room, expired, invalidated, the results too large to be
+            cached, and the number of entries and their estimated memory
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "rejections": self._rejections,
+                "entries": len(self._entries),
+                "bytes": self._num_bytes,
+            }
+
+    def _remove(self, entry: CacheEntry) -> None:
+        """
+        Remove an entry. Must be called holding the lock
+        """
+        del self._entries[entry.key]
+        self._num_bytes -= entry.num_bytes
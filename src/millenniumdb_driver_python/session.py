@@ -1,12 +1,22 @@
+import weakref
+from collections import deque
+from contextlib import contextmanager
 from functools import wraps
+from typing import BinaryIO, Callable, Deque, Dict, Iterable, Iterator, Union
 
+from .bulk_update import BulkUpdate, UpdateBatch
 from .catalog import Catalog
+from .exporter import Export
 from .message_receiver import MessageReceiver
-from .millenniumdb_error import MillenniumDBError
+from .millenniumdb_error import MillenniumDBError, ResultError
 from .request_builder import RequestBuilder
 from .response_handler import ResponseHandler
+from .iobuffer import IOBuffer
+from .record_storage import PrefetchStorage, RecordStorage, SpillStorage
 from .result import Result
+from .result_cache import CachedResult
 from .socket_connection import SocketConnection
+from .template import BoundQuery, Template
 
 
 def _ensure_session_open(func):
@@ -28,56 +38,453 @@ class Session:
     The class represents a session with the MillenniumDB server
     """
 
-    def __init__(self, host: str, port: int, driver: "Driver"):
+    DEFAULT_MAX_IN_FLIGHT = 128
+
+    def __init__(self, connection: SocketConnection, driver: "Driver"):
         self._driver = driver
         self._open = True
-        self._connection = SocketConnection(host, port)
-        self._message_receiver = MessageReceiver(self._connection)
+        self._connection = connection
+        self._message_receiver = MessageReceiver(
+            self._connection, driver._max_retained_buffer_size
+        )
         self._response_handler = ResponseHandler()
+        # The requests are written to the same buffer instead of a new one each
+        self._send_buffer = IOBuffer(
+            IOBuffer.DEFAULT_INITIAL_BUFFER_SIZE, driver._max_retained_buffer_size
+        )
+        # The last result, that may still be streaming records
+        self._last_result = None
+        # The results that may keep records out of memory, closed with the session
+        self._results = weakref.WeakSet()
+        # The pipelined results whose requests have been sent but whose
+        # responses have not been received yet, in the order of the requests
+        self._pipelined_results: Deque[Result] = deque()
+        # False while a request is sent and its response received, and after
+        # an exchange was interrupted with part of a response still unread
+        self._reusable = True
 
     @_ensure_session_open
-    def run(self, query: str, timeout: float = 0.0) -> Result:
+    def run(
+        self,
+        query: Union[str, BoundQuery],
+        timeout: float = 0.0,
+        stream: bool = False,
+        columnar: bool = False,
+        intern: bool = False,
+        raw: bool = False,
+        capture: Union[str, BinaryIO] = None,
+        max_memory_bytes: int = None,
+        storage: RecordStorage = None,
+        cache: bool = False,
+        cache_tags: Iterable[str] = (),
+        cache_ttl: float = None,
+    ) -> Union[Result, CachedResult]:
         """
         Run a query on the server
+
+        :param query: The query string to execute, or a template bound by
+            Template.bind
+        :param timeout: Seconds until the query is cancelled, 0.0 means no timeout
+        :param stream: Return as soon as the variables are received and decode
+            the records while iterating the result
+        :param columnar: Decode the values into typed columns instead of records,
+            for building DataFrames and NumPy arrays. Columnar results are
+            received completely, even if stream is True
+        :param intern: Decode each repeated node, edge, anonymous node and IRI
+            of the result to a single shared object. Results are always interned
+            if the driver has an intern pool
+        :param raw: Get the records as plain tuples of values instead of Records
+        :param capture: A path or a binary file the response of the query is
+            written to, exactly as it is received, to be replayed later by
+            millenniumdb_driver_python.replay. A path is appended to
+        :param max_memory_bytes: The memory budget of the records, the same as
+            storage=SpillStorage(max_memory_bytes). Cannot be used with storage
+        :param storage: Where the records are kept: in memory as they are
+            decoded by default, or a SpillStorage, LazyStorage, ParallelStorage
+            or PrefetchStorage. Each one says the options it cannot be used with
+        :param cache: Get the result from the result cache of the driver, or
+            cache it. A cached result is a read-only CachedResult shared with
+            the other runs of the query. Cannot be used with stream, columnar,
+            capture, or a storage that does not keep the records in memory
+        :param cache_tags: The tags the cached result can be invalidated by,
+            with driver.invalidate_results
+        :param cache_ttl: Seconds the result is cached, defaults to the
+            result_cache_ttl of the driver
         """
-        return Result(
+        if cache and (stream or columnar or capture is not None):
+            raise MillenniumDBError(
+                "Session Error: cache cannot be used with stream, columnar or capture"
+            )
+        if max_memory_bytes is not None:
+            if storage is not None:
+                raise MillenniumDBError(
+                    "Session Error: max_memory_bytes cannot be used with storage"
+                )
+            storage = SpillStorage(max_memory_bytes)
+        if storage is None:
+            storage = Result.DEFAULT_STORAGE
+        storage.check(
             self._driver,
-            self._connection,
-            self._message_receiver,
-            self._response_handler,
-            query,
-            timeout,
+            stream,
+            columnar,
+            intern or self._driver._intern_pool is not None,
+            cache,
         )
+        self._consume_pending_results()
+        if cache:
+            key = self._driver._result_cache_key(query, self)
+            entry = self._driver._result_cache.get(key)
+            if entry is not None:
+                return CachedResult(entry, raw)
+        with self._exchange():
+            self._last_result = Result(
+                self._driver,
+                self._connection,
+                self._message_receiver,
+                self._response_handler,
+                query,
+                timeout,
+                stream,
+                columnar,
+                intern,
+                raw,
+                self._send_buffer,
+                capture=capture,
+                storage=storage,
+            )
+        self._results.add(self._last_result)
+        if cache:
+            result = self._last_result
+            self._driver._result_cache.put(
+                key,
+                result._schema,
+                tuple(result._rows()),
+                result.summary(),
+                result.stats(),
+                result.stats().bytes_received * Result.MEMORY_PER_RECEIVED_BYTE,
+                cache_tags,
+                cache_ttl,
+            )
+        return self._last_result
+
+    @_ensure_session_open
+    def run_many(
+        self,
+        queries: Iterable[Union[str, BoundQuery]],
+        timeout: float = 0.0,
+        columnar: bool = False,
+        intern: bool = False,
+        raw: bool = False,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> Iterator[Union[Result, ResultError]]:
+        """
+        Run several queries on the server without waiting for the result of
+        each query before sending the next one. The queries are sent back to
+        back and their results are yielded in the same order, as soon as each
+        one has been received completely.
+
+        A failed query does not affect the others, its ResultError is yielded
+        in place of its result
+
+        :param queries: The query strings to execute, or templates bound by
+            Template.bind
+        :param timeout: Seconds until each query is cancelled, 0.0 means no timeout
+        :param columnar: Decode the values of each result into typed columns
+        :param intern: Decode each repeated node, edge, anonymous node and IRI
+            of a result to a single shared object
+        :param raw: Get the records as plain tuples of values instead of Records
+        :param max_in_flight: The maximum number of queries sent whose results
+            have not been received yet
+        """
+        if max_in_flight < 1:
+            raise MillenniumDBError("Session Error: max_in_flight must be at least 1")
+
+        queries = iter(queries)
+        results: Deque[Result] = deque()
+        options = (timeout, columnar, intern, raw, max_in_flight)
+        # The first queries are sent right away, even if the results are
+        # not iterated yet
+        self._send_pipelined(queries, results, *options)
+        return self._iter_pipelined(queries, results, *options)
+
+    @_ensure_session_open
+    def prepare(self, template: str) -> Template:
+        """
+        Get a query template with $name or ${name} parameters, whose static
+        parts are encoded only once. The templates are cached by the driver
+
+        :param template: The query with its parameters, a literal $ is written as $$
+        :return: The template, to be bound with its parameters and run
+        """
+        return self._driver._template(template)
+
+    @_ensure_session_open
+    def update(self, update: str) -> object:
+        """
+        Run an update on the server
+
+        :param update: The update string to execute
+        :return: The summary of the update
+        """
+        self._consume_pending_results()
+        response = {}
+
+        def on_success(summary) -> None:
+            response["summary"] = summary
+
+        def on_error(error) -> None:
+            response["error"] = error
+
+        with self._exchange():
+            self._response_handler.add_observer(
+                {"on_success": on_success, "on_error": on_error}
+            )
+            self._send_buffer.reset()
+            self._connection.sendall(RequestBuilder.update(update, self._send_buffer))
+            self._response_handler.handle(self._message_receiver.receive())
+        # Raised once the whole response was received, the session can go on
+        if "error" in response:
+            raise response["error"]
+        return response["summary"]
+
+    @_ensure_session_open
+    def bulk_update(
+        self,
+        updates: Iterable[str],
+        batch_bytes: int = BulkUpdate.DEFAULT_BATCH_BYTES,
+        max_in_flight: int = BulkUpdate.DEFAULT_MAX_IN_FLIGHT,
+        separator: str = BulkUpdate.DEFAULT_SEPARATOR,
+        on_batch: Callable[[UpdateBatch], None] = None,
+    ) -> BulkUpdate:
+        """
+        Run many update statements on the server, packed into UPDATE requests
+        of up to batch_bytes with up to max_in_flight requests sent ahead of
+        their responses. A failed batch does not stop the others
+
+        :param updates: The statements, read as they are sent. For example an
+            open file with one statement per line
+        :param batch_bytes: The maximum size of the statements of a request,
+            a larger statement is sent alone
+        :param max_in_flight: The maximum number of requests sent whose
+            response has not been received
+        :param separator: The separator between the statements of a request,
+            semicolons separate the update operations of a request
+        :param on_batch: Called with each UpdateBatch once its response is received
+        :return: The failed batches and the throughput of the bulk update
+        """
+        self._consume_pending_results()
+        with self._exchange():
+            return BulkUpdate(
+                self._connection,
+                self._message_receiver,
+                self._response_handler,
+                self._send_buffer,
+                updates,
+                batch_bytes,
+                max_in_flight,
+                separator,
+                on_batch,
+            )
+
+    @_ensure_session_open
+    def export(
+        self,
+        query: Union[str, BoundQuery],
+        file: Union[str, BinaryIO],
+        format: str = "csv",
+        timeout: float = 0.0,
+        batch_rows: int = Export.DEFAULT_BATCH_ROWS,
+        header: bool = True,
+        prefetch: int = 0,
+    ) -> Export:
+        """
+        Run a query and write its records to a file as they are received,
+        without keeping them in memory
+
+        :param query: The query string to execute, or a template bound by
+            Template.bind
+        :param file: A path or a binary file the records are written to
+        :param format: "csv", "ndjson" or "parquet", which needs pyarrow
+        :param timeout: Seconds until the query is cancelled, 0.0 means no timeout
+        :param batch_rows: The number of rows written at once, the size of
+            the row groups of a Parquet file
+        :param header: Start a CSV file with the names of the variables
+        :param prefetch: Receive up to this many records ahead in a background
+            thread while the rows are written, 0 receives them when written
+        :return: The number of rows and bytes written and the throughput
+        """
+        storage = PrefetchStorage(prefetch) if prefetch > 0 else None
+        result = self.run(query, timeout, stream=True, raw=True, storage=storage)
+        return Export(result.variables(), result, file, format, batch_rows, header)
 
     @_ensure_session_open
     def catalog(self):
         """
         Get the catalog of the MillenniumDB server
         """
-        return Catalog(self._connection, self._message_receiver, self._response_handler)
+        self._consume_pending_results()
+        with self._exchange():
+            return Catalog(
+                self._connection, self._message_receiver, self._response_handler
+            )
 
-    @_ensure_session_open
-    def _cancel(self, result: Result) -> None:
+    def io_stats(self) -> Dict[str, float]:
+        """
+        Get the number of messages, recv calls and bytes received by the session
+        """
+        return self._message_receiver.io_stats()
+
+    def _send_pipelined(
+        self,
+        queries: Iterator[Union[str, BoundQuery]],
+        results: Deque[Result],
+        timeout: float,
+        columnar: bool,
+        intern: bool,
+        raw: bool,
+        max_in_flight: int,
+    ) -> None:
         """
-        Cancel a running query on the server
+        Send the next queries of a pipeline with a single call, until it has
+        max_in_flight results that have not been received
         """
-        if result._query_preamble is None:
-            raise MillenniumDBError("Session Error: query has not been executed yet")
+        self._consume_last_result()
+        with self._exchange():
+            self._send_buffer.reset()
+            num_requests = 0
+            while len(results) < max_in_flight:
+                query = next(queries, None)
+                if query is None:
+                    break
+                result = Result(
+                    self._driver,
+                    self._connection,
+                    self._message_receiver,
+                    self._response_handler,
+                    query,
+                    timeout,
+                    columnar=columnar,
+                    intern=intern,
+                    raw=raw,
+                    send_buffer=self._send_buffer,
+                    pipelined=True,
+                )
+                num_requests += 1
+                results.append(result)
+                self._pipelined_results.append(result)
+
+            if num_requests > 0:
+                self._connection.sendall(self._send_buffer)
 
-        self._connection.sendall(
-            RequestBuilder.cancel(
-                result._query_preamble["workerIndex"],
-                result._query_preamble["cancellationToken"],
+    def _iter_pipelined(
+        self,
+        queries: Iterator[Union[str, BoundQuery]],
+        results: Deque[Result],
+        timeout: float,
+        columnar: bool,
+        intern: bool,
+        raw: bool,
+        max_in_flight: int,
+    ) -> Iterator[Union[Result, ResultError]]:
+        """
+        Receive the results of a pipeline in order, sending more queries as
+        the results are received
+        """
+        while len(results) > 0:
+            result = results.popleft()
+            self._receive_pipelined(result)
+            # Keep the server busy while the result is being used
+            if self._open:
+                self._send_pipelined(
+                    queries, results, timeout, columnar, intern, raw, max_in_flight
+                )
+
+            if result._exception is None:
+                yield result
+            else:
+                error = ResultError(result)
+                error.__cause__ = result._exception
+                yield error
+
+    def _receive_pipelined(self, result: Result) -> None:
+        """
+        Receive the pipelined results up to the given one, in the order
+        their requests were sent
+        """
+        while not result._received:
+            if not self._open:
+                raise MillenniumDBError("Session Error: session is closed")
+            pipelined_result = self._pipelined_results.popleft()
+            try:
+                with self._exchange():
+                    pipelined_result._receive()
+            except ResultError:
+                # The error is kept by its result
+                pass
+
+    def _consume_pending_results(self) -> None:
+        """
+        Receive the pending pipelined results and the remaining records of
+        the last result, so the connection is ready for the next request
+        """
+        while len(self._pipelined_results) > 0:
+            self._receive_pipelined(self._pipelined_results[-1])
+        self._consume_last_result()
+
+    def _consume_last_result(self) -> None:
+        """
+        Receive the remaining records of the last result, so the connection
+        is ready for the next request
+        """
+        if self._last_result is not None:
+            with self._exchange():
+                self._last_result._consume()
+            self._last_result = None
+
+    @contextmanager
+    def _exchange(self):
+        """
+        Mark the connection as not reusable while a request is sent and its
+        response received. If an exception other than the error of a query,
+        such as a KeyboardInterrupt or an error of the connection, interrupts
+        the exchange, the rest of the response may still arrive, so the
+        connection stays not reusable and the session must be closed
+        """
+        if not self._reusable:
+            raise MillenniumDBError(
+                "Session Error: a response was interrupted, the session must be"
+                " closed"
             )
-        )
+        self._reusable = False
+        try:
+            yield
+        except ResultError:
+            # The query failed on the server, its whole response was received
+            self._reusable = True
+            raise
+        self._reusable = True
 
     def close(self):
         """
-        Close the session
+        Close the session and return its connection to the driver
         """
         if self._open:
             self._open = False
-            self._connection.close()
+            # A connection in the middle of a stream, or of a response whose
+            # receiving was interrupted, cannot be reused
+            reusable = (
+                self._reusable
+                and (self._last_result is None or not self._last_result._streaming)
+                and len(self._pipelined_results) == 0
+            )
+            if self._last_result is not None:
+                self._last_result._stop()
+            self._last_result = None
+            self._pipelined_results.clear()
+            for result in list(self._results):
+                result.close()
+            self._results.clear()
+            self._driver._release(self, reusable)
 
     def __enter__(self):
         return self
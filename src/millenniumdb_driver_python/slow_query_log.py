@@ -0,0 +1,33 @@
+import logging
+
+from .query_stats import QueryHooks, QueryStats
+
+
+class SlowQueryLog(QueryHooks):
+    """
+    Logs the queries that take longer than a threshold, with the timing of
+    each step and the size of their result
+    """
+
+    DEFAULT_LOGGER_NAME = "millenniumdb_driver_python.slow_query"
+
+    # Longer queries are truncated in the log
+    MAX_QUERY_LENGTH = 1000
+
+    def __init__(self, threshold: float, logger: logging.Logger = None):
+        """
+        attributes:
+        threshold (float): The seconds above which a query is logged
+        _logger (logging.Logger): The logger the slow queries are logged to,
+            at the WARNING level
+        """
+        self.threshold = threshold
+        self._logger = logger or logging.getLogger(SlowQueryLog.DEFAULT_LOGGER_NAME)
+
+    def on_query_end(self, stats: QueryStats) -> None:
+        if stats.total_time < self.threshold:
+            return
+        query = str(stats.query)
+        if len(query) > SlowQueryLog.MAX_QUERY_LENGTH:
+            query = query[: SlowQueryLog.MAX_QUERY_LENGTH] + "..."
+        self._logger.warning("slow query %s: %s", stats, query)
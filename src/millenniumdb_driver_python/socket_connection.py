@@ -1,4 +1,7 @@
+import select
 import socket
+from time import perf_counter
+from typing import BinaryIO
 
 from . import protocol
 from .iobuffer import IOBuffer
@@ -10,14 +13,51 @@ class SocketConnection:
     Represents the socket connection to the server
     """
 
+    DEFAULT_READ_AHEAD_SIZE = 256 * 1024
+
     def __init__(
         self,
         host: str,
         port: int,
+        read_ahead_size: int = DEFAULT_READ_AHEAD_SIZE,
     ):
+        """
+        attributes:
+        host (str): The hostname of the server
+        port (int): The port of the server
+        address (str): The host and port of the server, as host:port
+        _read_ahead_size (int): The size of the blocks read from the socket,
+            0 reads exactly the requested bytes
+        _read_buffer (bytearray): The bytes read ahead from the socket
+        _read_start (int): The position of the next unconsumed byte in _read_buffer
+        _read_end (int): The position after the last byte read into _read_buffer
+        num_recv_calls (int): The number of recv calls made on the socket
+        num_bytes_received (int): The number of bytes received from the socket
+        recv_wait_time (float): The seconds spent in recv calls on the socket
+        connect_time (float): The seconds taken to connect and handshake
+        _capture_file (BinaryIO or None): The file the received bytes are
+            written to while capturing
+        _capture_start (int): The position in _read_buffer of the first
+            consumed byte not written to the capture file yet
+        """
+        self.host = host
+        self.port = port
+        self.address = f"{host}:{port}"
         self._connection_timeout = protocol.DEFAULT_CONNECTION_TIMEOUT
+        self._read_ahead_size = read_ahead_size
+        self._read_buffer = bytearray(read_ahead_size)
+        self._read_view = memoryview(self._read_buffer)
+        self._read_start = 0
+        self._read_end = 0
+        self.num_recv_calls = 0
+        self.num_bytes_received = 0
+        self.recv_wait_time = 0.0
+        self._capture_file = None
+        self._capture_start = 0
+        start = perf_counter()
         self._socket = self._create_socket(host, port)
         self._handshake()
+        self.connect_time = perf_counter() - start
 
     def sendall(self, iobuffer: IOBuffer) -> None:
         """
@@ -26,25 +66,103 @@ class SocketConnection:
         self._socket.sendall(iobuffer.view[: iobuffer.num_used_bytes])
 
     def recvall_into(self, iobuffer: IOBuffer, num_bytes: int) -> None:
+        """
+        Receive exactly num_bytes at the end of the used bytes of the iobuffer.
+        The bytes are copied from the read ahead buffer, which is refilled with
+        a single recv call of up to read_ahead_size bytes when empty. Requests
+        larger than the read ahead buffer are received directly
+        """
         end = iobuffer.num_used_bytes + num_bytes
         if end > len(iobuffer):
             iobuffer.extend(end - len(iobuffer))
 
         while iobuffer.num_used_bytes < end:
-            num_bytes_recv = self._socket.recv_into(
-                iobuffer.view[iobuffer.num_used_bytes : end],
-                end - iobuffer.num_used_bytes,
-            )
+            missing = end - iobuffer.num_used_bytes
+
+            if self._read_start == self._read_end:
+                if self._capture_file is not None:
+                    self._write_capture(self._read_end)
+                if missing >= self._read_ahead_size:
+                    start = iobuffer.num_used_bytes
+                    iobuffer.num_used_bytes += self._recv_into(iobuffer.view[start:end])
+                    if self._capture_file is not None:
+                        self._capture_file.write(
+                            iobuffer.view[start : iobuffer.num_used_bytes]
+                        )
+                    continue
+                self._read_start = 0
+                self._capture_start = 0
+                self._read_end = self._recv_into(self._read_view)
 
-            if num_bytes_recv == 0:
-                raise MillenniumDBError("SocketConnection Error: no data received")
+            num_copied_bytes = min(missing, self._read_end - self._read_start)
+            iobuffer.view[
+                iobuffer.num_used_bytes : iobuffer.num_used_bytes + num_copied_bytes
+            ] = self._read_view[self._read_start : self._read_start + num_copied_bytes]
+            iobuffer.num_used_bytes += num_copied_bytes
+            self._read_start += num_copied_bytes
 
-            iobuffer.num_used_bytes += num_bytes_recv
+    def start_capture(self, file: BinaryIO) -> None:
+        """
+        Write the bytes received from now on to a file, exactly as they were
+        sent by the server, until stop_capture is called. The bytes are
+        written when the read ahead buffer is refilled, not for each chunk
+
+        :param file: A file opened for writing bytes
+        """
+        self.stop_capture()
+        self._capture_file = file
+        self._capture_start = self._read_start
+
+    def stop_capture(self) -> None:
+        """
+        Write the bytes received since the capture started that have been
+        consumed, and stop capturing
+        """
+        if self._capture_file is not None:
+            try:
+                self._write_capture(self._read_start)
+            finally:
+                self._capture_file = None
+
+    def is_alive(self) -> bool:
+        """
+        Check that the connection can be reused. An idle connection must not
+        be readable, otherwise it was closed by the server or has unread data
+        """
+        if self._read_start != self._read_end:
+            return False
+        try:
+            readable, _, _ = select.select([self._socket], [], [], 0.0)
+        except (OSError, ValueError):
+            return False
+        return len(readable) == 0
+
+    def discard_received(self) -> bool:
+        """
+        Discard the data already received without waiting for more, for a
+        connection whose responses are not read
+
+        :return: False if the connection was closed by the server
+        """
+        self._read_start = 0
+        self._read_end = 0
+        try:
+            while select.select([self._socket], [], [], 0.0)[0]:
+                if len(self._socket.recv(4096)) == 0:
+                    return False
+        except (OSError, ValueError):
+            return False
+        return True
 
     def close(self) -> None:
         """
         Close the socket connection
         """
+        try:
+            self.stop_capture()
+        except (OSError, ValueError):
+            # The capture file was closed
+            pass
         try:
             self._socket.shutdown(socket.SHUT_RDWR)
         except OSError:
@@ -54,6 +172,27 @@ class SocketConnection:
         except OSError:
             pass
 
+    def _write_capture(self, end: int) -> None:
+        """
+        Write the bytes of the read ahead buffer up to end that have not been
+        written to the capture file
+        """
+        self._capture_file.write(self._read_view[self._capture_start : end])
+        self._capture_start = end
+
+    def _recv_into(self, view: memoryview) -> int:
+        """
+        Receive up to len(view) bytes with a single recv call
+        """
+        start = perf_counter()
+        num_bytes_recv = self._socket.recv_into(view, len(view))
+        self.recv_wait_time += perf_counter() - start
+        self.num_recv_calls += 1
+        if num_bytes_recv == 0:
+            raise MillenniumDBError("SocketConnection Error: no data received")
+        self.num_bytes_received += num_bytes_recv
+        return num_bytes_recv
+
     def _handshake(self) -> None:
         """
         Perform the handshake with the server
@@ -69,6 +208,9 @@ class SocketConnection:
             sock.settimeout(self._connection_timeout)
             sock.connect((host, port))
             sock.settimeout(None)
+            # Requests are small and written whole, waiting to coalesce them
+            # only delays them until the server acknowledges the previous one
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             return sock
         except socket.timeout as e:
             raise MillenniumDBError(
@@ -0,0 +1,192 @@
+import mmap
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Iterator, List
+
+from .intern_pool import InternPool
+from .iobuffer import IOBuffer
+from .lazy_records import MappedSequence
+from .message_decoder import MessageDecoder
+from .millenniumdb_error import MillenniumDBError
+
+
+class SpillFile:
+    """
+    Keeps the RECORD messages of a result that does not fit in its memory
+    budget in a temporary file, exactly as they were received. The messages
+    are decoded from a memory map of the file when they are read.
+
+    The file has no name and is deleted when it is closed or garbage
+    collected. Only the position of every CHECKPOINT_INTERVAL records is kept
+    in memory, and the pages of the map are released while they are read in
+    order, so reading a spilled result does not load the whole file
+    """
+
+    CHECKPOINT_INTERVAL = 1024
+
+    # The bytes read in order after which their pages are released
+    RELEASE_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, directory: str = None):
+        """
+        attributes:
+        num_records (int): The number of records in the file
+        num_bytes (int): The size of the file
+        _file (BinaryIO): The temporary file
+        _checkpoints (array): The position of every CHECKPOINT_INTERVAL records
+        _mmap (mmap or None): The memory map of the file once it is complete
+        """
+        self.num_records = 0
+        self.num_bytes = 0
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._checkpoints = array("Q")
+        self._mmap = None
+
+    def append(self, message: memoryview) -> None:
+        """
+        Append the bytes of a RECORD message
+        """
+        if self.num_records % SpillFile.CHECKPOINT_INTERVAL == 0:
+            self._checkpoints.append(self.num_bytes)
+        self._file.write(message)
+        self.num_records += 1
+        self.num_bytes += len(message)
+
+    def finish(self) -> None:
+        """
+        Map the file once all its records have been appended
+        """
+        self._file.flush()
+        if self.num_bytes > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def payloads(
+        self, start: int = 0, intern_pool: InternPool = None
+    ) -> Iterator[List[object]]:
+        """
+        Decode the values of the records from the given one on
+
+        :param start: The index of the first record
+        :param intern_pool: The pool of the shared graph objects of the result
+        """
+        if self._file.closed:
+            raise MillenniumDBError("Result Error: the spilled records were closed")
+        if start >= self.num_records:
+            return
+
+        iobuffer = IOBuffer(0)
+        view = memoryview(self._mmap)
+        try:
+            iobuffer.view = view
+            iobuffer.num_used_bytes = self.num_bytes
+            decoder = MessageDecoder(iobuffer)
+            decoder.set_intern_pool(intern_pool)
+
+            checkpoint = start // SpillFile.CHECKPOINT_INTERVAL
+            iobuffer._current_read_position = self._checkpoints[checkpoint]
+            for _ in range(checkpoint * SpillFile.CHECKPOINT_INTERVAL, start):
+                decoder.decode()
+
+            released = iobuffer._current_read_position
+            for _ in range(start, self.num_records):
+                yield decoder.decode()["payload"]
+
+                position = iobuffer._current_read_position
+                if position - released >= SpillFile.RELEASE_BYTES:
+                    released = self._release(released, position)
+        finally:
+            iobuffer.view = None
+            view.release()
+
+    def close(self) -> None:
+        """
+        Close and delete the file, its records cannot be read afterwards
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _release(self, start: int, end: int) -> int:
+        """
+        Release the pages of the map between two positions, they are read
+        again from the file if needed
+
+        :return: The position up to which the pages were released
+        """
+        start -= start % mmap.PAGESIZE
+        end -= end % mmap.PAGESIZE
+        if end > start and hasattr(self._mmap, "madvise"):
+            self._mmap.madvise(mmap.MADV_DONTNEED, start, end - start)
+        return end
+
+
+class SpilledRecords(Sequence):
+    """
+    The records of a result that were spilled to disk, after the records
+    that were kept in memory. The spilled records are decoded each time
+    they are read, reading them in order is much faster than by index
+    """
+
+    def __init__(
+        self,
+        records: List[object],
+        spill_file: SpillFile,
+        make_record: Callable[[List[object]], object],
+        intern_pool: InternPool = None,
+    ):
+        """
+        attributes:
+        _records (List[object]): The records kept in memory
+        _spill_file (SpillFile): The spilled records
+        _make_record (Callable[[List[object]], object]): Builds a record from
+            its decoded values
+        _intern_pool (InternPool or None): The pool of the shared graph objects
+        """
+        self._records = records
+        self._spill_file = spill_file
+        self._make_record = make_record
+        self._intern_pool = intern_pool
+
+    def map(self, function: Callable[[object], object]) -> "SpilledRecords":
+        """
+        Get the records converted by a function, that is called each time a
+        record is read
+        """
+        make_record = self._make_record
+        return SpilledRecords(
+            MappedSequence(self._records, function),
+            self._spill_file,
+            lambda values: function(make_record(values)),
+            self._intern_pool,
+        )
+
+    def __len__(self) -> int:
+        return len(self._records) + self._spill_file.num_records
+
+    def __iter__(self) -> Iterator[object]:
+        yield from self._records
+        make_record = self._make_record
+        for values in self._spill_file.payloads(0, self._intern_pool):
+            yield make_record(values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        if index < len(self._records):
+            return self._records[index]
+        values = next(
+            self._spill_file.payloads(index - len(self._records), self._intern_pool)
+        )
+        return self._make_record(values)
+
+    def __repr__(self) -> str:
+        return (
+            f"SpilledRecords<{len(self._records)} in memory, "
+            f"{self._spill_file.num_records} on disk>"
+        )
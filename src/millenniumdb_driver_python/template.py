@@ -0,0 +1,227 @@
+import math
+import re
+from decimal import Decimal
+from string import Template as _StringTemplate
+from typing import Callable, Dict, FrozenSet, Tuple
+
+from .graph_objects import (
+    IRI,
+    DateTime,
+    GraphAnon,
+    GraphEdge,
+    GraphNode,
+    SimpleDate,
+    StringDatatype,
+    StringLang,
+    Time,
+)
+from .millenniumdb_error import MillenniumDBError
+
+_XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# The characters that must be escaped inside a string literal
+_STRING_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+)
+_NEEDS_ESCAPE = re.compile(r'[\\"\n\r\t]')
+
+# The characters that cannot appear inside an IRI
+_IRI_FORBIDDEN = frozenset('<>"{}|^`\\ \t\n\r')
+
+
+def _encode_string(value: str) -> bytes:
+    # Most strings have nothing to escape, searching them is cheaper
+    if _NEEDS_ESCAPE.search(value) is not None:
+        value = value.translate(_STRING_ESCAPES)
+    return f'"{value}"'.encode("utf-8")
+
+
+def _encode_bool(value: bool) -> bytes:
+    return b"true" if value else b"false"
+
+
+def _encode_int(value: int) -> bytes:
+    return str(int(value)).encode("ascii")
+
+
+def _encode_float(value: float) -> bytes:
+    if not math.isfinite(value):
+        raise MillenniumDBError(f"Template Error: cannot bind the float {value}")
+    return repr(float(value)).encode("ascii")
+
+
+def _encode_decimal(value: Decimal) -> bytes:
+    if not value.is_finite():
+        raise MillenniumDBError(f"Template Error: cannot bind the decimal {value}")
+    return str(value).encode("ascii")
+
+
+def _encode_iri(value: IRI) -> bytes:
+    if any(char in _IRI_FORBIDDEN for char in value.iri):
+        raise MillenniumDBError(f"Template Error: invalid IRI {value.iri!r}")
+    return f"<{value.iri}>".encode("utf-8")
+
+
+def _encode_identifier(value: object) -> bytes:
+    # Nodes, edges and anonymous nodes are written as their bare identifier
+    identifier = value.id
+    if not identifier or not all(char.isalnum() or char == "_" for char in identifier):
+        raise MillenniumDBError(f"Template Error: invalid identifier {identifier!r}")
+    return identifier.encode("utf-8")
+
+
+def _encode_string_lang(value: StringLang) -> bytes:
+    if not value.lang or not all(char.isalnum() or char == "-" for char in value.lang):
+        raise MillenniumDBError(f"Template Error: invalid language tag {value.lang!r}")
+    return _encode_string(value.str) + b"@" + value.lang.encode("ascii")
+
+
+def _encode_string_datatype(value: StringDatatype) -> bytes:
+    return _encode_string(value.str) + b"^^" + _encode_iri(value.datatype)
+
+
+def _typed_literal_encoder(datatype: str) -> Callable[[object], bytes]:
+    suffix = f"^^<{_XSD}{datatype}>".encode("ascii")
+
+    def encode(value: object) -> bytes:
+        return _encode_string(str(value)) + suffix
+
+    return encode
+
+
+# The encoder of each parameter type, looked up by the exact type first
+_ENCODERS: Dict[type, Callable[[object], bytes]] = {
+    str: _encode_string,
+    bool: _encode_bool,
+    int: _encode_int,
+    float: _encode_float,
+    Decimal: _encode_decimal,
+    IRI: _encode_iri,
+    GraphNode: _encode_identifier,
+    GraphEdge: _encode_identifier,
+    GraphAnon: _encode_identifier,
+    StringLang: _encode_string_lang,
+    StringDatatype: _encode_string_datatype,
+    SimpleDate: _typed_literal_encoder("date"),
+    Time: _typed_literal_encoder("time"),
+    DateTime: _typed_literal_encoder("dateTime"),
+}
+
+
+def _encode_param(name: str, value: object) -> bytes:
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        # Subclasses of the supported types, checking bool before int
+        for cls, cls_encoder in _ENCODERS.items():
+            if isinstance(value, cls):
+                encoder = cls_encoder
+                break
+        else:
+            raise MillenniumDBError(
+                f"Template Error: cannot bind parameter '{name}' of type "
+                f"{type(value).__name__}"
+            )
+    return encoder(value)
+
+
+class BoundQuery:
+    """
+    A template with the values of its parameters, already encoded
+    """
+
+    __slots__ = ("query_bytes",)
+
+    def __init__(self, query_bytes: bytes):
+        """
+        attributes:
+        query_bytes (bytes): The UTF-8 encoded query
+        """
+        self.query_bytes = query_bytes
+
+    def __str__(self) -> str:
+        return str(self.query_bytes, "utf-8")
+
+    def __repr__(self) -> str:
+        return f"BoundQuery<{str(self)}>"
+
+
+class Template:
+    """
+    A query with $name or ${name} parameters, whose static parts are encoded
+    once. The parameters are escaped according to the type of their value
+    when the template is bound, so it is safe to bind untrusted strings.
+    A literal $ is written as $$
+    """
+
+    def __init__(self, template: str):
+        """
+        attributes:
+        template (str): The query with its parameters
+        _static_parts (Tuple[bytes]): The encoded parts between the parameters
+        _params (Tuple[str]): The name of each parameter, in order
+        _param_names (FrozenSet[str]): The distinct names of the parameters
+        """
+        self.template = template
+        static_parts = []
+        params = []
+        static_part = []
+        last_end = 0
+        for match in _StringTemplate.pattern.finditer(template):
+            static_part.append(template[last_end : match.start()])
+            last_end = match.end()
+            if match.group("escaped") is not None:
+                static_part.append("$")
+                continue
+
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                raise MillenniumDBError(
+                    f"Template Error: invalid parameter at position {match.start()},"
+                    " a literal $ is written as $$"
+                )
+            static_parts.append("".join(static_part).encode("utf-8"))
+            static_part = []
+            params.append(name)
+
+        static_part.append(template[last_end:])
+        static_parts.append("".join(static_part).encode("utf-8"))
+        self._static_parts: Tuple[bytes] = tuple(static_parts)
+        self._params: Tuple[str] = tuple(params)
+        self._param_names: FrozenSet[str] = frozenset(params)
+
+    def params(self) -> Tuple[str]:
+        """
+        Get the names of the parameters, in the order they appear
+        """
+        return self._params
+
+    def bind(self, **params) -> BoundQuery:
+        """
+        Get the query with the given values of its parameters
+
+        :param params: The value of each parameter, a str, bool, int, float,
+            Decimal, IRI, GraphNode, GraphEdge, GraphAnon, StringLang,
+            StringDatatype, SimpleDate, Time or DateTime
+        :return: The query that can be run by a session
+        """
+        static_parts = self._static_parts
+        parts = [static_parts[0]]
+        for i, name in enumerate(self._params):
+            try:
+                value = params[name]
+            except KeyError:
+                raise MillenniumDBError(
+                    f"Template Error: missing parameter '{name}'"
+                ) from None
+            parts.append(_encode_param(name, value))
+            parts.append(static_parts[i + 1])
+
+        if len(params) > len(self._param_names):
+            unknown = set(params) - self._param_names
+            raise MillenniumDBError(
+                f"Template Error: unknown parameters {sorted(unknown)}"
+            )
+        return BoundQuery(b"".join(parts))
+
+    def __repr__(self) -> str:
+        return f"Template<{self.template}>"
@@ -0,0 +1,41 @@
+from typing import Callable, List
+
+import pytest
+
+from benchmarks.mock_server import MockServer, encode_response
+
+VARIABLES = ["x", "y"]
+ROWS = [[i, f"s{i}"] for i in range(100)]
+
+
+@pytest.fixture
+def response() -> bytes:
+    """
+    The response of a query with two variables and a hundred records
+    """
+    return encode_response(VARIABLES, ROWS)
+
+
+@pytest.fixture
+def mock_server() -> Callable[..., MockServer]:
+    """
+    Start mock servers with the arguments of MockServer, closed after the test
+    """
+    servers: List[MockServer] = []
+
+    def start(response: bytes = b"", **kwargs) -> MockServer:
+        server = MockServer(response, **kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def server(mock_server, response) -> MockServer:
+    """
+    A mock server answering every query with the default response
+    """
+    return mock_server(response)
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import ResultError
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_a_cancelled_task_cancels_its_query(mock_server):
+    server = mock_server(hold_until_cancel=True)
+
+    async def main():
+        async with millenniumdb_driver_python.async_driver(server.url) as driver:
+            async with driver.session() as session:
+                result = await session.run("q", stream=True)
+                task = asyncio.ensure_future(result.records())
+                await asyncio.sleep(0.05)
+                task.cancel()
+                await _wait_for(lambda: "0" in server.cancel_times)
+
+    asyncio.run(main())
+
+
+def test_a_task_cancelled_before_the_variables_cancels_its_query(mock_server):
+    server = mock_server(hold_until_cancel=True, latency=0.2, workers=8)
+
+    async def main():
+        async with millenniumdb_driver_python.async_driver(server.url) as driver:
+            sessions = [driver.session() for _ in range(3)]
+            tasks = [asyncio.ensure_future(session.run("q")) for session in sessions]
+            await asyncio.sleep(0.05)
+            for task in tasks:
+                task.cancel()
+            # The variables arrive after the tasks are gone
+            await _wait_for(lambda: len(server.cancel_times) == 3)
+
+    asyncio.run(main())
+
+
+def test_a_timeout_cancels_the_query(mock_server):
+    server = mock_server(hold_until_cancel=True)
+
+    async def main():
+        async with millenniumdb_driver_python.async_driver(server.url) as driver:
+            async with driver.session() as session:
+                with pytest.raises(ResultError):
+                    result = await session.run("q", timeout=0.05)
+                    await result.records()
+            assert list(server.cancel_times) == ["0"]
+
+    asyncio.run(main())
@@ -0,0 +1,206 @@
+import queue
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError, protocol
+
+from benchmarks.mock_server import MockServer, encode_message, encode_value, frame
+
+from .conftest import ROWS
+
+SUCCESS_RESPONSE = frame(
+    encode_message(protocol.ResponseType.SUCCESS, encode_value({}))
+)
+ERROR_RESPONSE = frame(
+    encode_message(protocol.ResponseType.ERROR, encode_value("Update failed"))
+)
+
+
+class UpdateServer(MockServer):
+    """
+    Keeps the statements of each UPDATE request, failing the ones that
+    contain "fail". The responses are sent delay seconds after each request
+    by another thread, so the requests sent ahead of them are received, and
+    events keeps the order of the received requests and the sent responses
+    """
+
+    def __init__(self, response: bytes, delay: float = 0.0):
+        self.delay = delay
+        self.updates = []
+        self.events = []
+        super().__init__(response)
+
+    def _serve(self, client: socket.socket) -> None:
+        responses = queue.Queue()
+        responder = threading.Thread(
+            target=self._respond, args=[client, responses], daemon=True
+        )
+        responder.start()
+        with client:
+            try:
+                if _recv(client, 8) != protocol.DRIVER_PREAMBLE_BYTES:
+                    return
+                client.sendall(protocol.SERVER_PREAMBLE_BYTES)
+                while True:
+                    (size,) = struct.unpack(">I", _recv(client, 4))
+                    request = _recv(client, size)
+                    if request[0] == protocol.RequestType.UPDATE:
+                        update = request[6:].decode("utf-8")
+                        self.updates.append(update)
+                        self.events.append("request")
+                        failed = "fail" in update
+                        responses.put(ERROR_RESPONSE if failed else SUCCESS_RESPONSE)
+                    else:
+                        responses.put(self.response)
+            except (ConnectionError, OSError):
+                return
+            finally:
+                # The client is closed once nothing else is sent to it
+                responses.put(None)
+                responder.join()
+
+    def _respond(self, client: socket.socket, responses: queue.Queue) -> None:
+        try:
+            while (response := responses.get()) is not None:
+                time.sleep(self.delay)
+                if response is not self.response:
+                    self.events.append("response")
+                client.sendall(response)
+        except OSError:
+            return
+
+
+def _recv(client: socket.socket, num_bytes: int) -> bytes:
+    data = client.recv(num_bytes, socket.MSG_WAITALL)
+    if len(data) < num_bytes:
+        raise ConnectionError("client disconnected")
+    return data
+
+
+@pytest.fixture
+def update_server(response):
+    servers = []
+
+    def start(**kwargs) -> UpdateServer:
+        server = UpdateServer(response, **kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def _bulk_update(server: UpdateServer, updates, **options):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            bulk_update = session.bulk_update(updates, **options)
+            # The connection is ready for the next request
+            assert session.run("q").values() == ROWS
+            return bulk_update
+
+
+def test_statements_are_packed_up_to_batch_bytes(update_server):
+    server = update_server()
+    updates = [f"INSERT {i:03}" for i in range(10)]
+    # Three statements of 10 bytes and two separators of 2 bytes
+    bulk_update = _bulk_update(server, updates, batch_bytes=34)
+    assert server.updates == [
+        ";\n".join(updates[0:3]),
+        ";\n".join(updates[3:6]),
+        ";\n".join(updates[6:9]),
+        updates[9],
+    ]
+    stats = bulk_update.stats()
+    assert stats["statements"] == 10
+    assert stats["batches"] == 4
+    assert stats["bytes"] == sum(map(len, server.updates))
+    assert stats["failed_batches"] == 0
+
+
+def test_blank_statements_and_trailing_semicolons_are_dropped(update_server):
+    server = update_server()
+    updates = ["INSERT a;\n", "   ", "INSERT b ; ", "", "INSERT c"]
+    _bulk_update(server, updates, separator=" | ")
+    assert server.updates == ["INSERT a | INSERT b | INSERT c"]
+
+
+def test_a_statement_over_batch_bytes_is_sent_alone(update_server):
+    server = update_server()
+    updates = ["INSERT a", "INSERT " + "x" * 100, "INSERT b"]
+    _bulk_update(server, updates, batch_bytes=20)
+    assert server.updates == updates
+
+
+def test_a_failed_batch_does_not_stop_the_others(update_server):
+    server = update_server()
+    updates = ["INSERT a", "INSERT b", "fail c", "INSERT d", "fail e", "INSERT f"]
+    batches = []
+    bulk_update = _bulk_update(server, updates, batch_bytes=20, on_batch=batches.append)
+    assert len(server.updates) == 3
+    assert [batch.index for batch in batches] == [0, 1, 2]
+    assert [batch.succeeded for batch in batches] == [True, False, False]
+    failed = bulk_update.failed_batches()
+    assert [(batch.first_statement, batch.num_statements) for batch in failed] == [
+        (2, 2),
+        (4, 2),
+    ]
+    assert all(isinstance(batch.error, MillenniumDBError) for batch in failed)
+    assert bulk_update.stats()["failed_batches"] == 2
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 2, 4])
+def test_at_most_max_in_flight_batches_are_sent_ahead(update_server, max_in_flight):
+    server = update_server(delay=0.02)
+    updates = [f"INSERT {i}" for i in range(8)]
+    _bulk_update(server, updates, batch_bytes=1, max_in_flight=max_in_flight)
+    in_flight = []
+    for event in server.events:
+        previous = in_flight[-1] if in_flight else 0
+        in_flight.append(previous + (1 if event == "request" else -1))
+    assert max(in_flight) == max_in_flight
+
+
+def test_an_error_reading_the_statements_is_raised(update_server):
+    server = update_server(delay=0.01)
+
+    def updates():
+        for i in range(5):
+            yield f"INSERT {i}"
+        raise ValueError("bad input")
+
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            with pytest.raises(ValueError):
+                session.bulk_update(updates(), batch_bytes=1)
+            # Like any interrupted exchange, the session must be closed
+            with pytest.raises(MillenniumDBError):
+                session.run("q")
+        # The batch being filled when the error was raised is not sent
+        assert server.updates == [f"INSERT {i}" for i in range(4)]
+        with driver.session() as session:
+            assert session.run("q").values() == ROWS
+
+
+def test_a_failed_update_raises_after_its_response(update_server):
+    server = update_server()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            assert session.update("INSERT a") == {}
+            with pytest.raises(MillenniumDBError):
+                session.update("fail b")
+            assert session.run("q").values() == ROWS
+
+
+@pytest.mark.parametrize("options", [{"batch_bytes": 0}, {"max_in_flight": 0}])
+def test_batch_bytes_and_max_in_flight_must_be_positive(update_server, options):
+    server = update_server()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            with pytest.raises(MillenniumDBError):
+                session.bulk_update(["INSERT a"], **options)
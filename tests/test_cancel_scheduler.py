@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import ResultError
+from millenniumdb_driver_python.cancel_scheduler import CancelScheduler
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_a_query_is_cancelled_after_its_timeout(mock_server):
+    server = mock_server(hold_until_cancel=True)
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            with pytest.raises(ResultError):
+                session.run("q", timeout=0.05)
+        assert list(server.cancel_times) == ["0"]
+        # The query can fail before the scheduler counts its cancellation
+        _wait_for(lambda: driver.cancel_stats()["cancelled"] == 1)
+        stats = driver.cancel_stats()
+        assert stats["scheduled"] == 1
+        assert stats["cancelled"] == 1
+        assert stats["errors"] == 0
+
+
+def test_the_earliest_deadline_is_cancelled_first(mock_server):
+    server = mock_server(hold_until_cancel=True)
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as slow, driver.session() as fast:
+            slow.run("q", timeout=0.2, stream=True)
+            fast.run("q", timeout=0.02, stream=True)
+            _wait_for(lambda: len(server.cancel_times) == 2)
+        assert server.cancel_times["1"] < server.cancel_times["0"]
+
+
+def test_the_cancels_share_one_control_connection(mock_server):
+    server = mock_server(hold_until_cancel=True)
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        for _ in range(3):
+            with driver.session() as session:
+                with pytest.raises(ResultError):
+                    session.run("q", timeout=0.01)
+        assert len(server.cancel_times) == 3
+        assert len(driver._cancel_scheduler._connections) == 1
+
+
+def test_a_finished_query_is_not_cancelled(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            session.run("q", timeout=0.2).records()
+        time.sleep(0.3)
+        assert server.cancel_times == {}
+        assert driver.cancel_stats()["cancelled"] == 0
+
+
+def test_the_deadlines_of_finished_queries_are_compacted(server):
+    num_queries = 3 * CancelScheduler.MIN_COMPACT_SIZE
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            for _ in range(num_queries):
+                session.run("q", timeout=60.0).records()
+        stats = driver.cancel_stats()
+        assert stats["scheduled"] == num_queries
+        assert stats["pending"] <= CancelScheduler.MIN_COMPACT_SIZE
+
+
+def test_driver_cancel_stops_a_streamed_query(mock_server):
+    server = mock_server(hold_until_cancel=True)
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True)
+            driver.cancel(result)
+            with pytest.raises(ResultError):
+                list(result)
+        assert list(server.cancel_times) == ["0"]
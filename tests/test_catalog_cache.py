@@ -0,0 +1,164 @@
+import threading
+import time
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import protocol
+from millenniumdb_driver_python.catalog import Catalog
+from millenniumdb_driver_python.catalog_cache import CatalogCache
+
+
+class Fetcher:
+    """
+    Gets a catalog with a new version on each call. The calls wait for
+    release, or raise when failing is set
+    """
+
+    def __init__(self):
+        self.num_calls = 0
+        self.failing = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self) -> Catalog:
+        self.num_calls += 1
+        self.release.wait()
+        if self.failing:
+            raise ConnectionError("fetch failed")
+        return Catalog._from_summary(
+            {"modelId": protocol.ModelId.RDF_MODEL_ID, "version": self.num_calls}
+        )
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_the_catalog_is_fetched_once_within_its_ttl():
+    fetch = Fetcher()
+    cache = CatalogCache(fetch, ttl=60.0)
+    assert [cache.get().version for _ in range(5)] == [1] * 5
+    assert fetch.num_calls == 1
+    assert cache.stats() == {"hits": 4, "misses": 1, "refreshes": 0, "errors": 0}
+
+
+def test_a_ttl_of_zero_disables_the_cache():
+    fetch = Fetcher()
+    cache = CatalogCache(fetch, ttl=0.0)
+    assert [cache.get().version for _ in range(3)] == [1, 2, 3]
+    assert cache.stats()["misses"] == 3
+
+
+def test_an_expired_catalog_is_fetched_again():
+    fetch = Fetcher()
+    cache = CatalogCache(fetch, ttl=0.05)
+    assert cache.get().version == 1
+    time.sleep(0.06)
+    assert cache.get().version == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_an_old_catalog_is_refreshed_in_the_background():
+    fetch = Fetcher()
+    cache = CatalogCache(fetch, ttl=0.5)
+    cache.get()
+    time.sleep(0.5 * CatalogCache.REFRESH_FRACTION)
+    fetch.release.clear()
+    # The cached catalog is returned without waiting for the refresh
+    assert cache.get().version == 1
+    assert cache.get().version == 1
+    assert cache.stats()["refreshes"] == 1
+    fetch.release.set()
+    _wait_for(lambda: cache.get().version == 2)
+    assert fetch.num_calls == 2
+
+
+def test_concurrent_misses_wait_for_a_single_fetch():
+    fetch = Fetcher()
+    fetch.release.clear()
+    cache = CatalogCache(fetch)
+    versions = []
+    threads = [
+        threading.Thread(target=lambda: versions.append(cache.get().version))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: fetch.num_calls == 1)
+    fetch.release.set()
+    for thread in threads:
+        thread.join()
+    assert versions == [1] * 8
+    assert fetch.num_calls == 1
+
+
+def test_a_failed_refresh_keeps_the_cached_catalog():
+    fetch = Fetcher()
+    cache = CatalogCache(fetch, ttl=0.5)
+    cache.get()
+    time.sleep(0.5 * CatalogCache.REFRESH_FRACTION)
+    fetch.failing = True
+    assert cache.get().version == 1
+    _wait_for(lambda: cache.stats()["errors"] == 1)
+    assert cache.get().version == 1
+
+
+def test_a_failed_fetch_is_raised_to_the_caller():
+    fetch = Fetcher()
+    fetch.failing = True
+    cache = CatalogCache(fetch)
+    with pytest.raises(ConnectionError):
+        cache.get()
+    fetch.failing = False
+    assert cache.get().version == 2
+    assert cache.stats()["errors"] == 1
+
+
+def test_a_refresh_started_before_an_invalidation_is_not_stored():
+    fetch = Fetcher()
+    fetch.release.clear()
+    cache = CatalogCache(fetch)
+    thread = threading.Thread(target=cache.get)
+    thread.start()
+    _wait_for(lambda: fetch.num_calls == 1)
+    cache.invalidate()
+    fetch.release.set()
+    thread.join()
+    assert cache.get().version == 2
+
+
+def test_the_fetch_of_the_caller_does_not_start_a_refresh():
+    fetch = Fetcher()
+    own_fetch = Fetcher()
+    cache = CatalogCache(fetch, ttl=0.5)
+    assert cache.get(own_fetch).version == 1
+    time.sleep(0.5 * CatalogCache.REFRESH_FRACTION)
+    assert cache.get(own_fetch).version == 1
+    assert cache.stats()["refreshes"] == 0
+    assert fetch.num_calls == 0
+
+
+def test_a_closed_cache_does_not_refresh():
+    fetch = Fetcher()
+    cache = CatalogCache(fetch, ttl=0.5)
+    cache.get()
+    cache.close()
+    time.sleep(0.5 * CatalogCache.REFRESH_FRACTION)
+    assert cache.get().version == 1
+    assert cache.stats()["refreshes"] == 0
+
+
+def test_the_driver_caches_its_catalog(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        first = driver.catalog()
+        assert driver.catalog() is first
+        assert driver.catalog_stats()["misses"] == 1
+        driver.invalidate_catalog()
+        second = driver.catalog()
+        assert second is not first
+        assert (second.model_id, second.version) == (first.model_id, first.version)
+        assert driver.catalog_stats()["misses"] == 2
@@ -0,0 +1,117 @@
+import struct
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import protocol
+from millenniumdb_driver_python.column_builder import Column
+from millenniumdb_driver_python.graph_objects import GraphNode
+
+from benchmarks.mock_server import (
+    encode_float,
+    encode_message,
+    encode_response,
+    encode_uint,
+    encode_variables,
+    frame,
+)
+
+numpy = pytest.importorskip("numpy")
+
+VARIABLES = ["int", "float", "bool", "string", "mixed", "nullable", "node"]
+ROWS = [
+    [
+        i,
+        i / 2,
+        i % 2 == 0,
+        f"s{i % 3}",
+        i if i % 2 else str(i),
+        None,
+        GraphNode(f"Q{i}"),
+    ]
+    for i in range(50)
+]
+ROWS[10][5] = 1.5
+
+
+def _run(server, **options):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", **options)
+            result.records()
+            return result
+
+
+@pytest.fixture
+def mixed_server(mock_server):
+    return mock_server(encode_response(VARIABLES, ROWS))
+
+
+def test_columns_of_one_type_are_typed_arrays(mixed_server):
+    arrays = _run(mixed_server, columnar=True).to_numpy()
+    assert list(arrays) == VARIABLES
+    assert arrays["int"].dtype == numpy.int64
+    assert arrays["float"].dtype == numpy.float64
+    assert arrays["bool"].dtype == numpy.bool_
+    for variable in ["string", "mixed", "nullable", "node"]:
+        assert arrays[variable].dtype == object
+    for i, variable in enumerate(VARIABLES):
+        assert arrays[variable].tolist() == [row[i] for row in ROWS]
+
+
+def test_columnar_and_row_results_give_the_same_arrays(mixed_server):
+    columnar = _run(mixed_server, columnar=True).to_numpy()
+    rows = _run(mixed_server).to_numpy()
+    for variable in VARIABLES:
+        assert columnar[variable].dtype == rows[variable].dtype
+        assert columnar[variable].tolist() == rows[variable].tolist()
+
+
+def test_a_columnar_result_has_the_same_records(mixed_server):
+    result = _run(mixed_server, columnar=True)
+    assert result.values() == ROWS
+    assert result[3].values() == ROWS[3]
+    assert len(result) == len(ROWS)
+
+
+def test_unsigned_and_single_precision_values_keep_their_types(mock_server):
+    response = bytearray(encode_variables(["u8", "u64", "f32"]))
+    for i in range(5):
+        payload = struct.pack(">BI", protocol.DataType.LIST, 3)
+        payload += encode_uint(protocol.DataType.UINT8, i)
+        payload += encode_uint(protocol.DataType.UINT64, 2**64 - 1 - i)
+        payload += encode_float(i + 0.5)
+        response += frame(encode_message(protocol.ResponseType.RECORD, payload))
+    response += frame(encode_message(protocol.ResponseType.SUCCESS, b"\x00"))
+    arrays = _run(mock_server(bytes(response)), columnar=True).to_numpy()
+    assert arrays["u8"].dtype == numpy.uint8
+    assert arrays["u64"].tolist() == [2**64 - 1 - i for i in range(5)]
+    assert arrays["f32"].dtype == numpy.float32
+    assert arrays["f32"].tolist() == [i + 0.5 for i in range(5)]
+
+
+def test_a_column_falls_back_to_objects_on_mixed_types():
+    column = Column()
+    for value in [True, False, 7]:
+        column.append_value(value)
+    assert not column.is_typed()
+    # The booleans of the typed array are booleans again, not 0 and 1
+    assert [type(value) for value in column.values()] == [bool, bool, int]
+
+
+def test_integers_out_of_int64_are_objects():
+    column = Column()
+    column.append_value(2**63)
+    assert not column.is_typed()
+    assert column.to_numpy().tolist() == [2**63]
+
+
+def test_columnar_to_df_is_the_same_as_the_row_to_df(mixed_server):
+    pytest.importorskip("pandas")
+    columnar = _run(mixed_server, columnar=True).to_df()
+    rows = _run(mixed_server).to_df()
+    assert list(columnar.columns) == VARIABLES
+    assert columnar.equals(rows)
+    categorical = _run(mixed_server, columnar=True).to_df(categorical=True)
+    assert str(categorical["string"].dtype) == "category"
+    assert str(categorical["int"].dtype) == "int64"
@@ -0,0 +1,80 @@
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError, QueryHooks
+
+from .conftest import ROWS
+
+
+def test_sessions_reuse_the_pooled_connection(server):
+    with millenniumdb_driver_python.driver(server.url, min_pool_size=0) as driver:
+        connections = []
+        for _ in range(3):
+            with driver.session() as session:
+                connections.append(session._connection)
+                assert session.run("q").values() == ROWS
+
+        assert connections[0] is connections[1] is connections[2]
+        stats = driver.pool_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+        assert stats["size"] == 1
+
+
+def test_concurrent_sessions_get_their_own_connections(server):
+    with millenniumdb_driver_python.driver(server.url, min_pool_size=0) as driver:
+        with driver.session() as first, driver.session() as second:
+            assert first._connection is not second._connection
+            assert driver.pool_stats()["in_use"] == 2
+        assert driver.pool_stats()["idle"] == 2
+
+
+def test_acquire_times_out_when_the_pool_is_full(server):
+    with millenniumdb_driver_python.driver(
+        server.url, min_pool_size=0, max_pool_size=1
+    ) as driver:
+        with driver.session():
+            with pytest.raises(MillenniumDBError):
+                driver.session(acquire_timeout=0.05)
+        with driver.session() as session:
+            assert len(session.run("q").records()) == len(ROWS)
+
+
+def test_a_stream_left_unread_is_not_pooled(server):
+    with millenniumdb_driver_python.driver(server.url, min_pool_size=0) as driver:
+        with driver.session() as session:
+            connection = session._connection
+            result = session.run("q", stream=True)
+            next(iter(result))
+        assert driver.pool_stats()["size"] == 0
+
+        with driver.session() as session:
+            assert session._connection is not connection
+            assert session.run("q").values() == ROWS
+
+
+class _FailOnFirstRecord(QueryHooks):
+    def on_first_record(self, stats):
+        raise RuntimeError("hook failed")
+
+
+def test_an_interrupted_response_is_not_pooled(server):
+    with millenniumdb_driver_python.driver(
+        server.url, min_pool_size=0, hooks=[_FailOnFirstRecord()]
+    ) as driver:
+        with driver.session() as session:
+            with pytest.raises(RuntimeError):
+                session.run("q")
+            # The rest of the response is still unread on the connection
+            with pytest.raises(MillenniumDBError):
+                session.run("q")
+        assert driver.pool_stats()["size"] == 0
+
+
+def test_a_failed_query_keeps_the_connection(mock_server):
+    server = mock_server(hold_until_cancel=True)
+    with millenniumdb_driver_python.driver(server.url, min_pool_size=0) as driver:
+        with driver.session() as session:
+            with pytest.raises(millenniumdb_driver_python.ResultError):
+                session.run("q", timeout=0.01)
+        assert driver.pool_stats()["idle"] == 1
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError
+from millenniumdb_driver_python.exporter import Export, to_json, to_text
+from millenniumdb_driver_python.graph_objects import IRI
+
+from benchmarks.mock_server import encode_response
+
+VARIABLES = ["late", "number", "mixed", "flag", "empty", "iri"]
+
+# Each column changes its type after the first batches of two rows
+ROWS = [
+    [None, 1, 1, True, None, IRI("http://a")],
+    [None, 2, 2, None, None, None],
+    [3, 3.5, "three", False, None, IRI("http://b")],
+    [None, 4, 4.0, True, None, None],
+    [5, None, None, None, None, IRI("http://c")],
+]
+
+
+def _export(format: str, rows=ROWS, batch_rows: int = 2) -> bytes:
+    file = io.BytesIO()
+    export = Export(VARIABLES, iter(rows), file, format, batch_rows)
+    assert export.stats()["rows"] == len(rows)
+    return file.getvalue()
+
+
+def _read_parquet(file) -> "pyarrow.Table":
+    parquet = pytest.importorskip("pyarrow.parquet")
+    return parquet.read_table(io.BytesIO(file) if isinstance(file, bytes) else file)
+
+
+def test_csv_round_trip():
+    lines = list(csv.reader(io.StringIO(_export("csv").decode("utf-8"))))
+    assert lines[0] == VARIABLES
+    assert lines[1:] == [[to_text(value) for value in row] for row in ROWS]
+
+
+def test_ndjson_round_trip():
+    lines = _export("ndjson").decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [
+        dict(zip(VARIABLES, map(to_json, row))) for row in ROWS
+    ]
+
+
+def test_parquet_widens_the_types_of_later_batches():
+    pyarrow = pytest.importorskip("pyarrow")
+    table = _read_parquet(_export("parquet"))
+    assert [field.type for field in table.schema] == [
+        pyarrow.int64(),
+        pyarrow.float64(),
+        pyarrow.string(),
+        pyarrow.bool_(),
+        pyarrow.string(),
+        pyarrow.string(),
+    ]
+    assert table.to_pydict() == {
+        "late": [None, None, 3, None, 5],
+        "number": [1.0, 2.0, 3.5, 4.0, None],
+        "mixed": ["1", "2", "three", "4.0", None],
+        "flag": [True, None, False, True, None],
+        "empty": [None] * 5,
+        "iri": ["<http://a>", None, "<http://b>", None, "<http://c>"],
+    }
+
+
+@pytest.mark.parametrize("batch_rows", [1, 2, 10])
+def test_parquet_does_not_depend_on_the_batches(batch_rows):
+    table = _read_parquet(_export("parquet"))
+    other = _read_parquet(_export("parquet", batch_rows=batch_rows))
+    assert other.equals(table)
+
+
+def test_parquet_keeps_integers_out_of_int64_as_text():
+    rows = [[2**63, 1.5, None, None, None, None], [1, 2, None, None, None, None]]
+    table = _read_parquet(_export("parquet", rows))
+    assert table.column("late").to_pylist() == [str(2**63), "1"]
+    assert table.column("number").to_pylist() == [1.5, 2.0]
+
+
+def test_empty_parquet_export():
+    table = _read_parquet(_export("parquet", []))
+    assert table.num_rows == 0
+    assert table.schema.names == VARIABLES
+
+
+def test_export_from_a_session(mock_server, tmp_path):
+    pytest.importorskip("pyarrow")
+    rows = [[row[0], row[1], row[2], row[3], row[4]] for row in ROWS]
+    server = mock_server(encode_response(VARIABLES[:5], rows))
+    path = str(tmp_path / "result.parquet")
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            export = session.export("q", path, "parquet", batch_rows=2)
+    assert export.stats()["rows"] == len(rows)
+    table = _read_parquet(path)
+    assert table.column("number").to_pylist() == [1.0, 2.0, 3.5, 4.0, None]
+    assert table.column("mixed").to_pylist() == ["1", "2", "three", "4.0", None]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(MillenniumDBError):
+        Export(VARIABLES, iter(ROWS), io.BytesIO(), "xml")
@@ -0,0 +1,98 @@
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError, PrefetchStorage, ResultError
+
+from .conftest import ROWS
+
+
+def _values(result) -> list:
+    return [record.values() for record in result.records()]
+
+
+def test_the_outcomes_are_in_the_order_of_the_queries(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        fan_out = driver.run_all(["q"] * 20, concurrency=4)
+        outcomes = fan_out.outcomes()
+        assert [outcome.index for outcome in outcomes] == list(range(20))
+        assert all(outcome.succeeded for outcome in outcomes)
+        assert _values(outcomes[0].result) == ROWS
+        stats = fan_out.stats()
+        assert stats["queries"] == 20
+        assert stats["failed_queries"] == 0
+        assert stats["concurrency"] == 4
+
+
+def test_unordered_outcomes_are_all_yielded(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        outcomes = list(driver.run_all(["q"] * 20, concurrency=4, ordered=False))
+        assert sorted(outcome.index for outcome in outcomes) == list(range(20))
+
+
+def test_a_failed_query_does_not_affect_the_others(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        fan_out = driver.run_all(["q", 5, "q", "q"], concurrency=2)
+        outcomes = fan_out.outcomes()
+        assert len(outcomes) == 4
+        assert [outcome.succeeded for outcome in outcomes] == [
+            True,
+            False,
+            True,
+            True,
+        ]
+        assert not isinstance(outcomes[1].error, ResultError)
+        assert outcomes[1].stats is None
+        for outcome in (outcomes[0], outcomes[2], outcomes[3]):
+            assert _values(outcome.result) == ROWS
+
+        results = fan_out.results()
+        assert results[1] is outcomes[1].error
+        assert fan_out.stats()["failed_queries"] == 1
+
+
+def test_a_query_failed_on_the_server_keeps_its_result_error(mock_server):
+    server = mock_server(hold_until_cancel=True, workers=8)
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        outcomes = driver.run_all(["q"] * 3, concurrency=3, timeout=0.05).outcomes()
+        assert all(isinstance(outcome.error, ResultError) for outcome in outcomes)
+        assert all(outcome.stats is not None for outcome in outcomes)
+        assert len(server.cancel_times) == 3
+
+
+def test_an_error_of_the_queries_is_raised_after_the_outcomes(server):
+    def queries():
+        yield "q"
+        yield "q"
+        raise ValueError("no more queries")
+
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        fan_out = driver.run_all(queries(), concurrency=1)
+        with pytest.raises(MillenniumDBError) as error:
+            fan_out.outcomes()
+        assert isinstance(error.value.__cause__, ValueError)
+        assert fan_out.stats()["queries"] == 2
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"concurrency": 0},
+        {"limit": 10},
+        {"stream": True},
+        {"storage": PrefetchStorage(10)},
+    ],
+)
+def test_invalid_options_are_rejected_before_running(server, options):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with pytest.raises(MillenniumDBError):
+            driver.run_all(["q"], **options)
+
+
+def test_the_workers_are_bounded_by_the_pool(mock_server, response):
+    server = mock_server(response, latency=0.02, workers=8)
+    with millenniumdb_driver_python.driver(server.url, max_pool_size=2) as driver:
+        fan_out = driver.run_all(["q"] * 20, concurrency=8, acquire_timeout=0.05)
+        outcomes = fan_out.outcomes()
+        assert all(outcome.succeeded for outcome in outcomes)
+        assert fan_out.stats()["concurrency"] == 2
+        assert driver.pool_stats()["size"] <= 2
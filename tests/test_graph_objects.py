@@ -0,0 +1,78 @@
+import pickle
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python.graph_objects import (
+    IRI,
+    GraphNode,
+    GraphPath,
+    GraphPathSegment,
+)
+
+from benchmarks.mock_server import encode_response, make_path
+
+TYPE = IRI("http://example.org/p")
+
+
+def _segments() -> list:
+    a, b, c = GraphNode("Q0"), GraphNode("Q1"), GraphNode("Q2")
+    return [GraphPathSegment(a, b, TYPE, False), GraphPathSegment(b, c, TYPE, True)]
+
+
+def test_a_path_is_built_with_the_original_arguments():
+    segments = _segments()
+    path = GraphPath(segments[0].from_, segments[-1].to, segments)
+    assert path.start == GraphNode("Q0")
+    assert path.end == GraphNode("Q2")
+    assert path.length == len(path) == 2
+    assert path.segments == segments
+    assert path.nodes() == (GraphNode("Q0"), GraphNode("Q1"), GraphNode("Q2"))
+    assert path.edges() == (TYPE, TYPE)
+    assert path.reverse_flags() == b"\x00\x01"
+
+
+def test_the_ways_of_building_a_path_are_equal():
+    segments = _segments()
+    path = GraphPath(segments[0].from_, segments[-1].to, segments)
+    from_segments = GraphPath.from_segments(segments[0].from_, segments)
+    from_flat = GraphPath.from_flat(path.nodes(), path.edges(), b"\x00\x01")
+    assert path == from_segments == from_flat
+    assert hash(path) == hash(from_segments) == hash(from_flat)
+    assert from_flat.segments == segments
+
+
+def test_an_empty_path_ends_where_it_starts():
+    path = GraphPath.from_segments(GraphNode("Q0"), [])
+    assert path.start == path.end == GraphNode("Q0")
+    assert path.length == 0
+    assert path.segments == []
+
+
+def test_the_segments_are_created_once():
+    path = make_path(3)
+    flat = GraphPath.from_flat(path.nodes(), path.edges(), path.reverse_flags())
+    assert flat._segments is None
+    assert list(flat.iter_segments()) == path.segments
+    assert flat._segments is None
+    assert flat.segments is flat.segments
+
+
+def test_a_path_survives_pickling():
+    path = make_path(4)
+    path.segments
+    copy = pickle.loads(pickle.dumps(path))
+    assert copy == path
+    assert copy.segments == path.segments
+
+
+def test_the_received_paths_match_the_response(mock_server):
+    paths = [make_path(length, start=10 * length) for length in range(4)]
+    server = mock_server(encode_response(["p"], [[path] for path in paths]))
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            received = [record.get("p") for record in session.run("q").records()]
+    assert received == paths
+    for path, expected in zip(received, paths):
+        assert path.segments == expected.segments
+        assert [segment.reverse for segment in path.segments] == [
+            segment.reverse == 1 for segment in expected.segments
+        ]
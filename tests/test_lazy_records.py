@@ -0,0 +1,114 @@
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import LazyStorage, protocol
+from millenniumdb_driver_python.graph_objects import GraphNode
+from millenniumdb_driver_python.intern_pool import InternPool
+from millenniumdb_driver_python.lazy_records import LazyRecords
+
+from benchmarks.mock_server import encode_message, encode_value
+
+from .conftest import ROWS
+
+RECORDS = [[i, f"s{i}", GraphNode(f"Q{i % 3}")] for i in range(20)]
+
+
+def _lazy_records(rows=RECORDS, **kwargs) -> LazyRecords:
+    records = LazyRecords(tuple, **kwargs)
+    for row in rows:
+        records.append(
+            memoryview(encode_message(protocol.ResponseType.RECORD, encode_value(row)))
+        )
+    records.finish()
+    return records
+
+
+def test_records_are_read_by_index():
+    records = _lazy_records()
+    assert len(records) == len(RECORDS)
+    assert records[0] == tuple(RECORDS[0])
+    assert records[7] == tuple(RECORDS[7])
+    assert records[-1] == tuple(RECORDS[-1])
+    assert records[-len(RECORDS)] == tuple(RECORDS[0])
+    for index in [len(RECORDS), -len(RECORDS) - 1]:
+        with pytest.raises(IndexError):
+            records[index]
+
+
+@pytest.mark.parametrize(
+    "index",
+    [slice(None), slice(3, 9), slice(None, None, 4), slice(-5, None), slice(15, 2, -3)],
+)
+def test_slices_are_lists_of_records(index):
+    records = _lazy_records()
+    assert records[index] == [tuple(row) for row in RECORDS[index]]
+
+
+def test_an_empty_slice_is_an_empty_list():
+    records = _lazy_records()
+    assert records[5:5] == []
+    assert records[100:] == []
+
+
+def test_iterating_gives_the_records_in_order():
+    records = _lazy_records()
+    assert list(records) == [tuple(row) for row in RECORDS]
+    # Iterating does not fill the cache of the records read by index
+    assert len(records._cache) == 0
+
+
+def test_the_cache_keeps_the_records_read_last():
+    records = _lazy_records(cache_size=2)
+    first = records[0]
+    assert records[0] is first
+    second = records[1]
+    records[0]
+    records[2]
+    # The least recently read record was evicted, not the first one read
+    assert list(records._cache) == [0, 2]
+    assert records[0] is first
+    assert records[1] is not second
+    assert records[1] == second
+
+
+def test_the_sequence_methods_decode_the_records():
+    records = _lazy_records()
+    assert tuple(RECORDS[4]) in records
+    assert records.index(tuple(RECORDS[4])) == 4
+    assert list(reversed(records)) == [tuple(row) for row in reversed(RECORDS)]
+
+
+def test_mapped_records_are_converted_when_read():
+    mapped = _lazy_records().map(lambda record: record[0])
+    assert len(mapped) == len(RECORDS)
+    assert mapped[3] == 3
+    assert mapped[-2:] == [18, 19]
+    assert list(mapped) == list(range(len(RECORDS)))
+
+
+def test_the_kept_bytes_are_the_messages_and_their_positions():
+    messages = [
+        encode_message(protocol.ResponseType.RECORD, encode_value(row))
+        for row in RECORDS
+    ]
+    records = _lazy_records()
+    assert records.num_bytes() == sum(map(len, messages)) + 8 * len(RECORDS)
+
+
+def test_repeated_objects_are_interned():
+    records = _lazy_records(intern_pool=InternPool())
+    assert records[0][2] is records[3][2]
+    assert records[0][2] is list(records)[6][2]
+
+
+def test_a_lazy_result_supports_indexes_and_slices(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", storage=LazyStorage())
+            assert result[-1].values() == ROWS[-1]
+            assert [record.values() for record in result[::-7]] == ROWS[::-7]
+            assert [record.get("y") for record in result[10:13]] == [
+                "s10",
+                "s11",
+                "s12",
+            ]
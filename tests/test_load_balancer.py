@@ -0,0 +1,180 @@
+import socket
+import time
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError, ResultError, protocol
+
+from benchmarks.mock_server import encode_message, encode_response, encode_value, frame
+
+ERROR_RESPONSE = frame(
+    encode_message(protocol.ResponseType.ERROR, encode_value("Query failed"))
+)
+
+
+def _unreachable_url() -> str:
+    # A port that was free a moment ago, nothing listens on it
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"mdb://127.0.0.1:{port}"
+
+
+def _address(url: str) -> str:
+    return url[len("mdb://") :]
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_least_outstanding_picks_the_host_with_fewer_sessions(server, mock_server):
+    other = mock_server(server.response)
+    with millenniumdb_driver_python.driver([server.url, other.url]) as driver:
+        with driver.session() as first, driver.session() as second:
+            first_host = first.run("q").stats().host
+            second_host = second.run("q").stats().host
+        assert {first_host, second_host} == {_address(server.url), _address(other.url)}
+
+
+def test_ewma_prefers_the_faster_host(server, mock_server):
+    slow = mock_server(server.response, latency=0.05)
+    with millenniumdb_driver_python.driver(
+        [server.url, slow.url], load_balancing="ewma"
+    ) as driver:
+        for _ in range(10):
+            with driver.session() as session:
+                session.run("q").records()
+        host_stats = driver.host_stats()
+    assert host_stats[_address(slow.url)]["requests"] <= 2
+    assert host_stats[_address(server.url)]["requests"] >= 8
+
+
+def test_unknown_strategy_is_rejected(server, mock_server):
+    other = mock_server(server.response)
+    with pytest.raises(MillenniumDBError):
+        millenniumdb_driver_python.driver(
+            [server.url, other.url], load_balancing="random"
+        )
+
+
+def test_an_unreachable_host_is_ejected(server):
+    url = _unreachable_url()
+    with millenniumdb_driver_python.driver([server.url, url]) as driver:
+        for _ in range(5):
+            with driver.session() as session:
+                assert len(session.run("q").records()) == 100
+        host_stats = driver.host_stats()[_address(url)]
+    assert not host_stats["healthy"]
+    assert host_stats["ejections"] == 1
+    assert host_stats["requests"] == 0
+
+
+def test_a_host_whose_queries_fail_is_ejected(server, mock_server):
+    failing = mock_server(ERROR_RESPONSE)
+    with millenniumdb_driver_python.driver(
+        [server.url, failing.url], eject_errors=2
+    ) as driver:
+        for _ in range(10):
+            with driver.session() as session:
+                try:
+                    session.run("q")
+                except ResultError:
+                    pass
+        host_stats = driver.host_stats()[_address(failing.url)]
+    assert not host_stats["healthy"]
+    assert host_stats["ejections"] == 1
+    assert host_stats["errors"] == 2
+    assert host_stats["failures"] == 0
+
+
+def test_a_host_whose_queries_time_out_is_ejected(server, mock_server):
+    hanging = mock_server(hold_until_cancel=True)
+    with millenniumdb_driver_python.driver(
+        [server.url, hanging.url], eject_errors=1
+    ) as driver:
+        for _ in range(4):
+            with driver.session() as session:
+                try:
+                    session.run("q", timeout=0.01)
+                except ResultError:
+                    pass
+        host_stats = driver.host_stats()[_address(hanging.url)]
+    assert not host_stats["healthy"]
+    assert host_stats["errors"] == 1
+
+
+def test_a_success_resets_the_errors_in_a_row(mock_server):
+    servers = [mock_server(ERROR_RESPONSE) for _ in range(2)]
+    with millenniumdb_driver_python.driver(
+        [server.url for server in servers], eject_errors=2
+    ) as driver:
+        # The idle hosts take the sessions in turns
+        for response in [ERROR_RESPONSE, encode_response(["x"], [[1]])] * 2:
+            for server in servers:
+                server.response = response
+            for _ in range(len(servers)):
+                with driver.session() as session:
+                    try:
+                        session.run("q")
+                    except ResultError:
+                        pass
+        host_stats = driver.host_stats()
+    assert [host["errors"] for host in host_stats.values()] == [2, 2]
+    assert all(host["healthy"] for host in host_stats.values())
+
+
+def test_query_errors_do_not_eject_with_eject_errors_0(server, mock_server):
+    failing = mock_server(ERROR_RESPONSE)
+    with millenniumdb_driver_python.driver(
+        [server.url, failing.url], eject_errors=0
+    ) as driver:
+        for _ in range(6):
+            with driver.session() as session:
+                try:
+                    session.run("q")
+                except ResultError:
+                    pass
+        host_stats = driver.host_stats()[_address(failing.url)]
+    assert host_stats["healthy"]
+    assert host_stats["errors"] == 3
+
+
+def test_an_ejected_host_is_probed_and_restored(server, mock_server):
+    failing = mock_server(ERROR_RESPONSE)
+    address = _address(failing.url)
+    with millenniumdb_driver_python.driver(
+        [server.url, failing.url], eject_errors=1, eject_time=0.05
+    ) as driver:
+        for _ in range(2):
+            with driver.session() as session:
+                try:
+                    session.run("q")
+                except ResultError:
+                    pass
+        assert not driver.host_stats()[address]["healthy"]
+
+        time.sleep(0.1)
+        # The catalog of the host is answered, so the probe restores it
+        with driver.session():
+            pass
+        _wait_for(lambda: driver.host_stats()[address]["healthy"])
+
+
+def test_a_failed_probe_keeps_the_host_ejected(server):
+    address = _address(_unreachable_url())
+    with millenniumdb_driver_python.driver(
+        [server.url, f"mdb://{address}"], eject_time=0.05
+    ) as driver:
+        while driver.host_stats()[address]["healthy"]:
+            with driver.session():
+                pass
+        time.sleep(0.1)
+        with driver.session():
+            pass
+        _wait_for(lambda: driver.host_stats()[address]["failures"] >= 2)
+        assert not driver.host_stats()[address]["healthy"]
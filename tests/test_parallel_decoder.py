@@ -0,0 +1,102 @@
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError, ParallelStorage, protocol
+from millenniumdb_driver_python.parallel_decoder import ParallelDecoder
+
+from benchmarks.mock_server import encode_message, encode_response, encode_value
+
+MESSAGES = [
+    encode_message(protocol.ResponseType.RECORD, encode_value([i, f"s{i}" * (i % 7)]))
+    for i in range(3_000)
+]
+VALUES = [(i, f"s{i}" * (i % 7)) for i in range(3_000)]
+NUM_BYTES = sum(map(len, MESSAGES))
+
+
+@pytest.fixture(scope="module")
+def parallel_decoder():
+    parallel_decoder = ParallelDecoder(2, threshold=NUM_BYTES // 4, batch_bytes=1024)
+    yield parallel_decoder
+    parallel_decoder.close()
+
+
+def _decode(parallel_decoder: ParallelDecoder, messages=MESSAGES):
+    batches = parallel_decoder.batches()
+    for message in messages:
+        batches.append(memoryview(message))
+    return batches, list(batches.values())
+
+
+def test_the_batches_are_decoded_in_order(parallel_decoder):
+    batches, values = _decode(parallel_decoder)
+    assert batches.is_parallel()
+    assert values == VALUES
+
+
+def test_a_small_result_is_decoded_without_the_pool():
+    parallel_decoder = ParallelDecoder(2, threshold=NUM_BYTES + 1, batch_bytes=1024)
+    try:
+        batches, values = _decode(parallel_decoder)
+        assert not batches.is_parallel()
+        assert values == VALUES
+        assert parallel_decoder._executor is None
+    finally:
+        parallel_decoder.close()
+
+
+def test_a_batch_holds_whole_messages(parallel_decoder):
+    # Batches larger than the threshold, and messages larger than a batch
+    messages = [
+        encode_message(protocol.ResponseType.RECORD, encode_value([i, "x" * 5000]))
+        for i in range(20)
+    ]
+    batches, values = _decode(parallel_decoder, messages)
+    assert batches.is_parallel()
+    assert values == [(i, "x" * 5000) for i in range(20)]
+
+
+def test_the_batches_are_released_once_read(parallel_decoder):
+    batches, _ = _decode(parallel_decoder)
+    assert batches._batches == []
+    assert list(batches.values()) == []
+
+
+@pytest.mark.parametrize("threshold", [0, NUM_BYTES + 1])
+def test_a_decoding_error_is_a_millenniumdb_error(threshold):
+    parallel_decoder = ParallelDecoder(1, threshold=threshold, batch_bytes=1024)
+    try:
+        batches = parallel_decoder.batches()
+        batches.append(memoryview(MESSAGES[0]))
+        # An unknown data type
+        batches.append(memoryview(b"\xff"))
+        with pytest.raises(MillenniumDBError):
+            list(batches.values())
+    finally:
+        parallel_decoder.close()
+
+
+def test_a_closed_decoder_cannot_decode():
+    parallel_decoder = ParallelDecoder(1, threshold=0)
+    parallel_decoder.close()
+    batches = parallel_decoder.batches()
+    batches.append(memoryview(MESSAGES[0]))
+    with pytest.raises(MillenniumDBError):
+        list(batches.values())
+
+
+def test_num_processes_must_be_positive():
+    with pytest.raises(MillenniumDBError):
+        ParallelDecoder(0)
+
+
+def test_a_parallel_result_keeps_the_order_of_the_records(mock_server):
+    rows = [[i, f"s{i}"] for i in range(20_000)]
+    server = mock_server(encode_response(["x", "y"], rows))
+    with millenniumdb_driver_python.driver(
+        server.url, decode_processes=2, parallel_decode_threshold=1024
+    ) as driver:
+        with driver.session() as session:
+            result = session.run("q", storage=ParallelStorage())
+            assert result.values() == rows
+            assert result.stats().records == len(rows)
@@ -0,0 +1,142 @@
+import threading
+import time
+from itertools import count
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError, ResultError, protocol
+
+from benchmarks.mock_server import (
+    MockServer,
+    encode_message,
+    encode_response,
+    encode_value,
+    frame,
+)
+
+ERROR_RESPONSE = frame(
+    encode_message(protocol.ResponseType.ERROR, encode_value("Query failed"))
+)
+
+
+class CountingServer(MockServer):
+    """
+    Answers the nth query with the single record [n], or with an error for
+    the failing ones, so the order of the responses can be checked
+    """
+
+    def __init__(self, failing=()):
+        self.num_queries = 0
+        self._numbers = count()
+        self._numbers_lock = threading.Lock()
+        self._failing = set(failing)
+        super().__init__(b"")
+
+    @property
+    def response(self) -> bytes:
+        with self._numbers_lock:
+            number = next(self._numbers)
+            self.num_queries = number + 1
+        if number in self._failing:
+            return ERROR_RESPONSE
+        return encode_response(["n"], [[number]])
+
+    @response.setter
+    def response(self, value: bytes) -> None:
+        pass
+
+
+@pytest.fixture
+def counting_server():
+    servers = []
+
+    def start(**kwargs) -> CountingServer:
+        server = CountingServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_the_results_are_yielded_in_order(counting_server):
+    server = counting_server()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            results = session.run_many(["q"] * 20, max_in_flight=4)
+            assert [result.values() for result in results] == [[[n]] for n in range(20)]
+
+
+def test_a_failed_query_does_not_affect_the_others(counting_server):
+    server = counting_server(failing={1, 5})
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            results = list(session.run_many(["q"] * 8, max_in_flight=3))
+            for n, result in enumerate(results):
+                if n in (1, 5):
+                    assert isinstance(result, ResultError)
+                else:
+                    assert result.values() == [[n]]
+            assert session.run("q").values() == [[8]]
+
+
+def test_the_first_queries_are_sent_before_iterating(counting_server):
+    server = counting_server()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            results = session.run_many(["q"] * 10, max_in_flight=4)
+            _wait_for(lambda: server.num_queries == 4)
+            time.sleep(0.05)
+            assert server.num_queries == 4
+            assert len(list(results)) == 10
+
+
+def test_the_queries_in_flight_are_bounded(counting_server):
+    server = counting_server()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            in_flight = []
+            for _ in session.run_many(["q"] * 30, max_in_flight=5):
+                in_flight.append(len(session._pipelined_results))
+    assert max(in_flight) <= 5
+
+
+def test_a_pipeline_left_early_is_received_by_the_next_query(counting_server):
+    server = counting_server()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            for result in session.run_many(["q"] * 10, max_in_flight=4):
+                assert result.values() == [[0]]
+                break
+            # The queries already sent are received, the others never are
+            assert session.run("q").values() == [[5]]
+
+
+def test_templates_and_options_are_pipelined(counting_server):
+    server = counting_server()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            template = session.prepare("MATCH (?x) WHERE ?x == $x RETURN ?x")
+            queries = [template.bind(x=i) for i in range(3)]
+            results = session.run_many(queries, raw=True, columnar=True)
+            assert [result.to_numpy()["n"].tolist() for result in results] == [
+                [0],
+                [1],
+                [2],
+            ]
+
+
+def test_max_in_flight_must_be_positive(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            with pytest.raises(MillenniumDBError):
+                session.run_many(["q"], max_in_flight=0)
@@ -0,0 +1,148 @@
+import time
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import PrefetchStorage, ResultError, protocol
+from millenniumdb_driver_python.prefetcher import Prefetcher
+
+from benchmarks.mock_server import (
+    encode_message,
+    encode_value,
+    encode_variables,
+    frame,
+)
+from .conftest import ROWS, VARIABLES
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class FakeStream:
+    """
+    Records fetched by a Prefetcher, each one taking record_bytes, with an
+    error raised after the records if given
+    """
+
+    def __init__(self, num_records: int, record_bytes: int = 10, error=None):
+        self.fetched = 0
+        self.num_bytes = 0
+        self._num_records = num_records
+        self._record_bytes = record_bytes
+        self._error = error
+
+    def fetch(self):
+        if self.fetched == self._num_records:
+            if self._error is not None:
+                raise self._error
+            return None
+        self.fetched += 1
+        self.num_bytes += self._record_bytes
+        return (self.fetched,)
+
+    def prefetcher(self, max_records: int, max_bytes: int = 1_000) -> Prefetcher:
+        return Prefetcher(self.fetch, lambda: self.num_bytes, max_records, max_bytes)
+
+
+def _settled(stream: FakeStream, fetched: int) -> None:
+    _wait_for(lambda: stream.fetched == fetched)
+    time.sleep(0.05)
+    assert stream.fetched == fetched
+
+
+def test_the_queue_is_bounded_by_its_records():
+    stream = FakeStream(100)
+    prefetcher = stream.prefetcher(max_records=4)
+    # The thread holds the record that does not fit while it waits
+    _settled(stream, 5)
+    assert prefetcher.get() == (1,)
+    _settled(stream, 6)
+    prefetcher.stop()
+    prefetcher.join()
+
+
+def test_the_queue_is_bounded_by_its_bytes():
+    stream = FakeStream(100, record_bytes=10)
+    prefetcher = stream.prefetcher(max_records=50, max_bytes=25)
+    _settled(stream, 3)
+    prefetcher.stop()
+    prefetcher.join()
+
+
+def test_a_record_larger_than_max_bytes_is_queued_alone():
+    stream = FakeStream(3, record_bytes=100)
+    prefetcher = stream.prefetcher(max_records=50, max_bytes=25)
+    assert [prefetcher.get() for _ in range(4)] == [(1,), (2,), (3,), None]
+
+
+def test_an_error_is_raised_after_the_records_before_it():
+    stream = FakeStream(3, error=ConnectionError("connection lost"))
+    prefetcher = stream.prefetcher(max_records=2)
+    assert [prefetcher.get() for _ in range(3)] == [(1,), (2,), (3,)]
+    with pytest.raises(ConnectionError):
+        prefetcher.get()
+
+
+def test_stop_ends_the_thread():
+    stream = FakeStream(1_000_000)
+    prefetcher = stream.prefetcher(max_records=2)
+    _wait_for(lambda: stream.fetched == 3)
+    prefetcher.stop()
+    prefetcher.join()
+    assert stream.fetched == 3
+
+
+def test_streamed_records_are_received_ahead(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True, storage=PrefetchStorage(8))
+            assert [record.values() for record in result] == ROWS
+            assert result.stats().records == len(ROWS)
+
+
+def test_a_failed_query_raises_after_its_records(mock_server):
+    response = bytearray(encode_variables(VARIABLES))
+    for row in ROWS[:10]:
+        response += frame(
+            encode_message(protocol.ResponseType.RECORD, encode_value(row))
+        )
+    response += frame(
+        encode_message(protocol.ResponseType.ERROR, encode_value("Query failed"))
+    )
+    server = mock_server(bytes(response))
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True, storage=PrefetchStorage(4))
+            records = []
+            with pytest.raises(ResultError):
+                for record in result:
+                    records.append(record.values())
+            assert records == ROWS[:10]
+            # The whole response was received, so the next one starts cleanly
+            with pytest.raises(ResultError):
+                session.run("q")
+
+
+def test_an_abandoned_result_stops_its_thread(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True, storage=PrefetchStorage(4))
+            assert next(iter(result)).values() == ROWS[0]
+            thread = result._store._prefetcher._thread
+        thread.join(2.0)
+        assert not thread.is_alive()
+        with driver.session() as session:
+            assert session.run("q").values() == ROWS
+
+
+def test_the_next_query_receives_the_rest_of_a_prefetched_result(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True, storage=PrefetchStorage(4))
+            iterator = iter(result)
+            assert [next(iterator).values() for _ in range(3)] == ROWS[:3]
+            assert session.run("q").values() == ROWS
@@ -0,0 +1,174 @@
+import logging
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import QueryHooks, ResultError, SlowQueryLog, protocol
+
+from benchmarks.mock_server import (
+    encode_message,
+    encode_response,
+    encode_value,
+    frame,
+)
+
+from .conftest import ROWS
+
+ERROR_RESPONSE = frame(
+    encode_message(protocol.ResponseType.ERROR, encode_value("Query failed"))
+)
+
+
+class RecordingHooks(QueryHooks):
+    """
+    Keeps the name of each hook called, with the stats it was called with
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def on_query_start(self, stats):
+        self.calls.append(("start", stats))
+
+    def on_first_record(self, stats):
+        self.calls.append(("first_record", stats))
+
+    def on_query_end(self, stats):
+        self.calls.append(("end", stats))
+
+    def on_error(self, stats, error):
+        self.calls.append(("error", stats))
+
+    def names(self):
+        return [name for name, _ in self.calls]
+
+
+def test_the_stats_of_a_query(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            stats = session.run("MATCH (?x) RETURN ?x").stats()
+    assert str(stats.query) == "MATCH (?x) RETURN ?x"
+    assert stats.host == f"127.0.0.1:{server.port}"
+    assert stats.records == len(ROWS)
+    assert stats.bytes_received == len(server.response)
+    assert stats.chunks_received >= len(ROWS) + 2
+    assert stats.recv_calls > 0
+    assert 0.0 <= stats.time_to_variables <= stats.time_to_first_record
+    assert stats.time_to_first_record <= stats.total_time
+    assert 0.0 <= stats.decode_time <= stats.total_time
+    assert stats.error is None
+
+
+def test_only_the_first_query_of_a_connection_has_a_connect_time(server):
+    with millenniumdb_driver_python.driver(server.url, min_pool_size=0) as driver:
+        with driver.session() as session:
+            first = session.run("q").stats()
+            second = session.run("q").stats()
+    assert first.connect_time > 0.0
+    assert second.connect_time == 0.0
+
+
+def test_the_wait_for_the_server_is_in_the_stats(mock_server, response):
+    server = mock_server(response, latency=0.05)
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            stats = session.run("q").stats()
+    assert stats.time_to_variables >= 0.05
+    assert stats.socket_wait_time >= 0.05
+    assert stats.decode_time < stats.total_time - 0.05
+
+
+def test_the_hooks_are_called_in_order(server):
+    hooks = RecordingHooks()
+    with millenniumdb_driver_python.driver(server.url, hooks=[hooks]) as driver:
+        with driver.session() as session:
+            result = session.run("q")
+    assert hooks.names() == ["start", "first_record", "end"]
+    assert all(stats is result.stats() for _, stats in hooks.calls)
+
+
+def test_the_end_of_a_stream_is_its_last_record(server):
+    hooks = RecordingHooks()
+    with millenniumdb_driver_python.driver(server.url, hooks=[hooks]) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True)
+            assert hooks.names() == ["start"]
+            iterator = iter(result)
+            next(iterator)
+            assert hooks.names() == ["start", "first_record"]
+            for _ in iterator:
+                pass
+            assert hooks.names() == ["start", "first_record", "end"]
+            assert result.stats().records == len(ROWS)
+
+
+def test_a_failed_query_calls_on_error_before_on_query_end(mock_server):
+    server = mock_server(ERROR_RESPONSE)
+    hooks = RecordingHooks()
+    with millenniumdb_driver_python.driver(server.url, hooks=[hooks]) as driver:
+        with driver.session() as session:
+            with pytest.raises(ResultError):
+                session.run("q")
+    assert hooks.names() == ["start", "error", "end"]
+    stats = hooks.calls[-1][1]
+    assert str(stats.error) == "Query failed"
+    assert stats.records == 0
+    assert stats.to_dict()["error"] == "Query failed"
+
+
+def test_a_query_without_records_has_no_first_record(mock_server):
+    server = mock_server(encode_response(["x"], []))
+    hooks = RecordingHooks()
+    with millenniumdb_driver_python.driver(server.url, hooks=[hooks]) as driver:
+        with driver.session() as session:
+            stats = session.run("q").stats()
+    assert hooks.names() == ["start", "end"]
+    assert stats.time_to_first_record is None
+    assert stats.records == 0
+
+
+def test_added_hooks_see_the_queries_started_after(server):
+    hooks = RecordingHooks()
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            session.run("q")
+            driver.add_hooks(hooks)
+            session.run("q")
+    assert hooks.names() == ["start", "first_record", "end"]
+
+
+def test_the_stats_as_a_dictionary_and_a_string(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            stats = session.run("q").stats()
+    res = stats.to_dict()
+    assert res["query"] == "q"
+    assert res["records"] == len(ROWS)
+    assert res["decode_time"] == stats.decode_time
+    assert f"records={len(ROWS)}" in str(stats)
+    assert f"host=127.0.0.1:{server.port}" in str(stats)
+
+
+def test_slow_queries_are_logged(mock_server, response, caplog):
+    server = mock_server(response, latency=0.02)
+    with millenniumdb_driver_python.driver(
+        server.url, slow_query_threshold=0.01
+    ) as driver:
+        with driver.session() as session:
+            with caplog.at_level(logging.WARNING, SlowQueryLog.DEFAULT_LOGGER_NAME):
+                session.run("MATCH (?x) RETURN ?x")
+                session.run("x" * 2 * SlowQueryLog.MAX_QUERY_LENGTH)
+    assert len(caplog.records) == 2
+    assert caplog.records[0].getMessage().endswith(": MATCH (?x) RETURN ?x")
+    truncated = "x" * SlowQueryLog.MAX_QUERY_LENGTH + "..."
+    assert caplog.records[1].getMessage().endswith(": " + truncated)
+
+
+def test_fast_queries_are_not_logged(server, caplog):
+    with millenniumdb_driver_python.driver(
+        server.url, slow_query_threshold=10.0
+    ) as driver:
+        with driver.session() as session:
+            with caplog.at_level(logging.WARNING, SlowQueryLog.DEFAULT_LOGGER_NAME):
+                session.run("q")
+    assert caplog.records == []
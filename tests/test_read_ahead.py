@@ -0,0 +1,88 @@
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python.iobuffer import IOBuffer
+from millenniumdb_driver_python.request_builder import RequestBuilder
+from millenniumdb_driver_python.socket_connection import SocketConnection
+
+from benchmarks.mock_server import synthetic_response
+
+from .conftest import ROWS
+
+
+def _receive(connection: SocketConnection, num_bytes: int, step: int) -> bytes:
+    """
+    Send a query and receive num_bytes of its response, step bytes at a time
+    """
+    connection.sendall(RequestBuilder.run("q"))
+    iobuffer = IOBuffer(16)
+    while iobuffer.num_used_bytes < num_bytes:
+        connection.recvall_into(
+            iobuffer, min(step, num_bytes - iobuffer.num_used_bytes)
+        )
+    return bytes(iobuffer.view[: iobuffer.num_used_bytes])
+
+
+def test_the_buffer_grows_geometrically():
+    iobuffer = IOBuffer(16)
+    sizes = []
+    for _ in range(100):
+        iobuffer.reserve(10)
+        iobuffer.write_bytes(b"0123456789")
+        sizes.append(len(iobuffer))
+    assert sorted(set(sizes)) == [16, 32, 64, 128, 256, 512, 1024]
+    assert bytes(iobuffer.view[: iobuffer.num_used_bytes]) == b"0123456789" * 100
+
+
+def test_a_large_extension_is_not_rounded_down():
+    iobuffer = IOBuffer(16)
+    iobuffer.extend(1000)
+    assert len(iobuffer) == 1016
+
+
+@pytest.mark.parametrize("max_retained_size, expected", [(64, 16), (None, 100)])
+def test_reset_shrinks_a_buffer_over_its_retained_size(max_retained_size, expected):
+    iobuffer = IOBuffer(16, max_retained_size)
+    iobuffer.reserve(100)
+    iobuffer.reset()
+    assert len(iobuffer) == expected
+    assert iobuffer.num_used_bytes == 0
+
+
+@pytest.mark.parametrize(
+    "read_ahead_size, step",
+    [(64 * 1024, 7), (64 * 1024, 100_000), (16, 7), (16, 512), (0, 7)],
+)
+def test_the_received_bytes_do_not_depend_on_the_read_ahead(
+    mock_server, read_ahead_size, step
+):
+    server = mock_server(synthetic_response(2_000, 4))
+    connection = SocketConnection("127.0.0.1", server.port, read_ahead_size)
+    try:
+        received = _receive(connection, len(server.response), step)
+    finally:
+        connection.close()
+    assert received == server.response
+
+
+def test_reading_ahead_needs_fewer_recv_calls(server):
+    num_recv_calls = {}
+    for read_ahead_size in [0, 64 * 1024]:
+        connection = SocketConnection("127.0.0.1", server.port, read_ahead_size)
+        try:
+            _receive(connection, len(server.response), 5)
+        finally:
+            connection.close()
+        num_recv_calls[read_ahead_size] = connection.num_recv_calls
+    assert num_recv_calls[0] >= len(server.response) // 5
+    assert num_recv_calls[64 * 1024] < 10
+
+
+@pytest.mark.parametrize("read_ahead_size", [0, 16, 64 * 1024])
+def test_results_do_not_depend_on_the_read_ahead(server, read_ahead_size):
+    with millenniumdb_driver_python.driver(
+        server.url, read_ahead_size=read_ahead_size
+    ) as driver:
+        with driver.session() as session:
+            for _ in range(3):
+                assert session.run("q").values() == ROWS
@@ -0,0 +1,76 @@
+import pickle
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import LazyStorage, MillenniumDBError
+from millenniumdb_driver_python.record import Record, RecordSchema
+
+from .conftest import ROWS, VARIABLES
+
+
+def test_a_record_is_built_with_the_original_arguments():
+    record = Record(["x", "y"], [1, "a"], {"x": 0, "y": 1})
+    assert record.values() == [1, "a"]
+    assert record.entries() == [("x", 1), ("y", "a")]
+    assert record.get("y") == "a"
+    assert record.get(0) == 1
+    assert record.has("x") and not record.has("z") and not record.has(2)
+    assert record.to_dict() == {"x": 1, "y": "a"}
+    assert list(record) == [1, "a"]
+    assert len(record) == record.length == 2
+    assert str(record) == "{x: 1, y: 'a'}"
+
+
+def test_a_record_without_variable_to_index_is_the_same():
+    assert Record(["x"], [1]).to_dict() == Record(["x"], [1], {"x": 0}).to_dict()
+
+
+def test_a_record_checks_its_number_of_values():
+    with pytest.raises(MillenniumDBError):
+        Record(["x", "y"], [1])
+
+
+def test_an_unknown_variable_raises():
+    with pytest.raises(MillenniumDBError):
+        Record(["x"], [1]).get("y")
+
+
+def test_the_records_of_a_schema_share_it():
+    schema = RecordSchema(["x", "y"])
+    first = Record.from_schema(schema, (1, "a"))
+    second = schema.record([2, "b"])
+    assert first._schema is second._schema
+    assert second.values() == [2, "b"]
+    assert schema.raw([2, "b"]) == (2, "b")
+
+
+def test_the_values_are_a_new_list_each_time():
+    record = Record(["x"], [1])
+    values = record.values()
+    values.append(2)
+    assert record.values() == [1]
+
+
+@pytest.mark.parametrize("storage", [None, LazyStorage()])
+def test_the_received_records_match_the_response(server, storage):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", storage=storage)
+            assert result.variables() == VARIABLES
+            records = list(result.records())
+    assert [record.values() for record in records] == ROWS
+    assert records[3].to_dict() == {"x": 3, "y": "s3"}
+    assert records[0]._schema is records[-1]._schema
+
+
+def test_the_raw_values_are_tuples(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            values = session.run("q", raw=True).values()
+    assert values == [tuple(row) for row in ROWS]
+
+
+def test_a_record_survives_pickling():
+    record = pickle.loads(pickle.dumps(Record(["x", "y"], [1, "a"])))
+    assert record.to_dict() == {"x": 1, "y": "a"}
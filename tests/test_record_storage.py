@@ -0,0 +1,150 @@
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import (
+    LazyStorage,
+    MillenniumDBError,
+    ParallelStorage,
+    PrefetchStorage,
+    SpillStorage,
+)
+
+from benchmarks.mock_server import MockServer, synthetic_response
+
+NUM_ROWS = 2_000
+
+
+@pytest.fixture(scope="module")
+def driver():
+    server = MockServer(synthetic_response(NUM_ROWS, 6))
+    with millenniumdb_driver_python.driver(
+        server.url, decode_processes=2, parallel_decode_threshold=4096
+    ) as driver:
+        yield driver
+    server.close()
+
+
+@pytest.fixture(scope="module")
+def expected(driver):
+    with driver.session() as session:
+        return session.run("q").values()
+
+
+STORAGES = {
+    "spill": SpillStorage(max_memory_bytes=16 * 1024),
+    "spill_everything": SpillStorage(max_memory_bytes=0),
+    "lazy": LazyStorage(),
+    "parallel": ParallelStorage(),
+    "prefetch": PrefetchStorage(64, max_bytes=4096),
+}
+
+
+@pytest.mark.parametrize("name", STORAGES)
+def test_records_are_the_same_in_every_storage(driver, expected, name):
+    with driver.session() as session:
+        result = session.run("q", storage=STORAGES[name])
+        assert len(expected) == NUM_ROWS
+        assert list(result.values()) == expected
+        assert list(result.data()) == session.run("q").data()
+
+
+@pytest.mark.parametrize("name", ["spill", "lazy", "prefetch"])
+def test_streamed_records_are_the_same(driver, expected, name):
+    with driver.session() as session:
+        result = session.run("q", stream=True, storage=STORAGES[name])
+        assert [record.values() for record in result] == expected
+
+
+@pytest.mark.parametrize("name", ["spill", "lazy"])
+def test_random_access(driver, expected, name):
+    with driver.session() as session:
+        result = session.run("q", raw=True, storage=STORAGES[name])
+        assert len(result) == NUM_ROWS
+        assert list(result[NUM_ROWS - 1]) == expected[-1]
+        assert [list(row) for row in result[10:20]] == expected[10:20]
+
+
+def test_spilled_records_are_counted(driver):
+    with driver.session() as session:
+        result = session.run("q", storage=STORAGES["spill"])
+        result.records()
+        stats = result.stats()
+        assert 0 < stats.spilled_records < NUM_ROWS
+        assert stats.spilled_bytes > 0
+
+
+def test_columnar_and_raw_results_are_the_same(driver, expected):
+    with driver.session() as session:
+        assert session.run("q", columnar=True).values() == expected
+        assert [list(row) for row in session.run("q", raw=True).values()] == expected
+
+
+def test_a_storage_is_shared_by_concurrent_queries(driver, expected):
+    fan_out = driver.run_all(["q"] * 4, concurrency=4, storage=LazyStorage())
+    for outcome in fan_out.outcomes():
+        assert list(outcome.result.values()) == expected
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"storage": ParallelStorage(), "stream": True},
+        {"storage": ParallelStorage(), "intern": True},
+        {"storage": SpillStorage(1024), "columnar": True},
+        {"storage": LazyStorage(), "columnar": True},
+        {"storage": PrefetchStorage(8), "columnar": True},
+        {"storage": LazyStorage(), "cache": True},
+    ],
+)
+def test_incompatible_options_are_rejected_before_sending(driver, expected, options):
+    with driver.session() as session:
+        with pytest.raises(MillenniumDBError):
+            session.run("q", **options)
+        assert session.run("q").values() == expected
+
+
+def test_parallel_needs_decode_processes(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            with pytest.raises(MillenniumDBError):
+                session.run("q", storage=ParallelStorage())
+
+
+def test_storage_options_are_validated():
+    with pytest.raises(MillenniumDBError):
+        PrefetchStorage(0)
+    with pytest.raises(MillenniumDBError):
+        SpillStorage(-1)
+
+
+def test_max_memory_bytes_is_a_spill_storage(driver, expected):
+    with driver.session() as session:
+        result = session.run("q", max_memory_bytes=16 * 1024)
+        assert list(result.values()) == expected
+        assert result.stats().spilled_records > 0
+        with pytest.raises(MillenniumDBError):
+            session.run("q", max_memory_bytes=1024, storage=LazyStorage())
+
+
+def test_spilled_records_are_deleted_with_the_result(driver, expected):
+    with driver.session() as session:
+        with session.run("q", storage=STORAGES["spill"]) as result:
+            records = result.values()
+            assert list(records) == expected
+        with pytest.raises(MillenniumDBError):
+            list(records)
+        assert records[0] == expected[0]
+
+
+def test_spilled_records_are_deleted_with_the_session(driver):
+    with driver.session() as session:
+        records = session.run("q", storage=STORAGES["spill"]).values()
+    with pytest.raises(MillenniumDBError):
+        records[NUM_ROWS - 1]
+
+
+def test_fan_out_results_outlive_their_sessions(driver, expected):
+    fan_out = driver.run_all(["q"] * 2, concurrency=2, storage=STORAGES["spill"])
+    for outcome in fan_out.outcomes():
+        assert list(outcome.result.values()) == expected
+        outcome.result.close()
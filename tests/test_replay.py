@@ -0,0 +1,139 @@
+import io
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError, ResultError, protocol
+
+from benchmarks.mock_server import (
+    encode_message,
+    encode_response,
+    encode_value,
+    frame,
+    synthetic_response,
+)
+
+from .conftest import ROWS, VARIABLES
+
+ERROR_RESPONSE = frame(
+    encode_message(protocol.ResponseType.ERROR, encode_value("Query failed"))
+)
+
+
+def _capture(server, capture, num_queries: int = 1, **options) -> list:
+    """
+    Run the query num_queries times capturing the responses, and get the
+    values of the results, or None for the failed ones
+    """
+    values = []
+    with millenniumdb_driver_python.driver(server.url, **options) as driver:
+        with driver.session() as session:
+            for _ in range(num_queries):
+                try:
+                    values.append(session.run("q", capture=capture).values())
+                except ResultError:
+                    values.append(None)
+    return values
+
+
+def test_a_capture_is_the_response_as_received(server, tmp_path):
+    path = str(tmp_path / "capture.bin")
+    _capture(server, path, 3)
+    with open(path, "rb") as file:
+        assert file.read() == server.response * 3
+
+
+@pytest.mark.parametrize("read_ahead_size", [0, 16, 64 * 1024])
+def test_a_large_response_is_captured_whatever_the_read_ahead(
+    mock_server, tmp_path, read_ahead_size
+):
+    server = mock_server(synthetic_response(5_000, 4))
+    path = str(tmp_path / "capture.bin")
+    _capture(server, path, 2, read_ahead_size=read_ahead_size)
+    with open(path, "rb") as file:
+        assert file.read() == server.response * 2
+
+
+def test_replayed_results_are_the_captured_results(server, tmp_path):
+    path = str(tmp_path / "capture.bin")
+    _capture(server, path, 2)
+    with millenniumdb_driver_python.replay(path) as replay:
+        results = list(replay.results())
+        assert len(results) == 2
+        for result in results:
+            assert result.variables() == VARIABLES
+            assert result.values() == ROWS
+        with pytest.raises(MillenniumDBError):
+            replay.run()
+
+
+def test_a_capture_can_be_written_to_a_binary_file(server, tmp_path):
+    file = io.BytesIO()
+    _capture(server, file, 2)
+    # The file is not closed by the result, the caller owns it
+    assert file.getvalue() == server.response * 2
+    path = tmp_path / "capture.bin"
+    path.write_bytes(file.getvalue())
+    with millenniumdb_driver_python.replay(str(path)) as replay:
+        assert replay.run().values() == ROWS
+
+
+def test_a_failed_query_is_replayed_as_a_failure(mock_server, tmp_path):
+    server = mock_server(ERROR_RESPONSE)
+    path = str(tmp_path / "capture.bin")
+    assert _capture(server, path) == [None]
+    server.response = encode_response(["n"], [[1]])
+    assert _capture(server, path) == [[[1]]]
+    with millenniumdb_driver_python.replay(path) as replay:
+        with pytest.raises(ResultError):
+            replay.run()
+        assert replay.run().values() == [[1]]
+        replay.rewind()
+        results = list(replay.results())
+    assert isinstance(results[0], ResultError)
+    assert results[1].values() == [[1]]
+
+
+def test_the_options_of_run_are_replayed(server, tmp_path):
+    path = str(tmp_path / "capture.bin")
+    _capture(server, path)
+    with millenniumdb_driver_python.replay(path) as replay:
+        assert [record.values() for record in replay.run(stream=True)] == ROWS
+        replay.rewind()
+        assert replay.run(raw=True).records() == [tuple(row) for row in ROWS]
+        replay.rewind()
+        arrays = replay.run(columnar=True).to_numpy()
+        assert arrays["x"].tolist() == [row[0] for row in ROWS]
+
+
+def test_a_partly_iterated_stream_is_consumed_by_the_next_run(server, tmp_path):
+    path = str(tmp_path / "capture.bin")
+    _capture(server, path, 2)
+    with millenniumdb_driver_python.replay(path) as replay:
+        next(iter(replay.run(stream=True)))
+        assert replay.run().values() == ROWS
+        assert replay.io_stats()["bytes_received"] == 2 * len(server.response)
+
+
+def test_an_empty_capture_has_no_results(tmp_path):
+    path = tmp_path / "capture.bin"
+    path.write_bytes(b"")
+    with millenniumdb_driver_python.replay(str(path)) as replay:
+        assert list(replay.results()) == []
+
+
+def test_a_truncated_capture_raises(server, tmp_path):
+    path = tmp_path / "capture.bin"
+    path.write_bytes(server.response[:-10])
+    with millenniumdb_driver_python.replay(str(path)) as replay:
+        with pytest.raises(MillenniumDBError):
+            replay.run()
+
+
+def test_a_closed_replay_cannot_run(server, tmp_path):
+    path = str(tmp_path / "capture.bin")
+    _capture(server, path)
+    replay = millenniumdb_driver_python.replay(path)
+    replay.close()
+    with pytest.raises(MillenniumDBError):
+        replay.run()
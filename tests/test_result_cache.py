@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import LazyStorage, MillenniumDBError
+from millenniumdb_driver_python.result_cache import CachedResult
+
+from .conftest import ROWS
+
+
+@pytest.fixture
+def driver(server):
+    with millenniumdb_driver_python.driver(
+        server.url, max_pool_size=1, acquire_timeout=1.0, result_cache_entries=16
+    ) as driver:
+        yield driver
+
+
+def test_a_cached_result_is_shared(driver):
+    with driver.session() as session:
+        first = session.run("MATCH (?x) RETURN ?x", cache=True)
+        second = session.run("MATCH  (?x)\n RETURN ?x", cache=True)
+        assert not isinstance(first, CachedResult)
+        assert isinstance(second, CachedResult)
+        assert first.values() == second.values() == ROWS
+        assert second.data() == first.data()
+
+    stats = driver.result_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_invalidate_by_prefix(driver):
+    with driver.session() as session:
+        session.run("MATCH (?x) RETURN ?x", cache=True)
+        session.run("SELECT * WHERE { ?s ?p ?o }", cache=True)
+        assert driver.invalidate_results(prefix="MATCH") == 1
+        result = session.run("SELECT * WHERE { ?s ?p ?o }", cache=True)
+        assert isinstance(result, CachedResult)
+        assert not isinstance(
+            session.run("MATCH (?x) RETURN ?x", cache=True), CachedResult
+        )
+
+
+def test_invalidate_by_tag(driver):
+    with driver.session() as session:
+        session.run("q1", cache=True, cache_tags=["people"])
+        session.run("q2", cache=True, cache_tags=["places"])
+        assert driver.invalidate_results(tag="people") == 1
+        assert not isinstance(session.run("q1", cache=True), CachedResult)
+        assert isinstance(session.run("q2", cache=True), CachedResult)
+        assert driver.invalidate_results() == 2
+    assert driver.result_cache_stats()["entries"] == 0
+
+
+def test_an_entry_expires_after_its_ttl(driver):
+    with driver.session() as session:
+        session.run("q", cache=True, cache_ttl=0.02)
+        time.sleep(0.05)
+        assert not isinstance(session.run("q", cache=True), CachedResult)
+    assert driver.result_cache_stats()["expirations"] == 1
+
+
+def test_caching_on_a_pool_of_one_connection(server):
+    # The catalog of the cache key is fetched through the session's connection
+    with millenniumdb_driver_python.driver(
+        server.url,
+        max_pool_size=1,
+        acquire_timeout=1.0,
+        result_cache_entries=16,
+        catalog_ttl=0.0,
+    ) as driver:
+        with driver.session() as session:
+            for _ in range(3):
+                assert session.run("q", cache=True).values() == ROWS
+
+
+def test_cache_rejects_results_not_kept_in_memory(driver):
+    with driver.session() as session:
+        with pytest.raises(MillenniumDBError):
+            session.run("q", cache=True, stream=True)
+        with pytest.raises(MillenniumDBError):
+            session.run("q", cache=True, storage=LazyStorage())
+        # Rejected before the query was sent, the session goes on
+        assert session.run("q", cache=True).values() == ROWS
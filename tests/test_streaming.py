@@ -0,0 +1,79 @@
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import ResultError, protocol
+
+from benchmarks.mock_server import encode_message, encode_value, frame
+
+from .conftest import ROWS
+
+
+def test_a_streamed_result_is_returned_before_its_records(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True)
+            assert result.variables() == ["x", "y"]
+            assert result.stats().total_time is None
+            assert [record.values() for record in result] == ROWS
+            assert result.stats().total_time is not None
+            assert result.stats().records == len(ROWS)
+
+
+def test_iterated_records_are_not_kept(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True)
+            assert sum(1 for _ in result) == len(ROWS)
+            assert result.records() == []
+            assert sum(1 for _ in result) == 0
+
+
+def test_the_rest_of_a_stream_is_received_on_demand(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            result = session.run("q", stream=True)
+            iterator = iter(result)
+            assert [next(iterator).values() for _ in range(10)] == ROWS[:10]
+            assert result.values() == ROWS[10:]
+            assert result.summary() == {}
+
+
+def test_the_next_query_receives_the_rest_of_a_stream(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            first = session.run("q", stream=True)
+            iterator = iter(first)
+            next(iterator)
+            second = session.run("q", stream=True)
+            assert first.values() == ROWS[1:]
+            assert [record.values() for record in second] == ROWS
+
+
+def test_a_raw_stream_yields_tuples(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            rows = list(session.run("q", stream=True, raw=True))
+    assert rows == [tuple(row) for row in ROWS]
+
+
+def test_a_session_closed_mid_stream_discards_its_connection(server):
+    with millenniumdb_driver_python.driver(server.url, min_pool_size=0) as driver:
+        with driver.session() as session:
+            next(iter(session.run("q", stream=True)))
+        assert driver.pool_stats()["size"] == 0
+        with driver.session() as session:
+            assert session.run("q").values() == ROWS
+
+
+def test_an_error_is_raised_after_the_streamed_records(mock_server, response):
+    error = frame(encode_message(protocol.ResponseType.ERROR, encode_value("boom")))
+    # The records of the default response, with an error instead of SUCCESS
+    success = frame(encode_message(protocol.ResponseType.SUCCESS, encode_value({})))
+    server = mock_server(response[: -len(success)] + error)
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            records = []
+            with pytest.raises(ResultError):
+                for record in session.run("q", stream=True):
+                    records.append(record.values())
+    assert records == ROWS
@@ -0,0 +1,118 @@
+from decimal import Decimal
+from enum import IntEnum
+
+import pytest
+
+import millenniumdb_driver_python
+from millenniumdb_driver_python import MillenniumDBError
+from millenniumdb_driver_python.graph_objects import (
+    IRI,
+    DateTime,
+    GraphAnon,
+    GraphEdge,
+    GraphNode,
+    SimpleDate,
+    StringDatatype,
+    StringLang,
+    Time,
+)
+from millenniumdb_driver_python.template import Template
+
+from .conftest import ROWS
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+
+class Color(IntEnum):
+    RED = 1
+
+
+def _bind(value: object) -> str:
+    return str(Template("RETURN $x").bind(x=value))[len("RETURN ") :]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("Alice", '"Alice"'),
+        (True, "true"),
+        (False, "false"),
+        (-42, "-42"),
+        (Color.RED, "1"),
+        (2.5, "2.5"),
+        (Decimal("12.50"), "12.50"),
+        (IRI("http://a/b#c"), "<http://a/b#c>"),
+        (GraphNode("Q42"), "Q42"),
+        (GraphEdge("_e1"), "_e1"),
+        (GraphAnon("_a1"), "_a1"),
+        (StringLang("hola", "es-CL"), '"hola"@es-CL'),
+        (StringDatatype("42", IRI(XSD + "int")), f'"42"^^<{XSD}int>'),
+        (SimpleDate(2024, 5, 17, 0), f'"2024-05-17Z"^^<{XSD}date>'),
+        (Time(12, 30, 15, 0), f'"12:30:15Z"^^<{XSD}time>'),
+        (
+            DateTime(2024, 5, 17, 12, 30, 15, 0),
+            f'"2024-05-17T12:30:15Z"^^<{XSD}dateTime>',
+        ),
+    ],
+)
+def test_each_type_is_bound(value, expected):
+    assert _bind(value) == expected
+
+
+def test_strings_are_escaped():
+    assert _bind('a "quoted"\\ \n\r\t value') == r'"a \"quoted\"\\ \n\r\t value"'
+    # A string cannot end the literal and add to the query
+    assert _bind('" } DELETE {') == r'"\" } DELETE {"'
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        IRI("http://a> <http://b"),
+        GraphNode("Q42 ?x"),
+        GraphEdge(""),
+        StringLang("x", "en@"),
+        float("nan"),
+        float("inf"),
+        Decimal("NaN"),
+        object(),
+        None,
+    ],
+)
+def test_values_that_cannot_be_bound_are_rejected(value):
+    with pytest.raises(MillenniumDBError):
+        _bind(value)
+
+
+def test_the_parameters_are_bound_in_place():
+    template = Template("MATCH (?x)-[$type]->(${node}_) WHERE ?x == $name RETURN $name")
+    assert template.params() == ("type", "node", "name", "name")
+    query = template.bind(type=GraphEdge("knows"), node=GraphNode("Q1"), name="Bob")
+    assert str(query) == 'MATCH (?x)-[knows]->(Q1_) WHERE ?x == "Bob" RETURN "Bob"'
+
+
+def test_a_double_dollar_is_a_literal_dollar():
+    template = Template('RETURN "costs $$5", $$name, $x$$')
+    assert template.params() == ("x",)
+    assert str(template.bind(x=1)) == 'RETURN "costs $5", $name, 1$'
+
+
+def test_a_single_dollar_without_a_name_is_rejected():
+    with pytest.raises(MillenniumDBError, match=r"\$\$"):
+        Template('RETURN "costs $5"')
+
+
+def test_missing_and_unknown_parameters_are_rejected():
+    template = Template("RETURN $x, $y")
+    with pytest.raises(MillenniumDBError, match="missing"):
+        template.bind(x=1)
+    with pytest.raises(MillenniumDBError, match="unknown"):
+        template.bind(x=1, y=2, z=3)
+
+
+def test_prepared_templates_are_cached_and_run(server):
+    with millenniumdb_driver_python.driver(server.url) as driver:
+        with driver.session() as session:
+            template = session.prepare("MATCH (?x) WHERE ?x == $x RETURN ?x")
+            assert session.prepare(template.template) is template
+            assert session.run(template.bind(x="a")).values() == ROWS